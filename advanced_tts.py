@@ -1,11 +1,22 @@
 import json
-from gtts import gTTS
 import os
 
+from text_to_speech import TextToSpeech
+
 class DyslexiaReadingAssistant:
-    def __init__(self, json_file_path):
+    def __init__(self, json_file_path, tts=None):
         with open(json_file_path, "r") as f:
             self.data = json.load(f)
+        # Engine from configs/tts.yaml; sections read before, here or in another document, come from its cache
+        self.tts = tts or TextToSpeech.from_config()
+        self._document_audio = None
+
+    @property
+    def document_audio(self):
+        """The whole document synthesized once, segment by segment, with its section index"""
+        if self._document_audio is None:
+            self._document_audio = self.tts.render_document(self.data)
+        return self._document_audio
         
     def read_section(self, section_index):
         """Read a specific section aloud"""
@@ -15,7 +26,8 @@ class DyslexiaReadingAssistant:
             for point in section["points"]:
                 text += f"{point}. "
             
-            self._generate_audio(text, f"section_{section_index}.mp3")
+            # Cut from the document audio, nothing is synthesized again
+            self._save_audio(self.document_audio.section_audio(section_index), f"section_{section_index}.{self.tts.format}")
             return text
         return None
     
@@ -27,13 +39,13 @@ class DyslexiaReadingAssistant:
             for point in section["points"]:
                 text += f"{point}. "
         
-        self._generate_audio(text, "full_document.mp3")
+        self._save_audio(self.document_audio.audio, f"full_document.{self.tts.format}")
         return text
     
-    def _generate_audio(self, text, filename):
-        """Generate audio file from text"""
-        tts = gTTS(text=text, lang='en', slow=True)
-        tts.save(filename)
+    def _save_audio(self, audio, filename):
+        """Write audio bytes to a file"""
+        with open(filename, "wb") as f:
+            f.write(audio)
         print(f"✅ Audio saved: {filename}")
         return filename
 
@@ -1,11 +1,17 @@
 import streamlit as st
 import json
-from gtts import gTTS
 import base64
 import os
 
+from text_to_speech import TextToSpeech
+
 st.set_page_config(page_title="AI Reading Assistant for Dyslexic Students", page_icon="📚")
 
+@st.cache_resource
+def get_tts():
+    """The TTS engine from configs/tts.yaml and its audio cache, shared by all sessions"""
+    return TextToSpeech.from_config()
+
 # Custom CSS for dyslexic-friendly styling
 st.markdown("""
 <style>
@@ -72,33 +78,26 @@ def main():
             
             with col1:
                 if st.button("🔊 Read Entire Document Aloud"):
-                    # Combine all text
-                    full_text = f"Document Title: {data['document_title']}. "
-                    for section in data["headings"]:
-                        full_text += f"Section: {section['heading']}. "
-                        for point in section["points"]:
-                            full_text += f"{point}. "
-                    
-                    # Generate audio
-                    tts = gTTS(text=full_text, lang='en', slow=True)
-                    tts.save("output_audio.mp3")
+                    # Generate audio sentence by sentence; the opening starts playing while the rest is produced
+                    tts = get_tts()
+                    first_player = st.empty()
+                    chunks = []
+                    with st.spinner("Generating audio..."):
+                        for audio in tts.iter_speech(tts.document_chunks(data)):
+                            if not chunks:
+                                first_player.audio(audio, format=tts.mime_type, autoplay=True)
+                            chunks.append(audio)
                     
                     # Play audio
-                    audio_file = open("output_audio.mp3", "rb")
-                    audio_bytes = audio_file.read()
-                    
-                    st.audio(audio_bytes, format="audio/mp3")
+                    first_player.empty()
+                    st.audio(tts.join(chunks), format=tts.mime_type)
                     st.success("✅ Audio ready! Click play to listen.")
             
             with col2:
                 if st.button("📊 Read Statistics Only"):
                     stats_text = f"Document has {len(data['headings'])} sections and {sum(len(s['points']) for s in data['headings'])} total points."
-                    tts = gTTS(text=stats_text, lang='en', slow=True)
-                    tts.save("stats_audio.mp3")
-                    
-                    audio_file = open("stats_audio.mp3", "rb")
-                    audio_bytes = audio_file.read()
-                    st.audio(audio_bytes, format="audio/mp3")
+                    audio_bytes = get_tts().synthesize(stats_text)
+                    st.audio(audio_bytes, format=get_tts().mime_type)
                     
         except Exception as e:
             st.error(f"Error loading JSON file: {e}")
@@ -1,6 +1,5 @@
 import streamlit as st
 import json
-from gtts import gTTS
 import os
 import subprocess
 import tempfile
@@ -8,6 +7,8 @@ import shutil
 from pathlib import Path
 import time
 
+from text_to_speech import TextToSpeech
+
 st.set_page_config(
     page_title="AI Reading Assistant for Dyslexic Students", 
     page_icon="📚",
@@ -53,6 +54,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_tts():
+    """The TTS engine from configs/tts.yaml and its audio cache, shared by all sessions"""
+    return TextToSpeech.from_config()
+
 def run_command(command, description):
     """Run a shell command with progress indication"""
     with st.spinner(f"⏳ {description}..."):
@@ -280,22 +286,13 @@ def main():
                 
                 with col1:
                     if st.button("🔊 Read Entire Document"):
-                        full_text = f"Document Title: {data['document_title']}. "
-                        for section in data["headings"]:
-                            full_text += f"Section: {section['heading']}. "
-                            for point in section["points"]:
-                                full_text += f"{point}. "
-                        
-                        tts = gTTS(text=full_text, lang='en', slow=True)
-                        tts.save("output_audio.mp3")
-                        st.audio("output_audio.mp3", format="audio/mp3")
+                        tts = get_tts()
+                        st.audio(tts.synthesize(tts.document_chunks(data)), format=tts.mime_type)
                 
                 with col2:
                     if st.button("📊 Document Summary"):
                         stats_text = f"This document has {len(data['headings'])} main sections and {sum(len(s['points']) for s in data['headings'])} key points."
-                        tts = gTTS(text=stats_text, lang='en', slow=True)
-                        tts.save("summary_audio.mp3")
-                        st.audio("summary_audio.mp3", format="audio/mp3")
+                        st.audio(get_tts().synthesize(stats_text), format=get_tts().mime_type)
                 
                 with col3:
                     # Download JSON button
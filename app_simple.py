@@ -1,14 +1,15 @@
 import streamlit as st
 import json
 import os
-import subprocess
-import tempfile
-import shutil
+import time
 from pathlib import Path
-import glob
-from collections import defaultdict
-import requests
 import io
+import html
+import base64
+import streamlit.components.v1 as components
+
+from jobs import JobQueue, DONE, FAILED
+from text_to_speech import TextToSpeech
 
 st.set_page_config(
     page_title="AI Reading Assistant for Dyslexic Students", 
@@ -50,197 +51,135 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def ensure_directories():
-    """Create all required directories"""
-    directories = [
-        "sample_dataset/pdfs",
-        "sample_dataset/pdfs/input_pages", 
-        "sample_dataset/outputs",
-        "schema"
-    ]
-    for directory in directories:
-        os.makedirs(directory, exist_ok=True)
+# Seconds to wait for a job, progress messages included, before cancelling it
+JOB_TIMEOUT = int(os.environ.get("READEASE_JOB_TIMEOUT", 600))
+
+@st.cache_resource(show_spinner="⏳ Starting pipeline workers...")
+def get_job_queue():
+    """One job queue per server process; its workers keep the YOLO and PaddleOCR models loaded"""
+    # Re-uploaded documents and pages are served from the result cache shared by the workers
+    return JobQueue(workers=int(os.environ.get("READEASE_WORKERS", 2)), cache_dir=".cache", with_audio=True)
 
-def run_command(command, description):
-    """Run a shell command with progress indication"""
-    with st.spinner(f"⏳ {description}..."):
-        try:
-            result = subprocess.run(command, shell=True, capture_output=True, text=True, cwd=os.getcwd())
-            if result.returncode == 0:
-                st.success(f"✅ {description} completed")
-                return True, result.stdout
-            else:
-                st.error(f"❌ {description} failed: {result.stderr}")
-                return False, result.stderr
-        except Exception as e:
-            st.error(f"❌ {description} error: {e}")
-            return False, str(e)
+@st.cache_resource
+def get_tts():
+    """TTS engine from configs/tts.yaml, with the audio cache shared by all sessions and the pipeline workers"""
+    return TextToSpeech.from_config(cache_dir=os.path.join(".cache", "audio"))
 
 def process_pdf_files(uploaded_files):
-    """Process uploaded PDF files through the entire pipeline"""
-    
-    # Ensure all directories exist
-    ensure_directories()
-    
-    # Save uploaded PDFs to sample_dataset/pdfs/
-    saved_pdfs = []
+    """Submit uploaded PDF files to the job queue and follow them until they finish"""
+    job_queue = get_job_queue()
+
+    # Each upload becomes its own job with its own workspace, so sessions never share files;
+    # uploads with the same file name get a numbered name so their results do not overwrite each other
+    jobs = []
+    names = set()
     for uploaded_file in uploaded_files:
-        pdf_path = os.path.join("sample_dataset/pdfs", uploaded_file.name)
-        with open(pdf_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        saved_pdfs.append(pdf_path)
-    
-    st.markdown(f'<div class="success-box">📁 Saved {len(saved_pdfs)} PDF file(s) to sample_dataset/pdfs/</div>', unsafe_allow_html=True)
-    
-    # Process each PDF
+        pdf_name = Path(uploaded_file.name).stem
+        copy = 2
+        while pdf_name in names:
+            pdf_name = f"{Path(uploaded_file.name).stem} ({copy})"
+            copy += 1
+        names.add(pdf_name)
+        jobs.append((pdf_name, job_queue.submit(uploaded_file.getvalue(), name=f"{pdf_name}.pdf")))
+
+    st.markdown(f'<div class="success-box">📁 Queued {len(jobs)} PDF file(s) for processing</div>', unsafe_allow_html=True)
+
     all_structured_outputs = {}
-    
-    for pdf_path in saved_pdfs:
-        pdf_name = Path(pdf_path).stem
+
+    for pdf_name, job_id in jobs:
         st.subheader(f"📄 Processing: {pdf_name}")
-        
-        # Step 1: Convert PDF to images
-        st.write("**🔄 Step 1: Converting PDF to images**")
-        cmd = f'mutool convert -o "sample_dataset/pdfs/input_pages/{pdf_name}_page-%d.png" -F png -O resolution=200 "{pdf_path}"'
-        success, output = run_command(cmd, f"Converting {pdf_name}")
-        if not success:
-            st.warning(f"⚠️ Skipping {pdf_name} due to conversion failure")
-            continue
-        
-        # Step 2: Layout Detection
-        st.write("**🖼️ Step 2: Layout Detection**")
-        layout_cmd = 'python scripts/layout_detection.py --config configs/layout_detection_yolo.yaml'
-        success, output = run_command(layout_cmd, "Running layout detection")
-        
-        if not success:
-            st.warning("⚠️ Layout detection had issues, but continuing...")
-        
-        # Step 3: Text Extraction
-        st.write("**📝 Step 3: Text Extraction**")
-        image_files = glob.glob(f"sample_dataset/pdfs/input_pages/{pdf_name}_page-*.png")
-        
-        successful_extractions = 0
-        for image_path in sorted(image_files):
-            base_name = Path(image_path).stem
-            json_output_path = f"sample_dataset/outputs/{base_name}.json"
-            
-            extract_cmd = f'python scripts/extract_text.py --image "{image_path}" --json "{json_output_path}"'
-            success, output = run_command(extract_cmd, f"Extracting text from {base_name}")
-            if success:
-                successful_extractions += 1
-        
-        if successful_extractions == 0:
-            st.error(f"❌ No text extraction succeeded for {pdf_name}")
-            continue
-        
-        # Step 4: Convert to Structured JSON for this PDF
-        st.write("**📊 Step 4: Creating Structured Output**")
-        
-        # Use the enhanced convert_to_structure.py logic
-        structured_data = create_structured_json_for_pdf(pdf_name)
-        
-        if structured_data:
-            # Save PDF-specific structured output
-            output_filename = f"structured_output_{pdf_name}.json"
-            output_path = os.path.join("schema", output_filename)
-            
-            with open(output_path, "w") as f:
-                json.dump(structured_data, f, indent=2)
-            
+
+        # Rasterize → layout detection → text extraction → structuring, in a pipeline worker
+        st.write("**🔄 Converting PDF → Layout Detection → Text Extraction → Structured Output**")
+        with st.spinner(f"⏳ Processing {pdf_name}..."):
+            # One deadline for the progress messages and the final status
+            deadline = time.time() + JOB_TIMEOUT
+            for message in job_queue.stream(job_id, timeout=JOB_TIMEOUT):
+                st.write(f"✅ {message}")
+            status = job_queue.wait(job_id, timeout=max(0.0, deadline - time.time()))
+
+        if status["status"] == DONE:
+            # Kept in the session only: a shared output directory would let sessions overwrite each other
             all_structured_outputs[pdf_name] = {
-                "data": structured_data,
-                "path": output_path
+                "data": job_queue.result(job_id),
             }
-            
-            st.success(f"✅ Created structured output: {output_path}")
+            document_audio = job_queue.document_audio(job_id)
+            if document_audio:
+                st.session_state[f"audio_doc_{pdf_name}"] = document_audio
+                st.session_state[f"audio_full_{pdf_name}"] = io.BytesIO(document_audio.audio)
+            st.success(f"✅ Created structured output for {pdf_name}")
+        elif status["status"] == FAILED:
+            st.error(f"❌ Processing {pdf_name} failed: {status['error']}")
         else:
-            st.error(f"❌ Failed to create structured JSON for {pdf_name}")
-    
+            st.error(f"❌ Processing {pdf_name} timed out after {JOB_TIMEOUT} s (still {status['status']})")
+            # Kills its worker, so nothing writes to the workspace removed below
+            job_queue.cancel(job_id)
+        # Results now live in the session, so the job's workspace can go
+        job_queue.remove(job_id)
+
     return all_structured_outputs
 
-def create_structured_json_for_pdf(pdf_name):
-    """Create structured JSON for a specific PDF"""
-    
-    # Find all JSON files for this PDF
-    json_files = glob.glob(f"sample_dataset/outputs/{pdf_name}_page-*.json")
-    
-    if not json_files:
-        st.error(f"❌ No JSON files found for {pdf_name}")
-        return None
-    
-    all_data = []
-    
-    # Read and combine all JSON files for this PDF
-    for json_file in sorted(json_files):
-        try:
-            with open(json_file, "r") as f:
-                page_data = json.load(f)
-                # Add page information to each block
-                for block in page_data:
-                    block["source_file"] = os.path.basename(json_file)
-                all_data.extend(page_data)
-        except Exception as e:
-            st.warning(f"⚠️ Error reading {json_file}: {e}")
-            continue
-    
-    if not all_data:
-        st.error(f"❌ No data found for PDF: {pdf_name}")
+def synthesize_audio(text, first_player=None):
+    """Synthesize text (a string or a list of chunks) with the configured TTS engine, through the audio cache
+
+    Chunks (see TextToSpeech.document_chunks) are synthesized concurrently; with `first_player`
+    (an st.empty() placeholder) the first chunk starts playing as soon as it arrives.
+    """
+    tts = get_tts()
+    try:
+        audio = []
+        for chunk_audio in tts.iter_speech(tts.chunks(text) if isinstance(text, str) else text):
+            if first_player is not None and not audio:
+                first_player.audio(chunk_audio, format=tts.mime_type, autoplay=True)
+            audio.append(chunk_audio)
+        return io.BytesIO(tts.join(audio))
+    except Exception as e:
+        st.error(f"TTS Error: {e}")
         return None
-    
-    # Sort elements by their vertical position (y1)
-    all_data.sort(key=lambda x: x["box"]["y1"])
-    
-    document_title = None
-    current_heading = None
-    structured = {"document_title": "", "headings": []}
-    
-    for block in all_data:
-        text = block["text"].strip()
-        if not text or "Source:" in text or "Generated on" in text:
-            continue
 
-        if block["name"] == "title":
-            # First title becomes document title
-            if document_title is None:
-                document_title = text
-                structured["document_title"] = document_title
-            else:
-                # Start a new heading section
-                current_heading = {"heading": text, "points": []}
-                structured["headings"].append(current_heading)
-        elif block["name"] == "plain text":
-            if current_heading:
-                current_heading["points"].append(text)
-            else:
-                # If plain text appears before a heading, add default heading
-                if not structured["headings"]:
-                    structured["headings"].append({"heading": "General", "points": []})
-                structured["headings"][-1]["points"].append(text)
-    
-    return structured
+def render_document_audio(data, first_player=None):
+    """Synthesize the document per section (see TextToSpeech.render_document), playing the title first if `first_player` is given"""
+    tts = get_tts()
+
+    def on_segment(index, audio):
+        if first_player is not None and index == 0:
+            first_player.audio(audio, format=tts.mime_type, autoplay=True)
 
-def google_tts(text, language='en'):
-    """Use Google Translate TTS API directly"""
     try:
-        # Google Translate TTS URL
-        url = f"http://translate.google.com/translate_tts?ie=UTF-8&tl={language}&q={requests.utils.quote(text)}&client=tw-ob"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        
-        if response.status_code == 200:
-            return io.BytesIO(response.content)
-        else:
-            st.error(f"Google TTS API error: {response.status_code}")
-            return None
-            
+        return tts.render_document(data, on_segment=on_segment)
     except Exception as e:
         st.error(f"TTS Error: {e}")
         return None
 
+def follow_along_player(audio, mime_type, timing_track):
+    """Audio player that highlights the word being read, from the precomputed timing track; runs in the browser"""
+    words = timing_track["words"]
+    spans = " ".join(f'<span id="w{i}">{html.escape(word)}</span>' for i, (word, _, _) in enumerate(words))
+    starts = json.dumps([start for _, start, _ in words])
+    ends = json.dumps([end for _, _, end in words])
+    source = f"data:{mime_type};base64,{base64.b64encode(audio).decode('ascii')}"
+    return f"""
+<audio id="player" controls src="{source}" style="width: 100%"></audio>
+<div style="font-family: 'Open Sans', Arial, sans-serif; font-size: 18px; line-height: 1.6; letter-spacing: 0.5px; color: #333">{spans}</div>
+<style>.current {{ background-color: #ffe066; border-radius: 4px; }}</style>
+<script>
+const starts = {starts}, ends = {ends};
+const player = document.getElementById("player");
+let current = -1;
+player.addEventListener("timeupdate", () => {{
+    const t = player.currentTime;
+    let i = current >= 0 && t >= starts[current] ? current : 0;
+    while (i + 1 < starts.length && starts[i + 1] <= t) i++;
+    if (t < starts[i] || t > ends[i] + 0.25) i = -1;
+    if (i !== current) {{
+        if (current >= 0) document.getElementById("w" + current).classList.remove("current");
+        if (i >= 0) document.getElementById("w" + i).classList.add("current");
+        current = i;
+    }}
+}});
+</script>
+"""
+
 def display_results_section():
     """Display the results section with all processed PDFs"""
     if "processed_pdfs" not in st.session_state:
@@ -257,19 +196,25 @@ def display_results_section():
     for i, pdf_name in enumerate(pdf_names):
         with tabs[i]:
             data = st.session_state.processed_pdfs[pdf_name]["data"]
-            file_path = st.session_state.processed_pdfs[pdf_name]["path"]
             
             # Display results
             st.markdown(f'<div class="section-box"><h2>📄 {data["document_title"]}</h2></div>', unsafe_allow_html=True)
             
-            for section in data["headings"]:
+            document_audio = st.session_state.get(f"audio_doc_{pdf_name}")
+            for section_index, section in enumerate(data["headings"]):
                 with st.container():
                     st.markdown(f'<div class="section-box"><h3>📌 {section["heading"]}</h3>', unsafe_allow_html=True)
                     for point in section["points"]:
                         st.markdown(f'<div class="dyslexic-text">• {point}</div>', unsafe_allow_html=True)
                     st.markdown('</div>', unsafe_allow_html=True)
+                    if document_audio is not None:
+                        # Cut from the document audio by its section index, with its word timings; no synthesis
+                        with st.expander("🎧 Listen and follow along"):
+                            components.html(follow_along_player(document_audio.section_audio(section_index), get_tts().mime_type,
+                                                                document_audio.timing_track(section_index)),
+                                            height=240, scrolling=True)
             
-            # Text-to-Speech functionality using Google TTS
+            # Text-to-Speech functionality
             st.markdown("---")
             st.subheader("🎧 Audio Reading Assistant")
             
@@ -278,18 +223,14 @@ def display_results_section():
             with col1:
                 st.write("**Read Entire Document**")
                 if st.button(f"🔊 Generate Audio", key=f"read_full_{pdf_name}"):
-                    full_text = f"Document Title: {data['document_title']}. "
-                    for section in data["headings"]:
-                        full_text += f"Section: {section['heading']}. "
-                        for point in section["points"]:
-                            full_text += f"{point}. "
-                    
-                    # Use Google TTS
-                    with st.spinner("Generating audio via Google TTS..."):
-                        audio_bytes = google_tts(full_text)
+                    # The opening plays while the rest of the document is synthesized
+                    first_player = st.empty()
+                    with st.spinner("Generating audio..."):
+                        document_audio = render_document_audio(data, first_player=first_player)
                     
-                    if audio_bytes:
-                        st.session_state[f"audio_full_{pdf_name}"] = audio_bytes
+                    if document_audio:
+                        st.session_state[f"audio_doc_{pdf_name}"] = document_audio
+                        st.session_state[f"audio_full_{pdf_name}"] = io.BytesIO(document_audio.audio)
                         st.success("✅ Full document audio generated!")
                     else:
                         st.error("❌ Failed to generate audio")
@@ -299,9 +240,8 @@ def display_results_section():
                 if st.button(f"📊 Generate Summary", key=f"summary_{pdf_name}"):
                     stats_text = f"This document has {len(data['headings'])} main sections and {sum(len(s['points']) for s in data['headings'])} key points."
                     
-                    # Use Google TTS
                     with st.spinner("Generating summary audio..."):
-                        audio_bytes = google_tts(stats_text)
+                        audio_bytes = synthesize_audio(stats_text)
                     
                     if audio_bytes:
                         st.session_state[f"audio_summary_{pdf_name}"] = audio_bytes
@@ -330,14 +270,14 @@ def display_results_section():
                 st.write("**Full Document Audio**")
                 if f"audio_full_{pdf_name}" in st.session_state:
                     audio_bytes = st.session_state[f"audio_full_{pdf_name}"]
-                    st.audio(audio_bytes, format="audio/mp3")
+                    st.audio(audio_bytes, format=get_tts().mime_type)
                     
                     # Download button for audio
                     st.download_button(
                         label="📥 Download Full Audio",
                         data=audio_bytes.getvalue(),
-                        file_name=f"full_document_{pdf_name}.mp3",
-                        mime="audio/mp3",
+                        file_name=f"full_document_{pdf_name}.{get_tts().format}",
+                        mime=get_tts().mime_type,
                         key=f"dl_full_{pdf_name}"
                     )
                 else:
@@ -347,14 +287,14 @@ def display_results_section():
                 st.write("**Document Summary Audio**")
                 if f"audio_summary_{pdf_name}" in st.session_state:
                     audio_bytes = st.session_state[f"audio_summary_{pdf_name}"]
-                    st.audio(audio_bytes, format="audio/mp3")
+                    st.audio(audio_bytes, format=get_tts().mime_type)
                     
                     # Download button for audio
                     st.download_button(
                         label="📥 Download Summary Audio",
                         data=audio_bytes.getvalue(),
-                        file_name=f"summary_{pdf_name}.mp3",
-                        mime="audio/mp3",
+                        file_name=f"summary_{pdf_name}.{get_tts().format}",
+                        mime=get_tts().mime_type,
                         key=f"dl_summary_{pdf_name}"
                     )
                 else:
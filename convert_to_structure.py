@@ -1,104 +1,172 @@
 import json
 import os
 import glob
+import argparse
 from collections import defaultdict
 
+from pdf_extract_kit.utils.jsonl import iter_jsonl
+from pdf_extract_kit.utils.layout_store import LayoutStore, json_to_store
+
 def process_pdf_json_files(pdf_name, json_files):
     """Process all JSON files for a single PDF and create structured output"""
     
-    all_data = []
+    builder = StructureBuilder()
     
-    # Read and combine all JSON files for this PDF
+    # Read the JSON files one at a time; only the text of each page is kept once it is added
     for json_file in sorted(json_files):  # Sort to maintain page order
         try:
             with open(json_file, "r") as f:
                 page_data = json.load(f)
-                # Add page information to each block
-                for block in page_data:
-                    block["source_file"] = os.path.basename(json_file)
-                all_data.extend(page_data)
+            builder.add(page_data)
         except Exception as e:
             print(f"⚠️  Error reading {json_file}: {e}")
             continue
     
-    if not all_data:
+    if not builder.num_blocks:
         print(f"❌ No data found for PDF: {pdf_name}")
         return
     
-    # Step 1: Sort elements by their vertical position (y1)
-    all_data.sort(key=lambda x: x["box"]["y1"])
-    
-    document_title = None
-    current_heading = None
-    structured = {"document_title": "", "headings": []}
-    
-    for block in all_data:
-        text = block["text"].strip()
-        if not text or "Source:" in text or "Generated on" in text:
-            continue
-    
-        if block["name"] == "title":
-            # First title becomes document title
-            if document_title is None:
-                document_title = text
-                structured["document_title"] = document_title
-            else:
-                # Start a new heading section
-                current_heading = {"heading": text, "points": []}
-                structured["headings"].append(current_heading)
-        elif block["name"] == "plain text":
-            if current_heading:
-                current_heading["points"].append(text)
-            else:
-                # If plain text appears before a heading, ignore or add default heading
-                if not structured["headings"]:
-                    structured["headings"].append({"heading": "General", "points": []})
-                structured["headings"][-1]["points"].append(text)
-    
-    return structured
+    return builder.result()
 
-def main():
-    # Get the current directory
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    outputs_dir = os.path.join(current_dir, "sample_dataset", "outputs")
+def process_pdf_jsonl(pdf_name, jsonl_path):
+    """Create structured output from a `<pdf>.jsonl` file with one {"page", "blocks"} record per page"""
+    builder = StructureBuilder()
+    for record in iter_jsonl(jsonl_path):
+        builder.add(record["blocks"])
     
-    # Find all JSON files in the outputs directory
-    json_files = glob.glob(os.path.join(outputs_dir, "*.json"))
-    
-    if not json_files:
-        print("❌ No JSON files found in sample_dataset/outputs/")
+    if not builder.num_blocks:
+        print(f"❌ No data found for PDF: {pdf_name}")
         return
     
-    # Group JSON files by PDF name
-    pdf_files = defaultdict(list)
-    
-    for json_file in json_files:
-        filename = os.path.basename(json_file)
+    return builder.result()
+
+class StructureBuilder:
+    """
+    Builds the heading/points schema of one PDF page by page.
+
+    Only the position, kind and text of blocks that can end up in the output are kept, so
+    each page result can be dropped as soon as it is added, and memory stays at one page
+    plus the document text. The result is the same as build_structure over all blocks.
+    """
+
+    def __init__(self):
+        self.num_blocks = 0
+        self._blocks = []
+
+    def add(self, blocks):
+        """Add the blocks of one page; a page that cannot be read adds nothing."""
+        kept = []
+        for block in blocks:
+            text = (block.get("text") or "").strip()
+            if not text or "Source:" in text or "Generated on" in text:
+                continue
+            if block["name"] in ("title", "plain text"):
+                kept.append((block["box"]["y1"], block["name"], text))
+        self._blocks.extend(kept)
+        self.num_blocks += len(blocks)
+
+    def result(self):
+        # Step 1: Sort elements by their vertical position (y1); the sort is stable, like the original
+        self._blocks.sort(key=lambda x: x[0])
         
-        # Extract PDF name from filename patterns like:
-        # "news-automata_page-1.json", "news_page-2.json", etc.
-        if '_page-' in filename:
-            # Pattern: pdfname_page-X.json
-            pdf_name = filename.split('_page-')[0]
-        elif 'page-' in filename and not '_' in filename:
-            # Pattern: page-X.json (no PDF name)
-            pdf_name = "document"
-        else:
-            # Other patterns, use filename without extension
-            pdf_name = os.path.splitext(filename)[0]
+        document_title = None
+        current_heading = None
+        structured = {"document_title": "", "headings": []}
         
-        pdf_files[pdf_name].append(json_file)
-    
-    print(f"📁 Found {len(pdf_files)} PDF(s) with JSON files:")
-    for pdf_name, files in pdf_files.items():
-        print(f"   📄 {pdf_name}: {len(files)} page(s)")
-    
-    # Process each PDF separately
-    for pdf_name, json_files in pdf_files.items():
-        print(f"\n🔄 Processing PDF: {pdf_name}")
-        
-        structured_data = process_pdf_json_files(pdf_name, json_files)
+        for _, name, text in self._blocks:
+            if name == "title":
+                # First title becomes document title
+                if document_title is None:
+                    document_title = text
+                    structured["document_title"] = document_title
+                else:
+                    # Start a new heading section
+                    current_heading = {"heading": text, "points": []}
+                    structured["headings"].append(current_heading)
+            elif name == "plain text":
+                if current_heading:
+                    current_heading["points"].append(text)
+                else:
+                    # If plain text appears before a heading, ignore or add default heading
+                    if not structured["headings"]:
+                        structured["headings"].append({"heading": "General", "points": []})
+                    structured["headings"][-1]["points"].append(text)
         
+        return structured
+
+def build_structure(all_data):
+    """Turn the text-filled layout blocks of one PDF into the heading/points schema"""
+    builder = StructureBuilder()
+    builder.add(all_data)
+    return builder.result()
+
+def pdf_name_for(filename):
+    """Name of the PDF a per-page file belongs to"""
+    # Extract PDF name from filename patterns like:
+    # "news-automata_page-1.json", "news_page-2.json", etc.
+    if '_page-' in filename:
+        # Pattern: pdfname_page-X.json
+        return filename.split('_page-')[0]
+    elif 'page-' in filename and not '_' in filename:
+        # Pattern: page-X.json (no PDF name)
+        return "document"
+    else:
+        # Other patterns, use filename without extension
+        return os.path.splitext(filename)[0]
+
+def process_layout_store(store_path):
+    """Create the structured output of every PDF in a layout store (see pdf_extract_kit/utils/layout_store.py)"""
+    store = LayoutStore.load(store_path)
+    builders = defaultdict(StructureBuilder)
+    for page_name, blocks in store.iter_pages():
+        builders[pdf_name_for(page_name)].add(blocks)
+    return {pdf_name: builder.result() for pdf_name, builder in builders.items() if builder.num_blocks}
+
+def main(store_path=None, write_store=None):
+    # Get the current directory
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    outputs_dir = os.path.join(current_dir, "sample_dataset", "outputs")
+
+    if store_path:
+        # Columnar store: one memory-mapped read instead of one JSON parse per page
+        results = process_layout_store(store_path)
+        print(f"📁 Found {len(results)} PDF(s) in layout store {store_path}")
+    else:
+        # Find all JSON files (one per page) and JSON Lines files (one per PDF) in the outputs directory
+        json_files = glob.glob(os.path.join(outputs_dir, "*.json"))
+        jsonl_files = glob.glob(os.path.join(outputs_dir, "*.jsonl"))
+
+        if not json_files and not jsonl_files:
+            print("❌ No JSON files found in sample_dataset/outputs/")
+            return
+
+        if write_store and json_files:
+            json_to_store(sorted(json_files), write_store)
+            print(f"💾 Saved layout store with {len(json_files)} page(s) at: {write_store}")
+
+        # Group JSON files by PDF name
+        pdf_files = defaultdict(list)
+
+        for json_file in json_files:
+            pdf_files[pdf_name_for(os.path.basename(json_file))].append(json_file)
+
+        print(f"📁 Found {len(pdf_files) + len(jsonl_files)} PDF(s) with JSON files:")
+        for pdf_name, files in pdf_files.items():
+            print(f"   📄 {pdf_name}: {len(files)} page(s)")
+        for jsonl_file in jsonl_files:
+            print(f"   📄 {os.path.splitext(os.path.basename(jsonl_file))[0]}: JSON Lines")
+
+        results = {}
+        for pdf_name, json_files in pdf_files.items():
+            print(f"\n🔄 Processing PDF: {pdf_name}")
+            results[pdf_name] = process_pdf_json_files(pdf_name, json_files)
+        for jsonl_file in jsonl_files:
+            pdf_name = os.path.splitext(os.path.basename(jsonl_file))[0]
+            print(f"\n🔄 Processing PDF: {pdf_name}")
+            results[pdf_name] = process_pdf_jsonl(pdf_name, jsonl_file)
+
+    # Save each PDF separately
+    for pdf_name, structured_data in results.items():
         if structured_data:
             # Create output filename based on PDF name
             output_filename = f"structured_output_{pdf_name}.json"
@@ -120,4 +188,8 @@ def main():
             print(f"   📝 Total points: {total_points}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create structured outputs from per-page layout+text results.")
+    parser.add_argument('--store', help="Read a layout store directory instead of sample_dataset/outputs/*.json")
+    parser.add_argument('--write_store', help="Also convert sample_dataset/outputs/*.json into a layout store here")
+    args = parser.parse_args()
+    main(store_path=args.store, write_store=args.write_store)
\ No newline at end of file
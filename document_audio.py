@@ -0,0 +1,192 @@
+import os
+import json
+
+from tts_backends import read_wav, wav_bytes
+from speech_timing import mp3_duration, sentence_timings, shift_timings
+
+
+def document_segments(data):
+    """
+    The read-aloud text of a structured output ({"document_title", "headings"}) as segments:
+    the title, then each heading followed by its points. Joined in order they give
+    document_text(data).
+
+    Returns:
+        list[dict]: {"kind": "title" | "heading" | "point", "section", "point", "text"};
+            section and point are indices (None where they do not apply).
+    """
+    segments = [{'kind': 'title', 'section': None, 'point': None, 'text': f"Document Title: {data['document_title']}. "}]
+    for i, section in enumerate(data["headings"]):
+        segments.append({'kind': 'heading', 'section': i, 'point': None, 'text': f"Section: {section['heading']}. "})
+        for j, point in enumerate(section["points"]):
+            segments.append({'kind': 'point', 'section': i, 'point': j, 'text': f"{point}. "})
+    return segments
+
+
+class DocumentAudio:
+    def __init__(self, segments, audio_format, audio=None, path=None, wav_params=None):
+        """
+        Full-document audio with a byte-offset index of its segments (see document_segments).
+
+        The document is synthesized once, segment by segment, and the segments are joined
+        without re-encoding (build()); any segment or section is then served by slicing the
+        full file, so jumping to a section needs no synthesis. Use build() or load() rather
+        than this constructor.
+
+        Args:
+            segments (list[dict]): document_segments() entries with `offset` and `length`, the
+                byte range of their audio in the full file, `start` and `duration` in seconds,
+                and `words`: [word, start, end] timings in seconds from the start of the document.
+            audio_format (str): "mp3" or "wav".
+            audio (bytes, optional): The full audio, kept in memory.
+            path (str, optional): The full audio file, read on demand when `audio` is not given.
+            wav_params (tuple, optional): (channels, sample width, sample rate) of WAV audio.
+        """
+        self.segments = segments
+        self.format = audio_format
+        self.path = path
+        self.wav_params = tuple(wav_params) if wav_params else None
+        self._audio = audio
+
+    @classmethod
+    def build(cls, segments, segment_audio, audio_format, segment_timings=None):
+        """
+        Join per-segment audio into one file and index it.
+
+        MP3 segments are concatenated as they are. WAV segments must share one format; their
+        PCM frames are concatenated under a single header, so each segment's range in the file
+        holds only its frames.
+
+        Args:
+            segments (list[dict]): document_segments() entries.
+            segment_audio (list[bytes]): Audio of each segment.
+            audio_format (str): "mp3" or "wav".
+            segment_timings (list, optional): Word timings of each segment, relative to its start.
+        """
+        segments = [dict(segment) for segment in segments]
+        if audio_format == "mp3":
+            parts, header_size, wav_params = list(segment_audio), 0, None
+            audio = b"".join(parts)
+            durations = [mp3_duration(part) for part in parts]
+        elif audio_format == "wav":
+            wav_params, parts = None, []
+            for data in segment_audio:
+                if not data:
+                    parts.append(b"")
+                    continue
+                params, frames = read_wav(data)
+                if wav_params is not None and params != wav_params:
+                    raise ValueError(f"WAV segments differ in format: {params} vs {wav_params}")
+                wav_params = params
+                parts.append(frames)
+            wav_params = wav_params or (1, 2, 16000)
+            pcm = b"".join(parts)
+            audio = wav_bytes(pcm, wav_params[2], wav_params[0], wav_params[1])
+            header_size = len(audio) - len(pcm)
+            bytes_per_second = wav_params[0] * wav_params[1] * wav_params[2]
+            durations = [len(part) / bytes_per_second for part in parts]
+        else:
+            raise ValueError(f"Cannot concatenate {audio_format} audio")
+
+        offset, start = header_size, 0.0
+        for k, (segment, part, duration) in enumerate(zip(segments, parts, durations)):
+            segment['offset'], segment['length'] = offset, len(part)
+            segment['start'], segment['duration'] = round(start, 3), round(duration, 3)
+            segment['words'] = shift_timings(segment_timings[k], start) if segment_timings else []
+            offset += len(part)
+            start += duration
+        return cls(segments, audio_format, audio=audio, wav_params=wav_params)
+
+    @property
+    def audio(self):
+        """The full-document audio."""
+        if self._audio is None:
+            with open(self.path, 'rb') as f:
+                self._audio = f.read()
+        return self._audio
+
+    @property
+    def num_sections(self):
+        return len({segment['section'] for segment in self.segments if segment['section'] is not None})
+
+    def _read(self, offset, length):
+        if self._audio is not None:
+            return self._audio[offset:offset + length]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def _playable(self, data):
+        if self.format == "wav":
+            channels, sample_width, sample_rate = self.wav_params
+            return wav_bytes(data, sample_rate, channels, sample_width)
+        return data
+
+    def span_audio(self, first, last):
+        """Playable audio of segments first..last (inclusive), read from their byte range."""
+        start = self.segments[first]['offset']
+        end = self.segments[last]['offset'] + self.segments[last]['length']
+        return self._playable(self._read(start, end - start))
+
+    def segment_audio(self, index):
+        return self.span_audio(index, index)
+
+    def section_range(self, section):
+        """(first, last) segment indices of a section: its heading and points."""
+        indices = [k for k, segment in enumerate(self.segments) if segment['section'] == section]
+        if not indices:
+            raise IndexError(f"Section {section} not in document audio")
+        return indices[0], indices[-1]
+
+    def section_audio(self, section):
+        """Playable audio of one section (heading and points), without synthesis."""
+        return self.span_audio(*self.section_range(section))
+
+    def word_timings(self, section=None):
+        """
+        [word, start, end] timings in seconds, for the whole document or, with `section`,
+        relative to the start of that section's audio (as served by section_audio).
+        """
+        if section is None:
+            return [word for segment in self.segments for word in segment.get('words', [])]
+        first, last = self.section_range(section)
+        words = [word for segment in self.segments[first:last + 1] for word in segment.get('words', [])]
+        return shift_timings(words, -self.segments[first]['start'])
+
+    def timing_track(self, section=None):
+        """Word and sentence timings ({"words", "sentences"}) for client-side highlighting, see word_timings."""
+        words = self.word_timings(section)
+        return {'words': words, 'sentences': sentence_timings(words)}
+
+    def index(self):
+        """JSON-serializable index: format, WAV parameters, segment byte ranges and timings."""
+        return {'format': self.format, 'wav_params': self.wav_params, 'segments': self.segments}
+
+    @staticmethod
+    def index_path(audio_path):
+        return os.path.splitext(audio_path)[0] + ".index.json"
+
+    def save(self, audio_path):
+        """Write the audio to `audio_path` and its index next to it (<name>.index.json)."""
+        directory = os.path.dirname(os.path.abspath(audio_path))
+        os.makedirs(directory, exist_ok=True)
+        with open(audio_path, 'wb') as f:
+            f.write(self.audio)
+        with open(self.index_path(audio_path), 'w', encoding='utf-8') as f:
+            json.dump(self.index(), f, ensure_ascii=False)
+        self.path = audio_path
+        return audio_path
+
+    @classmethod
+    def load(cls, audio_path, in_memory=False):
+        """
+        Open saved document audio. Unless `in_memory`, segments are read from the file on
+        demand, so a section can be served without loading the whole document.
+        """
+        with open(cls.index_path(audio_path), encoding='utf-8') as f:
+            index = json.load(f)
+        document = cls(index['segments'], index['format'], path=audio_path, wav_params=index.get('wav_params'))
+        if in_memory:
+            with open(audio_path, 'rb') as f:
+                document._audio = f.read()
+        return document
@@ -0,0 +1,441 @@
+import os
+import json
+import time
+import uuid
+import argparse
+import threading
+import multiprocessing
+from pathlib import Path
+from multiprocessing.connection import wait
+
+from pdf_extract_kit.utils.workspace import Workspace
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Seconds between checks that the worker processes are still alive
+WORKER_CHECK_INTERVAL = 1.0
+
+
+class Job:
+    def __init__(self, job_id, name, pdf_path, workspace):
+        self.id = job_id
+        self.name = name
+        self.pdf_path = pdf_path
+        self.workspace = workspace
+        self.status = QUEUED
+        self.progress = []
+        self.result_path = None
+        self.audio_path = None
+        self.error = None
+        self.worker = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'progress': list(self.progress),
+            'result_path': self.result_path,
+            'audio_path': self.audio_path,
+            'error': self.error,
+            'worker': self.worker,
+            'queued_seconds': round((self.started or time.time()) - self.submitted, 2),
+            'run_seconds': round((self.finished or time.time()) - self.started, 2) if self.started else None,
+        }
+
+
+def _worker_loop(conn, config_path, cache_dir, with_audio):
+    """Worker process: load the models once, then run the jobs sent over `conn` until it receives None."""
+    try:
+        from pipeline import ReadingPipeline
+        from text_to_speech import TextToSpeech
+
+        pipeline = ReadingPipeline(config_path, cache_dir=cache_dir)
+        # The engine comes from configs/tts.yaml; its audio is cached next to the other results
+        tts = TextToSpeech.from_config(cache_dir=os.path.join(cache_dir, 'audio') if cache_dir else None) if with_audio else None
+    except Exception as e:
+        # Reported before exiting, so the queue can tell why no worker is left
+        conn.send((None, FAILED, {'pid': os.getpid(), 'error': f"{type(e).__name__}: {e}"}))
+        return
+    conn.send((None, 'ready', {'pid': os.getpid(), 'load_time': pipeline.load_time}))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        job_id, pdf_path, output_dir = task
+        conn.send((job_id, RUNNING, os.getpid()))
+        try:
+            structured = pipeline.process_pdf(pdf_path, output_dir=output_dir,
+                                              progress=lambda message: conn.send((job_id, 'progress', message)))
+            if not structured:
+                raise RuntimeError("no text found in the document")
+            result_path = os.path.join(output_dir, f"structured_output_{Path(pdf_path).stem}.json")
+            with open(result_path, "w") as f:
+                json.dump(structured, f, indent=2)
+
+            audio_path = None
+            if with_audio:
+                conn.send((job_id, 'progress', "Generating audio"))
+                try:
+                    # Rendered per section with a byte-offset index, so the app can jump to any section
+                    audio_path = os.path.join(output_dir, f"full_document_{Path(pdf_path).stem}.{tts.format}")
+                    tts.render_document(structured).save(audio_path)
+                except Exception as e:
+                    # The structured output is still useful without audio, the app can retry TTS on demand
+                    conn.send((job_id, 'progress', f"Audio generation failed: {e}"))
+            conn.send((job_id, DONE, {'result_path': result_path, 'audio_path': audio_path}))
+        except Exception as e:
+            conn.send((job_id, FAILED, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, context, index, args):
+        """
+        One worker process with its own pipe, so a worker can be killed (cancel()) or die
+        without leaving a queue shared with the others locked or corrupted.
+        """
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(child_conn,) + args,
+                                       name=f"readease-worker-{index}", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.job_id = None
+        self.stopping = False
+
+    def assign(self, job):
+        self.job_id = job.id
+        self.conn.send((job.id, job.pdf_path, job.workspace.outputs))
+
+    def stop(self):
+        self.stopping = True
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+
+
+class JobQueue:
+    def __init__(self, workers=2, job_root=None, config_path=None, cache_dir=None, with_audio=False):
+        """
+        Local job queue in front of the reading pipeline.
+
+        PDFs are submitted and get a job id right away; a pool of worker processes, each with
+        its own warm ReadingPipeline, works through the queue. Progress, the structured JSON and
+        the audio are fetched by job id, so callers (e.g. one Streamlit session per browser tab)
+        never run the models themselves and throughput grows with `workers`.
+
+        Jobs are handed to idle workers from this process, each over the worker's own pipe, so a
+        worker that dies or whose job is cancelled is replaced without affecting the others.
+
+        Args:
+            workers (int): Number of worker processes; each loads its own copy of the models.
+            job_root (str, optional): Where job workspaces are created; defaults to tmpfs (see Workspace).
+                Each job gets its own workspace holding its input and outputs until remove().
+            config_path (str, optional): Layout detection config, defaults to the pipeline's.
+            cache_dir (str, optional): Result cache shared by all workers, see ReadingPipeline.
+            with_audio (bool): Also synthesize full-document audio for every job.
+        """
+        if config_path is None:
+            from pipeline import DEFAULT_CONFIG
+            config_path = DEFAULT_CONFIG
+        self.job_root = job_root
+        self.jobs = {}
+        self.workers_ready = []
+        self.worker_errors = []
+        self._dead_workers = set()
+        self._pending = []
+        self._closing = False
+        self._cond = threading.Condition()
+
+        # spawn: the parent (e.g. Streamlit) may already run threads, which fork does not copy safely
+        self._context = multiprocessing.get_context("spawn")
+        self._worker_args = (config_path, cache_dir, with_audio)
+        self._started_workers = 0
+        self._workers = [self._start_worker() for _ in range(max(1, workers))]
+        self._collector = threading.Thread(target=self._collect, name="readease-job-events", daemon=True)
+        self._collector.start()
+
+    def _start_worker(self):
+        self._started_workers += 1
+        return _Worker(self._context, self._started_workers - 1, self._worker_args)
+
+    def _dispatch(self):
+        """Hand queued jobs to idle workers, and stop idle workers once shutting down with nothing queued. Needs the lock."""
+        for worker in self._workers:
+            if not worker.ready or worker.job_id is not None or worker.stopping:
+                continue
+            if self._pending:
+                job = self.jobs[self._pending.pop(0)]
+                try:
+                    worker.assign(job)
+                except OSError:
+                    # Died meanwhile; the job goes back to the front and the worker is reaped by _collect
+                    worker.job_id = None
+                    self._pending.insert(0, job.id)
+            elif self._closing:
+                worker.stop()
+
+    def _collect(self):
+        """Apply worker events to the job table, replace dead workers and wake up anyone waiting on a job."""
+        while True:
+            with self._cond:
+                if self._closing and not self._workers:
+                    break
+                conns = [worker.conn for worker in self._workers]
+            for conn in wait(conns, timeout=WORKER_CHECK_INTERVAL) if conns else []:
+                try:
+                    event = conn.recv()
+                except (EOFError, OSError):
+                    # Exited; reaped below, once its last events are applied
+                    continue
+                with self._cond:
+                    worker = next(worker for worker in self._workers if worker.conn is conn)
+                    self._apply(worker, *event)
+                    self._dispatch()
+                    self._cond.notify_all()
+            self._check_workers()
+
+    def _apply(self, worker, job_id, kind, payload):
+        if job_id is None:
+            if kind == FAILED:
+                self.worker_errors.append(payload)
+            else:
+                worker.ready = True
+                self.workers_ready.append(payload)
+            return
+        if kind in (DONE, FAILED):
+            worker.job_id = None
+        job = self.jobs.get(job_id)
+        if job is None or job.status in (DONE, FAILED):
+            # Removed or cancelled meanwhile
+            return
+        if kind == RUNNING:
+            job.status, job.worker, job.started = RUNNING, payload, time.time()
+        elif kind == 'progress':
+            job.progress.append(payload)
+        elif kind == DONE:
+            job.status, job.finished = DONE, time.time()
+            job.result_path, job.audio_path = payload['result_path'], payload['audio_path']
+        elif kind == FAILED:
+            job.status, job.finished, job.error = FAILED, time.time(), payload
+
+    def _drain(self, worker):
+        """Apply the events an exited worker sent before it went. Needs the lock."""
+        try:
+            while worker.conn.poll():
+                self._apply(worker, *worker.conn.recv())
+        except (EOFError, OSError):
+            pass
+
+    def _check_workers(self):
+        """
+        Reap workers that exited. A worker that died with models loaded (killed by cancel(), out of
+        memory, crashed in a model) fails the job it was running and is replaced; workers that
+        failed to load the models are not, and once none is left every queued job fails.
+        """
+        with self._cond:
+            for i, worker in enumerate(self._workers):
+                if worker.process.is_alive():
+                    continue
+                worker.process.join()
+                self._drain(worker)
+                worker.conn.close()
+                self._dead_workers.add(worker.process.pid)
+                job = self.jobs.get(worker.job_id)
+                if job is not None and job.status not in (DONE, FAILED):
+                    job.status, job.finished = FAILED, time.time()
+                    job.error = f"worker {worker.process.pid} exited with code {worker.process.exitcode} while running the job"
+                replace = worker.ready and not worker.stopping and not self._closing
+                self._workers[i] = self._start_worker() if replace else None
+            self._workers = [worker for worker in self._workers if worker is not None]
+            if not self._workers and self._pending:
+                reason = self.worker_errors[-1]['error'] if self.worker_errors else "all workers exited"
+                for job_id in self._pending:
+                    job = self.jobs[job_id]
+                    job.status, job.finished, job.error = FAILED, time.time(), f"no pipeline worker left: {reason}"
+                self._pending = []
+            self._dispatch()
+            self._cond.notify_all()
+
+    def submit(self, pdf, name=None):
+        """
+        Queue a PDF for processing.
+
+        Args:
+            pdf (str | bytes): Path to a PDF, or the PDF file contents (e.g. an upload).
+            name (str, optional): Document name used for the output files; defaults to the file name.
+
+        Returns:
+            str: Job id.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        if name is None:
+            name = Path(pdf).name if isinstance(pdf, str) else "document.pdf"
+        workspace = Workspace(root=self.job_root, prefix=f"readease-job-{job_id}-")
+        pdf_path = workspace.add_pdf(pdf, Path(name).stem + ".pdf")
+
+        with self._cond:
+            if self._closing:
+                workspace.cleanup()
+                raise RuntimeError("the job queue is shut down")
+            self.jobs[job_id] = Job(job_id, Path(name).stem, pdf_path, workspace)
+            if self._workers:
+                self._pending.append(job_id)
+                self._dispatch()
+            else:
+                job = self.jobs[job_id]
+                reason = self.worker_errors[-1]['error'] if self.worker_errors else "all workers exited"
+                job.status, job.finished, job.error = FAILED, time.time(), f"no pipeline worker left: {reason}"
+        return job_id
+
+    def status(self, job_id):
+        with self._cond:
+            return self.jobs[job_id].to_dict()
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job is done or failed (or the timeout passes) and return its status."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.jobs[job_id].status in (DONE, FAILED), timeout)
+            return self.jobs[job_id].to_dict()
+
+    def stream(self, job_id, timeout=None):
+        """
+        Yield the job's progress messages as they arrive, until it is done or failed.
+
+        Args:
+            timeout (float, optional): Stop after this many seconds in total, finished or not;
+                follow with wait(job_id, 0) for the status.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        seen = 0
+        while True:
+            with self._cond:
+                job = self.jobs[job_id]
+                remaining = None if deadline is None else max(0.0, deadline - time.time())
+                if not self._cond.wait_for(lambda: len(job.progress) > seen or job.status in (DONE, FAILED), remaining):
+                    return
+                messages = job.progress[seen:]
+                finished = job.status in (DONE, FAILED)
+            for message in messages:
+                yield message
+            seen += len(messages)
+            if finished:
+                return
+
+    def result(self, job_id):
+        """Structured output of a finished job, or None."""
+        with self._cond:
+            result_path = self.jobs[job_id].result_path
+        if not result_path:
+            return None
+        with open(result_path) as f:
+            return json.load(f)
+
+    def audio(self, job_id):
+        """Full-document audio bytes (in the TTS engine's format) of a finished job, or None if no audio was generated."""
+        with self._cond:
+            audio_path = self.jobs[job_id].audio_path
+        if not audio_path:
+            return None
+        with open(audio_path, "rb") as f:
+            return f.read()
+
+    def document_audio(self, job_id):
+        """DocumentAudio (full audio and section index) of a finished job, or None if no audio was generated."""
+        from document_audio import DocumentAudio
+
+        with self._cond:
+            audio_path = self.jobs[job_id].audio_path
+        if not audio_path:
+            return None
+        return DocumentAudio.load(audio_path, in_memory=True)
+
+    def cancel(self, job_id):
+        """
+        Fail a job that has not finished yet, e.g. after a timeout. A queued job is dropped from
+        the queue; a running one has its worker killed (a fresh worker takes its place), so
+        nothing writes to the job's workspace any more once this returns.
+        """
+        with self._cond:
+            job = self.jobs[job_id]
+            if job.status in (DONE, FAILED):
+                return
+            if job_id in self._pending:
+                self._pending.remove(job_id)
+            for worker in self._workers:
+                if worker.job_id == job_id:
+                    # Its pipe and process are reaped by _check_workers, which starts the replacement
+                    worker.process.kill()
+                    worker.process.join()
+            job.status, job.finished, job.error = FAILED, time.time(), "cancelled"
+            self._cond.notify_all()
+
+    def remove(self, job_id):
+        """
+        Forget a finished job and delete its workspace; read result() and audio() (or document_audio())
+        first. Unfinished jobs are refused, cancel() them first.
+        """
+        with self._cond:
+            job = self.jobs[job_id]
+            if job.status not in (DONE, FAILED):
+                raise RuntimeError(f"job {job_id} is still {job.status}; cancel() it before removing it")
+            del self.jobs[job_id]
+        job.workspace.cleanup()
+
+    def stats(self):
+        with self._cond:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self.jobs.values():
+                counts[job.status] += 1
+            return {'workers': len(self._workers), 'workers_ready': sum(worker.ready for worker in self._workers),
+                    'workers_dead': len(self._dead_workers), 'jobs': counts}
+
+    def shutdown(self, wait=True):
+        """Stop the workers once they have finished the jobs already queued."""
+        with self._cond:
+            self._closing = True
+            self._dispatch()
+        if wait:
+            self._collector.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run PDFs through the job queue and report per-job status.")
+    parser.add_argument('--pdf', required=True, nargs='+', help="Path(s) to input PDF(s)")
+    parser.add_argument('--workers', type=int, default=2, help="Number of worker processes")
+    parser.add_argument('--job_root', help="Directory for per-job workspaces (default: tmpfs)")
+    parser.add_argument('--cache_dir', help="Result cache shared by the workers")
+    parser.add_argument('--audio', action='store_true', help="Also generate full-document audio")
+    parser.add_argument('--output', default="schema", help="Directory the structured JSON (and audio) is copied to")
+    args = parser.parse_args()
+
+    job_queue = JobQueue(workers=args.workers, job_root=args.job_root, cache_dir=args.cache_dir, with_audio=args.audio)
+    job_ids = [job_queue.submit(pdf_path) for pdf_path in args.pdf]
+    for job_id in job_ids:
+        for message in job_queue.stream(job_id):
+            print(f"[{job_id}] {message}")
+        status = job_queue.wait(job_id)
+        if status['status'] == DONE:
+            os.makedirs(args.output, exist_ok=True)
+            output_path = os.path.join(args.output, os.path.basename(status['result_path']))
+            with open(output_path, "w") as f:
+                json.dump(job_queue.result(job_id), f, indent=2)
+            document_audio = job_queue.document_audio(job_id)
+            if document_audio:
+                # Copies the section index along with the audio
+                document_audio.save(os.path.join(args.output, os.path.basename(status['audio_path'])))
+            print(f"[{job_id}] done: {output_path}")
+        else:
+            print(f"[{job_id}] failed: {status['error']}")
+        job_queue.remove(job_id)
+    job_queue.shutdown()
@@ -2,9 +2,23 @@ import numpy as np
 import torch
 from PIL import Image
 from torch.utils.data import Dataset
+from pdf_extract_kit.utils.page_image import PageImage
 import torchvision.transforms as transforms
 
 
+def to_rgb_pil(image):
+    """Open a path, PIL image, PageImage or BGR numpy array (OpenCV/ultralytics convention) as an RGB PIL image."""
+    if isinstance(image, PageImage):
+        return image.to_pil()
+    elif isinstance(image, str):
+        return Image.open(image).convert('RGB')
+    elif isinstance(image, Image.Image):
+        return image.convert('RGB')
+    elif isinstance(image, np.ndarray):
+        return Image.fromarray(np.ascontiguousarray(image[..., ::-1]))
+    raise ValueError("Image must be a file path, a PIL.Image object, a PageImage or a BGR numpy array")
+
+
 class ResizeLongestSide:
     def __init__(self, size):
         self.size = size
@@ -29,7 +43,7 @@ class ImageDataset(Dataset):
         Initialize the ImageDataset class.
         
         Args:
-        - images (list): List of image paths or PIL.Image.Image objects.
+        - images (list): List of image paths, PIL.Image.Image objects, PageImage objects or BGR numpy arrays.
         - image_ids (list, optional): List of corresponding image IDs. If None, assumes images are paths.
         - img_size (int): Size to which images' longest side will be resized.
         """
@@ -63,13 +77,7 @@ class ImageDataset(Dataset):
         image = self.images[idx]
         image_id = self.image_ids[idx]
 
-        # Check if the image is a path or a PIL.Image object
-        if isinstance(image, str):
-            image = Image.open(image).convert('RGB')
-        elif isinstance(image, Image.Image):
-            image = image.convert('RGB')
-        else:
-            raise ValueError("Image must be a file path or a PIL.Image object")
+        image = to_rgb_pil(image)
 
         # Apply transformations
         image = self.transform(image)
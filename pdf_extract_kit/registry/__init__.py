@@ -1 +1 @@
-from .registry import TASK_REGISTRY, MODEL_REGISTRY
\ No newline at end of file
+from .registry import TASK_REGISTRY, MODEL_REGISTRY, TTS_REGISTRY
\ No newline at end of file
@@ -18,6 +18,7 @@ class Registry:
     def list_items(self):
         return list(self._registry.keys())
 
-# Create global registries for tasks and models
+# Create global registries for tasks, models and speech synthesis backends (see tts_backends.py)
 TASK_REGISTRY = Registry()
-MODEL_REGISTRY = Registry()
\ No newline at end of file
+MODEL_REGISTRY = Registry()
+TTS_REGISTRY = Registry()
\ No newline at end of file
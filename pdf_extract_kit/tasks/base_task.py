@@ -1,5 +1,5 @@
 import os
-from pdf_extract_kit.utils.data_preprocess import load_pdf
+from pdf_extract_kit.utils.data_preprocess import load_pdf, iter_pdf
 
 
 class BaseTask:
@@ -77,4 +77,34 @@ class BaseTask:
             else:
                 raise ValueError("Unsupported input data format: {}".format(input_data))
 
-        return pdf_images
\ No newline at end of file
+        return pdf_images
+
+    def iter_pdf_images(self, input_data):
+        """
+        Lazily yields page images from a single PDF file or directory containing multiple PDF files.
+
+        Same inputs and image IDs as load_pdf_images, but pages are rendered on demand (with a small
+        prefetch) instead of all up front, so memory stays flat regardless of document length.
+
+        Args:
+            input_data (str): Path to a single PDF file or a directory containing PDF files.
+
+        Yields:
+            tuple: (image ID, PIL.Image.Image) for every page in order.
+        """
+        if os.path.isdir(input_data):
+            # If input_data is a directory, check for nested directories
+            for root, dirs, files in os.walk(input_data):
+                if dirs:
+                    raise ValueError("Input directory should not contain nested directories: {}".format(input_data))
+                for file in files:
+                    if file.lower().endswith(('.pdf')):
+                        pdf_path = os.path.join(root, file)
+                        for i, img in enumerate(iter_pdf(pdf_path)):
+                            yield f"{os.path.splitext(file)[0]}_page_{i+1:04d}", img
+                break  # Only process the top-level directory
+        elif input_data.lower().endswith(('.pdf')):
+            for i, img in enumerate(iter_pdf(input_data)):
+                yield f"{os.path.splitext(os.path.basename(input_data))[0]}_page_{i+1:04d}", img
+        else:
+            raise ValueError("Unsupported input data format: {}".format(input_data))
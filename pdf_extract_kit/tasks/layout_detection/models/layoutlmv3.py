@@ -5,6 +5,7 @@ from PIL import Image
 
 from pdf_extract_kit.registry.registry import MODEL_REGISTRY
 from pdf_extract_kit.utils.visualization import visualize_bbox
+from pdf_extract_kit.utils.page_image import PageImage
 
 from .layoutlmv3_util.model_init import Layoutlmv3_Predictor
 
@@ -52,9 +53,11 @@ class LayoutDetectionLayoutlmv3:
         for idx, im_file in enumerate(images):
             if isinstance(im_file, Image.Image):
                 im = im_file.convert("RGB")  # extracted PDF pages
+            elif isinstance(im_file, PageImage):
+                im = im_file.rgb  # rendered page buffer, used without a copy
             elif isinstance(im_file, str):
                 im = Image.open(im_file).convert("RGB")  # image path
-            layout_res = self.model(np.array(im), ignore_catids=[])
+            layout_res = self.model(np.asarray(im), ignore_catids=[])
             poly = np.array([det["poly"] for det in layout_res["layout_dets"]])
             boxes = poly[:, [0,1,4,5]] 
             scores = np.array([det["score"] for det in layout_res["layout_dets"]])
@@ -1,9 +1,14 @@
 import os
+import time
 import cv2
 import torch
+import numpy as np
+from PIL import Image
 from pdf_extract_kit.registry import MODEL_REGISTRY
 from pdf_extract_kit.utils.visualization import visualize_bbox
-from pdf_extract_kit.dataset.dataset import ImageDataset
+from pdf_extract_kit.utils.page_image import PageImage
+from pdf_extract_kit.utils.result_cache import ResultCache, hash_image, make_cache_key, model_file_id
+from pdf_extract_kit.utils.tracing import TRACER
 
 @MODEL_REGISTRY.register('layout_detection_yolo')
 class LayoutDetectionYOLO:
@@ -42,8 +47,17 @@ class LayoutDetectionYOLO:
         self.iou_thres = config.get('iou_thres', 0.45)
         self.visualize = config.get('visualize', False)
         self.nc = config.get('nc', 10)
-        self.workers = config.get('workers', 8)
+        self.batch_size = config.get('batch_size', 4)
         self.device = config.get('device', 'cpu')
+        # Per-batch latency of the most recent predict_batches call
+        self.batch_stats = []
+
+        # Optional on-disk result cache keyed by (page pixels, weights, prediction settings)
+        self.cache = None
+        if config.get('cache_dir'):
+            self.cache = ResultCache(config['cache_dir'], max_bytes=int(config.get('cache_max_mb', 512) * 2**20))
+            self.cache_model_id = model_file_id(config['model_path'])
+            self.cache_config = {'img_size': self.img_size, 'conf_thres': self.conf_thres, 'iou_thres': self.iou_thres}
         
         if self.iou_thres > 0:
             import torchvision
@@ -61,9 +75,18 @@ class LayoutDetectionYOLO:
         Returns:
             list: List of prediction results.
         """
+        with TRACER.span("layout", items=len(images)):
+            return self.collect_results(images, result_path, image_ids)
+
+    def collect_results(self, images, result_path, image_ids=None):
+        """Predictions for `images`, from the cache or the model, visualized if configured."""
+        if self.cache is not None:
+            predictions = self.predict_cached(images)
+        else:
+            predictions = self.run_model(images)
+
         results = []
-        for idx, image in enumerate(images):
-            result = self.model.predict(image, imgsz=self.img_size, conf=self.conf_thres, iou=self.iou_thres, verbose=False, device=self.device)[0]
+        for idx, (image, result) in enumerate(zip(images, predictions)):
             if self.visualize:
                 if not os.path.exists(result_path):
                     os.makedirs(result_path)
@@ -93,4 +116,104 @@ class LayoutDetectionYOLO:
                 # Save the visualized result                
                 cv2.imwrite(os.path.join(result_path, result_name), vis_result)
             results.append(result)
-        return results
\ No newline at end of file
+        return results
+
+    def run_model(self, images):
+        if self.batch_size > 1:
+            return self.predict_batches(images)
+        return self.predict_pages(images)
+
+    def predict_pages(self, images):
+        """One forward pass per page, run lazily as the results are consumed."""
+        for image in images:
+            with TRACER.span("layout.model", items=1):
+                result = self.model.predict(self.model_input(image), imgsz=self.img_size, conf=self.conf_thres, iou=self.iou_thres, verbose=False, device=self.device)[0]
+            yield result
+
+    def predict_cached(self, images):
+        """
+        Serve predictions from the result cache, running the model only on the pages it misses.
+
+        Cached results are stored without their page pixels; on a hit the input page is
+        attached back as `orig_img` when it is already an array.
+
+        Args:
+            images (list): List of images to be predicted.
+
+        Returns:
+            list: One prediction result per image, in input order.
+        """
+        keys = []
+        for image in images:
+            image_hash = hash_image(image)
+            keys.append(make_cache_key(image_hash, self.cache_model_id, self.cache_config) if image_hash else None)
+        results = [self.cache.get(key) if key else None for key in keys]
+
+        hits = [idx for idx, result in enumerate(results) if result is not None]
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        if missing:
+            for idx, result in zip(missing, self.run_model([images[idx] for idx in missing])):
+                if keys[idx]:
+                    orig_img, result.orig_img = result.orig_img, None
+                    self.cache.put(keys[idx], result)
+                    result.orig_img = orig_img
+                results[idx] = result
+
+        for idx in hits:
+            image = images[idx]
+            results[idx].orig_img = self.model_input(image) if isinstance(image, (PageImage, np.ndarray)) else None
+        TRACER.set_gauge("cache_hit_rate", self.cache.hit_rate, cache="layout")
+        if hits:
+            print(f"layout cache: {len(hits)}/{len(images)} page(s) served from cache, hit rate {self.cache.hit_rate:.1%}")
+        return results
+
+    def model_input(self, image):
+        """ultralytics reads numpy input as BGR, so PageImage pages are handed over as their BGR buffer."""
+        if isinstance(image, PageImage):
+            return image.to_bgr()
+        return image
+
+    def batch_input(self, image):
+        """Any supported input as the BGR array ultralytics would load it as, so pages can be grouped by shape."""
+        if isinstance(image, PageImage):
+            return image.to_bgr()
+        elif isinstance(image, str):
+            bgr = cv2.imread(image, cv2.IMREAD_COLOR)
+            if bgr is None:
+                raise FileNotFoundError(f"Cannot read image {image}")
+            return bgr
+        elif isinstance(image, Image.Image):
+            return np.ascontiguousarray(np.asarray(image.convert('RGB'))[:, :, ::-1])
+        return image
+
+    def predict_batches(self, images):
+        """
+        Run layout detection with one forward pass per `batch_size` pages.
+
+        Consecutive pages of the same size are handed to ultralytics together as a list of
+        BGR arrays. For a batch of equally sized pages ultralytics applies the same minimal
+        rect letterbox as for a single page, so the boxes match predict_pages; a page of
+        another size starts a new batch.
+
+        Args:
+            images (list): List of image paths, PIL.Image.Image, PageImage or BGR numpy arrays.
+
+        Returns:
+            list: One prediction result per image, in input order.
+        """
+        batches = []
+        for image in images:
+            page = self.batch_input(image)
+            if not batches or len(batches[-1]) == self.batch_size or page.shape != batches[-1][0].shape:
+                batches.append([])
+            batches[-1].append(page)
+
+        results = []
+        self.batch_stats = []
+        for batch in batches:
+            start = time.time()
+            with TRACER.span("layout.batch", items=len(batch)):
+                results.extend(self.model.predict(batch, imgsz=self.img_size, conf=self.conf_thres, iou=self.iou_thres, verbose=False, device=self.device))
+            latency = time.time() - start
+            self.batch_stats.append({'pages': len(batch), 'latency': latency, 'pages_per_sec': len(batch) / latency})
+        return results
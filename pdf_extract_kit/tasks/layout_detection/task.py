@@ -33,6 +33,29 @@ class LayoutDetectionTask(BaseTask):
         Returns:
             list: List of prediction results.
         """
-        pdf_images = self.load_pdf_images(input_data)
-        # Perform detection
-        return self.model.predict(list(pdf_images.values()), result_path, list(pdf_images.keys()))
\ No newline at end of file
+        return [result for _, result in self.stream_predict_pdfs(input_data, result_path)]
+
+    def stream_predict_pdfs(self, input_data, result_path):
+        """
+        Predict layouts in PDF files page by page while pages are still being rendered.
+
+        Pages are pulled from iter_pdf_images in groups of the model's batch size, so only
+        the pages of the current group are held in memory.
+
+        Args:
+            input_data (str): Path to a single PDF file or a directory containing PDF files.
+            result_path (str): Path to save the prediction results.
+
+        Yields:
+            tuple: (image ID, prediction result) for every page in order.
+        """
+        batch_size = max(1, getattr(self.model, 'batch_size', 1))
+        image_ids, images = [], []
+        for image_id, image in self.iter_pdf_images(input_data):
+            image_ids.append(image_id)
+            images.append(image)
+            if len(images) == batch_size:
+                yield from zip(image_ids, self.model.predict(images, result_path, image_ids))
+                image_ids, images = [], []
+        if images:
+            yield from zip(image_ids, self.model.predict(images, result_path, image_ids))
\ No newline at end of file
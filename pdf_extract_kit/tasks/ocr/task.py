@@ -3,8 +3,10 @@ import json
 import random
 from PIL import Image, ImageDraw
 from pdf_extract_kit.registry.registry import TASK_REGISTRY
-from pdf_extract_kit.utils.data_preprocess import load_pdf
+from pdf_extract_kit.utils.data_preprocess import iter_pdf
+from pdf_extract_kit.utils.jsonl import JsonlWriter
 from pdf_extract_kit.tasks.base_task import BaseTask
+from pdf_extract_kit.utils.page_image import PageImage
 
 
 @TASK_REGISTRY.register("ocr")
@@ -21,7 +23,7 @@ class OCRTask(BaseTask):
         """predict on one image, reture text detection and recognition results.
         
         Args:
-            image: PIL.Image.Image, (if the model.predict function support other types, remenber add change-format-function in model.predict)
+            image: PIL.Image.Image or PageImage, (if the model.predict function support other types, remenber add change-format-function in model.predict)
             
         Returns:
             List[dict]: list of text bbox with it's content
@@ -55,28 +57,60 @@ class OCRTask(BaseTask):
             file_list = [input_path]
         return file_list
             
-    def process(self, input_path, save_dir=None, visualize=False):
+    def process(self, input_path, save_dir=None, visualize=False, save_format="json", keep_results=True):
+        """run OCR on every PDF or image under input_path.
+
+        Args:
+            input_path: a PDF/image file or a directory of them
+            save_dir: directory to save results to
+            visualize: also save images with the detected boxes drawn
+            save_format: "json" saves PDF pages as <basename>/page_N.json; "jsonl" streams them into
+                <basename>.jsonl, one {"page_no", "results"} record per line, as they are recognized
+            keep_results: return the results of every file; with False (and save_dir) the saved
+                result paths are returned instead and pages are not kept after being written
+
+        Returns:
+            List: per file, the list of page results (PDF) or the image result
+        """
         file_list = self.prepare_input_files(input_path)
         res_list = []
         for fpath in file_list:
             basename = os.path.basename(fpath)[:-4]
             if fpath.endswith(".pdf") or fpath.endswith(".PDF"):
-                images = load_pdf(fpath)
+                images = iter_pdf(fpath)
+                keep = keep_results or not save_dir
+                if save_dir and save_format == "jsonl":
+                    os.makedirs(save_dir, exist_ok=True)
+                    save_path = os.path.join(save_dir, f"{basename}.jsonl")
+                    kept = [] if keep else None
+                    with JsonlWriter(save_path) as writer:
+                        for page, img in enumerate(images):
+                            page_res = self.predict_image(img)
+                            writer.write({"page_no": page, "results": page_res})
+                            if visualize:
+                                os.makedirs(os.path.join(save_dir, basename), exist_ok=True)
+                                self.visualize_image(img, page_res, os.path.join(save_dir, basename, f"page_{page+1}.jpg"))
+                            if kept is not None:
+                                kept.append(page_res)
+                    res_list.append(kept if keep else save_path)
+                    continue
+
                 pdf_res = []
                 for page, img in enumerate(images):
                     page_res = self.predict_image(img)
-                    pdf_res.append(page_res)
+                    if keep:
+                        pdf_res.append(page_res)
                     if save_dir:
                         os.makedirs(os.path.join(save_dir, basename), exist_ok=True)
                         self.save_json_result(page_res, os.path.join(save_dir, basename, f"page_{page+1}.json"))
                         if visualize:
                             self.visualize_image(img, page_res, os.path.join(save_dir, basename, f"page_{page+1}.jpg"))
                         
-                res_list.append(pdf_res)
+                res_list.append(pdf_res if keep else os.path.join(save_dir, basename))
             else:
                 image = Image.open(fpath)
                 img_res = self.predict_image(image)
-                res_list.append(img_res)
+                res_list.append(img_res if keep_results or not save_dir else os.path.join(save_dir, f"{basename}.json"))
                 if save_dir:
                     os.makedirs(save_dir, exist_ok=True)
                     self.save_json_result(img_res, os.path.join(save_dir, f"{basename}.json"))
@@ -89,10 +123,12 @@ class OCRTask(BaseTask):
         """plot each result's bbox and category on image.
         
         Args:
-            image: PIL.Image.Image
+            image: PIL.Image.Image or PageImage (drawn on a PIL copy)
             ocr_res: list of ocr det and rec, whose format following the results of self.predict_image function
             save_path: path to save visualized image
         """
+        if isinstance(image, PageImage):
+            image = image.to_pil().copy()
         draw = ImageDraw.Draw(image)
         for res in ocr_res:
             box_color = cate2color.get(res['category_type'], (0, 255, 0))
@@ -1,6 +1,13 @@
+import os
+import queue
+import threading
+
 import fitz
+import numpy as np
 from PIL import Image
 
+from pdf_extract_kit.utils.page_image import PageImage
+
 
 def load_pdf_page(page, dpi):
     pix = page.get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72))
@@ -10,6 +17,65 @@ def load_pdf_page(page, dpi):
         image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
     return image
 
+def load_pdf_page_array(page, dpi):
+    """Render a page straight to an HxWx3 RGB uint8 array backed by the pixmap samples (no PIL, no PNG)."""
+    pix = page.get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72), alpha=False)
+    if pix.width > 3000 or pix.height > 3000:
+        pix = page.get_pixmap(matrix=fitz.Matrix(1, 1), alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+def load_pdf_page_image(page, dpi, page_no=None):
+    """Render a page to a PageImage that wraps the pixmap buffer without copying it."""
+    pix = page.get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72), alpha=False)
+    if pix.width > 3000 or pix.height > 3000:
+        pix = page.get_pixmap(matrix=fitz.Matrix(1, 1), alpha=False)
+    return PageImage.from_pixmap(pix, page_no)
+
+def load_pdf_text_spans(page, scale):
+    """
+    Read the embedded text layer of a page as line-level spans in rendered pixel coordinates.
+
+    Args:
+        page (fitz.Page): Page to read.
+        scale (float): Pixels per PDF point of the rendered page (dpi / 72 unless the render was downscaled).
+
+    Returns:
+        list: {'bbox': [x0, y0, x1, y1], 'type': 'text', 'content': str} per non-empty line; empty for
+            scanned pages. Lines with undecodable glyphs are left out so that OCR covers them.
+    """
+    matrix = page.rotation_matrix * fitz.Matrix(scale, scale)
+    spans = []
+    for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+        for line in block.get("lines", []):
+            content = "".join(span["text"] for span in line["spans"]).strip()
+            if not content or "\ufffd" in content:
+                continue
+            bbox = fitz.Rect(line["bbox"]) * matrix
+            if bbox.is_empty:
+                continue
+            spans.append({'bbox': [bbox.x0, bbox.y0, bbox.x1, bbox.y1], 'type': 'text', 'content': content})
+    return spans
+
+def save_pdf_pages(pdf_path, output_dir, dpi=200, name_format="page-{}.png"):
+    """
+    Write every page of a PDF to PNG files, numbered from 1.
+
+    Only for callers that explicitly need page images on disk; the in-process pipeline
+    keeps pages in memory (see iter_pdf).
+
+    Returns:
+        list: Paths of the written images.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    with fitz.open(pdf_path) as doc:
+        for i in range(len(doc)):
+            pix = doc[i].get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72), alpha=False)
+            path = os.path.join(output_dir, name_format.format(i + 1))
+            pix.save(path)
+            paths.append(path)
+    return paths
+
 def load_pdf(pdf_path, dpi=144):
     images = []
     doc = fitz.open(pdf_path)
@@ -17,4 +83,68 @@ def load_pdf(pdf_path, dpi=144):
         page = doc[i]
         image = load_pdf_page(page, dpi)
         images.append(image)
-    return images
\ No newline at end of file
+    return images
+
+def iter_pdf(pdf_path, dpi=144, prefetch=2, image_type="pil"):
+    """
+    Lazily render the pages of a PDF, one page at a time.
+
+    A background thread renders up to `prefetch` pages ahead of the consumer through a
+    bounded queue, so page N+1 is rasterized while page N is being processed and at most
+    prefetch + 1 pages are alive at once, however long the document is.
+
+    Args:
+        pdf_path (str): Path to the PDF file.
+        dpi (int): Rendering resolution.
+        prefetch (int): Maximum number of rendered pages waiting in the queue.
+        image_type (str): "pil" for PIL images, "array" for RGB numpy arrays, "page" for PageImage.
+
+    Yields:
+        PIL.Image.Image, np.ndarray or PageImage: Rendered pages in order.
+    """
+    renderers = {
+        "pil": load_pdf_page,
+        "array": load_pdf_page_array,
+        "page": lambda page, dpi: load_pdf_page_image(page, dpi, page.number),
+    }
+    if image_type not in renderers:
+        raise ValueError("Unsupported image_type: {}".format(image_type))
+    render_page = renderers[image_type]
+    pages = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # Give up if the consumer stopped early, so the thread never blocks on a full queue
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def render():
+        try:
+            with fitz.open(pdf_path) as doc:
+                for i in range(len(doc)):
+                    if stop.is_set():
+                        return
+                    put(render_page(doc[i], dpi))
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    worker = threading.Thread(target=render, name="pdf-rasterizer", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = pages.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        worker.join()
@@ -0,0 +1,88 @@
+import os
+import json
+
+
+class JsonlWriter:
+    def __init__(self, path, flush_every=1):
+        """
+        Write records to a JSON Lines file one at a time, so only the current record is in memory.
+
+        The file is written under a temporary name and moved into place on close(), so readers
+        never see a half-written result; if the writer is left through an exception the partial
+        file is removed.
+
+        Args:
+            path (str): Destination .jsonl file.
+            flush_every (int): Flush to disk after this many records (0 only flushes on close).
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.count = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self.count += 1
+        if self.flush_every and self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_jsonl(path, records):
+    """Write an iterable of records (e.g. a generator of page results) to a JSON Lines file."""
+    with JsonlWriter(path) as writer:
+        return writer.write_all(records)
+
+
+def iter_jsonl(path):
+    """Yield the records of a JSON Lines file one at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError("{}:{}: invalid JSON line: {}".format(path, line_no, e))
+
+
+def iter_jsonl_blocks(path, key="blocks"):
+    """
+    Yield (record, block) for every block of every page record, one page in memory at a time.
+
+    Args:
+        path (str): JSON Lines file with one page record per line.
+        key (str): Field of the page record holding its list of blocks.
+    """
+    for record in iter_jsonl(path):
+        for block in record.get(key, []):
+            yield record, block
@@ -0,0 +1,218 @@
+import os
+import json
+
+import numpy as np
+
+STORE_VERSION = 2
+BOX_KEYS = ('x1', 'y1', 'x2', 'y2')
+CORE_KEYS = ('name', 'class', 'confidence', 'box', 'text')
+ARRAYS = ('boxes', 'box_is_int', 'class_ids', 'confidences', 'page_offsets', 'text_offsets', 'has_text', 'text_blob')
+# Integers beyond this do not survive float64; such boxes are kept as is in the extras
+MAX_EXACT_INT = 2**53
+
+
+def read_layout_json(json_path):
+    """
+    Read one page of layout results as written by layout_detection.py or extract_text.py.
+
+    Returns:
+        tuple: (list of box dicts, whether the file held a double-encoded JSON string)
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list) and len(data) == 1 and isinstance(data[0], str):
+        return json.loads(data[0]), True
+    return data, False
+
+
+class LayoutStore:
+    def __init__(self, boxes, box_is_int, class_ids, confidences, page_offsets, text_offsets, has_text, text_blob, meta):
+        """
+        Columnar layout results for many pages.
+
+        Blocks of all pages are stored back to back:
+            boxes        float64 (N, 4)  x1, y1, x2, y2
+            box_is_int   bool    (N, 4)  True where the box value was an integer in the JSON
+            class_ids    int32   (N,)    names in meta['names']
+            confidences  float64 (N,)
+            page_offsets int64   (P+1,)  blocks of page i are [page_offsets[i], page_offsets[i+1])
+            text_offsets int64   (N+1,)  UTF-8 text of block j is text_blob[text_offsets[j]:text_offsets[j+1]]
+            has_text     bool    (N,)    False where the block has no `text` key yet (layout only)
+            text_blob    uint8           concatenated UTF-8 text
+        meta.json holds the page names, class names, per-page double-encoding flags and any
+        extra keys of individual blocks, so converting back to JSON loses nothing. Saved as
+        .npy files, every array can be memory-mapped, so opening a store is near-instant
+        however many pages it holds.
+        """
+        self.boxes = boxes
+        self.box_is_int = box_is_int
+        self.class_ids = class_ids
+        self.confidences = confidences
+        self.page_offsets = page_offsets
+        self.text_offsets = text_offsets
+        self.has_text = has_text
+        self.text_blob = text_blob
+        self.meta = meta
+        self.names = {int(k): v for k, v in meta['names'].items()}
+        self.extras = {int(k): v for k, v in meta.get('extras', {}).items()}
+
+    @classmethod
+    def from_pages(cls, pages):
+        """
+        Build a store from (page name, blocks[, double_encoded]) tuples.
+
+        Blocks are the dicts of the current JSON format; a page may also be given as the
+        double-encoded list holding one JSON string.
+        """
+        boxes, box_is_int, class_ids, confidences, has_text = [], [], [], [], []
+        page_offsets, text_offsets = [0], [0]
+        texts, names, extras, page_names, double_encoded = [], {}, {}, [], []
+        for page in pages:
+            page_name, items = page[0], page[1]
+            encoded = page[2] if len(page) > 2 else False
+            if isinstance(items, list) and len(items) == 1 and isinstance(items[0], str):
+                items, encoded = json.loads(items[0]), True
+            for item in items:
+                index = len(boxes)
+                class_id = int(item['class'])
+                box = [item['box'][k] for k in BOX_KEYS]
+                boxes.append(box)
+                box_is_int.append([isinstance(v, int) and not isinstance(v, bool) for v in box])
+                class_ids.append(class_id)
+                confidences.append(item['confidence'])
+                names.setdefault(class_id, item['name'])
+                extra = {k: v for k, v in item.items() if k not in CORE_KEYS}
+                if names[class_id] != item['name']:
+                    extra['name'] = item['name']
+                if set(item['box']) != set(BOX_KEYS) or any(is_int and abs(v) > MAX_EXACT_INT for v, is_int in zip(box, box_is_int[-1])):
+                    extra['box'] = item['box']
+                text = item.get('text')
+                has_text.append('text' in item)
+                if 'text' in item and not isinstance(text, str):
+                    # null (or otherwise non-string) text is kept as is, outside the blob
+                    extra['text'] = text
+                if extra:
+                    extras[index] = extra
+                encoded_text = text.encode('utf-8') if isinstance(text, str) else b''
+                texts.append(encoded_text)
+                text_offsets.append(text_offsets[-1] + len(encoded_text))
+            page_offsets.append(len(boxes))
+            page_names.append(page_name)
+            double_encoded.append(bool(encoded))
+
+        meta = {
+            'version': STORE_VERSION,
+            'pages': page_names,
+            'double_encoded': double_encoded,
+            'names': {str(k): v for k, v in sorted(names.items())},
+            'extras': {str(k): v for k, v in extras.items()},
+        }
+        return cls(
+            np.asarray(boxes, dtype=np.float64).reshape(-1, 4),
+            np.asarray(box_is_int, dtype=bool).reshape(-1, 4),
+            np.asarray(class_ids, dtype=np.int32),
+            np.asarray(confidences, dtype=np.float64),
+            np.asarray(page_offsets, dtype=np.int64),
+            np.asarray(text_offsets, dtype=np.int64),
+            np.asarray(has_text, dtype=bool),
+            np.frombuffer(b''.join(texts), dtype=np.uint8),
+            meta,
+        )
+
+    @classmethod
+    def from_json_files(cls, json_paths):
+        """Build a store from per-page JSON files; pages keep the given order and are named after the files."""
+        pages = []
+        for json_path in json_paths:
+            items, encoded = read_layout_json(json_path)
+            pages.append((os.path.splitext(os.path.basename(json_path))[0], items, encoded))
+        return cls.from_pages(pages)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a saved store; with mmap the arrays are paged in from disk only when read."""
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') not in (1, STORE_VERSION):
+            raise ValueError("Unsupported layout store version: {}".format(meta.get('version')))
+        arrays = {}
+        for name in ARRAYS:
+            if name == 'box_is_int' and meta['version'] == 1:
+                # Version 1 stores read every box value back as a float
+                arrays[name] = np.zeros(arrays['boxes'].shape, dtype=bool)
+            else:
+                arrays[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+        return cls(**arrays, meta=meta)
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    @property
+    def page_names(self):
+        return self.meta['pages']
+
+    @property
+    def num_pages(self):
+        return len(self.page_names)
+
+    def page_range(self, page_index):
+        return int(self.page_offsets[page_index]), int(self.page_offsets[page_index + 1])
+
+    def text(self, index):
+        start, end = int(self.text_offsets[index]), int(self.text_offsets[index + 1])
+        return self.text_blob[start:end].tobytes().decode('utf-8')
+
+    def item(self, index):
+        """Block `index` as the dict of the JSON format."""
+        extra = self.extras.get(index, {})
+        x1, y1, x2, y2 = [int(v) if is_int else v for v, is_int in zip(self.boxes[index].tolist(), self.box_is_int[index].tolist())]
+        item = {
+            'name': extra.get('name', self.names[int(self.class_ids[index])]),
+            'class': int(self.class_ids[index]),
+            'confidence': float(self.confidences[index]),
+            'box': extra.get('box', {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2}),
+        }
+        if self.has_text[index]:
+            item['text'] = extra['text'] if 'text' in extra else self.text(index)
+        for key, value in extra.items():
+            if key not in CORE_KEYS:
+                item[key] = value
+        return item
+
+    def page_items(self, page_index):
+        start, end = self.page_range(page_index)
+        return [self.item(index) for index in range(start, end)]
+
+    def iter_pages(self):
+        """Yield (page name, blocks) for every page in store order."""
+        for page_index, page_name in enumerate(self.page_names):
+            yield page_name, self.page_items(page_index)
+
+    def to_json_files(self, output_dir, indent=2):
+        """Write every page back to `<page name>.json` in the format it was read from."""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for page_index, (page_name, items) in enumerate(self.iter_pages()):
+            data = [json.dumps(items, indent=2)] if self.meta['double_encoded'][page_index] else items
+            path = os.path.join(output_dir, f"{page_name}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=indent, ensure_ascii=False)
+            paths.append(path)
+        return paths
+
+
+def json_to_store(json_paths, store_path):
+    store = LayoutStore.from_json_files(json_paths)
+    store.save(store_path)
+    return store
+
+
+def store_to_json(store_path, output_dir):
+    return LayoutStore.load(store_path).to_json_files(output_dir)
@@ -0,0 +1,70 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+MANIFEST_VERSION = 1
+
+
+def config_hash(config, ignore=('visualize', 'device', 'workers', 'cache_dir', 'cache_max_mb')):
+    """Hash of the settings that change model outputs; runtime-only keys are left out."""
+    relevant = {k: v for k, v in (config or {}).items() if k not in ignore}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class Manifest:
+    def __init__(self, path):
+        """
+        Record of which inputs produced which outputs, for incremental re-runs.
+
+        Every entry stores the input content hash, the model version and the config hash it
+        was produced with, plus its output files. An input is up to date when all three match
+        and the outputs still exist. The file is rewritten atomically after every record(), so
+        a run that crashes mid-batch resumes from the last finished input.
+
+        Args:
+            path (str): JSON file holding the manifest; created on first save.
+        """
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+
+    @staticmethod
+    def fingerprint(input_hash, model_version, config_digest):
+        return {'input_hash': input_hash, 'model_version': model_version, 'config_hash': config_digest}
+
+    def is_current(self, key, fingerprint):
+        """True if `key` was produced from the same input, model and config and its outputs exist."""
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return False
+        if any(entry.get(name) != value for name, value in fingerprint.items()):
+            return False
+        return all(os.path.exists(output) for output in entry.get('outputs', []))
+
+    def record(self, key, fingerprint, outputs):
+        """Mark `key` as done with the given outputs and persist the manifest."""
+        with self._lock:
+            self.entries[key] = dict(fingerprint, outputs=list(outputs), updated=time.time())
+            self._save()
+
+    def forget(self, key):
+        with self._lock:
+            if self.entries.pop(key, None) is not None:
+                self._save()
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -3,6 +3,8 @@
 # import unicodedata
 import re
 
+import numpy as np
+
 
 def __is_overlaps_y_exceeds_threshold(bbox1, bbox2, overlap_ratio_threshold=0.8):
     """检查两个bbox在y轴上是否有重叠，并且该重叠区域的高度占两个bbox高度更低的那个超过80%"""
@@ -108,9 +110,140 @@ def calculate_overlap_area_in_bbox1_area_ratio(bbox1, bbox2):
     else:
         return intersection_area / bbox1_area
 
+# Below this many block x span pairs the plain loop beats building the index
+BRUTEFORCE_MAX_PAIRS = 256
+# Spans covering more grid cells than this are checked against every block instead of indexed
+MAX_CELLS_PER_SPAN = 64
+
+
+def _block_bbox(block):
+    L = block['poly'][0]
+    U = block['poly'][1]
+    R = block['poly'][2]
+    D = block['poly'][5]
+    L, R = min(L, R), max(L, R)
+    U, D = min(U, D), max(U, D)
+    return [L, U, R, D]
+
+
+def _all_finite(bboxes):
+    return len(bboxes) == 0 or bool(np.isfinite(np.asarray(bboxes, dtype=np.float64)).all())
+
+
+def overlap_area_in_bbox1_area_ratios(bboxes1, bbox2):
+    """
+    calculate_overlap_area_in_bbox1_area_ratio for many bbox1 (N x 4 array) against one bbox2.
+    The arithmetic is done in the same order, so the ratios are bit-identical.
+    """
+    x_left = np.maximum(bboxes1[:, 0], bbox2[0])
+    y_top = np.maximum(bboxes1[:, 1], bbox2[1])
+    x_right = np.minimum(bboxes1[:, 2], bbox2[2])
+    y_bottom = np.minimum(bboxes1[:, 3], bbox2[3])
+    intersection_area = (x_right - x_left) * (y_bottom - y_top)
+    bbox1_area = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
+    overlaps = (x_right >= x_left) & (y_bottom >= y_top) & (bbox1_area != 0)
+    ratios = np.zeros(len(bboxes1), dtype=np.float64)
+    np.divide(intersection_area, bbox1_area, out=ratios, where=overlaps)
+    return ratios
+
+
+class SpanGrid:
+    def __init__(self, bboxes, cell_size=None):
+        """
+        Uniform grid over span bboxes, for finding the spans that may overlap a block.
+
+        Each span is registered in every cell it touches; a query returns the spans registered in
+        the cells the block touches, which includes every span overlapping the block with a
+        non-zero area (the only ones with a positive overlap ratio). Spans with no area never
+        have one and are left out; very large spans are returned by every query.
+
+        Args:
+            bboxes: span bboxes [x0, y0, x1, y1]
+            cell_size (tuple, optional): (width, height) of a cell; defaults to the median span size.
+        """
+        self.bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        widths = self.bboxes[:, 2] - self.bboxes[:, 0]
+        heights = self.bboxes[:, 3] - self.bboxes[:, 1]
+        valid = (widths > 0) & (heights > 0)
+        if cell_size is None:
+            cell_size = (float(np.median(widths[valid])) if valid.any() else 1.0,
+                         float(np.median(heights[valid])) if valid.any() else 1.0)
+        self.cell_w, self.cell_h = max(cell_size[0], 1e-6), max(cell_size[1], 1e-6)
+
+        cx0, cy0, cx1, cy1 = self._cells(self.bboxes)
+        n_cells = (cx1 - cx0 + 1) * (cy1 - cy0 + 1)
+        large = valid & (n_cells > MAX_CELLS_PER_SPAN)
+        self.large = np.flatnonzero(large)
+        self.cells = {}
+        for k in np.flatnonzero(valid & ~large).tolist():
+            for cx in range(cx0[k], cx1[k] + 1):
+                for cy in range(cy0[k], cy1[k] + 1):
+                    self.cells.setdefault((cx, cy), []).append(k)
+        self.num_indexed = len(self.bboxes) - len(self.large)
+
+    def _cells(self, bboxes):
+        cx0 = np.floor(bboxes[:, 0] / self.cell_w).astype(np.int64)
+        cy0 = np.floor(bboxes[:, 1] / self.cell_h).astype(np.int64)
+        cx1 = np.floor(bboxes[:, 2] / self.cell_w).astype(np.int64)
+        cy1 = np.floor(bboxes[:, 3] / self.cell_h).astype(np.int64)
+        return cx0, cy0, cx1, cy1
+
+    def query(self, bbox):
+        """Indices (ascending) of the spans that may overlap `bbox`."""
+        cx0, cy0, cx1, cy1 = (int(v[0]) for v in self._cells(np.asarray([bbox], dtype=np.float64)))
+        if cx1 < cx0 or cy1 < cy0:
+            found = []
+        elif (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # Block covers more cells than are occupied: walk the occupied ones instead
+            found = [k for (cx, cy), members in self.cells.items()
+                     if cx0 <= cx <= cx1 and cy0 <= cy <= cy1 for k in members]
+        else:
+            found = []
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    found.extend(self.cells.get((cx, cy), ()))
+        return np.union1d(np.asarray(found, dtype=np.int64), self.large)
+
+
 def fill_spans_in_blocks(blocks, spans, radio):
     '''
     将allspans中的span按位置关系，放入blocks中
+
+    Spans are looked up in a uniform grid (SpanGrid) and their overlap ratios with each block are
+    computed in one vectorized step, instead of testing every span against every block. Blocks
+    still claim spans in block order and spans keep their order, so the assignments are the same
+    as fill_spans_in_blocks_bruteforce; like it, `spans` is left holding the unassigned spans.
+    '''
+    block_bboxes = [_block_bbox(block) for block in blocks]
+    span_bboxes = [span["bbox"] for span in spans]
+    if (len(blocks) * len(spans) < BRUTEFORCE_MAX_PAIRS or radio < 0
+            or not _all_finite(span_bboxes) or not _all_finite(block_bboxes)):
+        # Tiny pages are faster without the index; a negative ratio matches spans that do not
+        # overlap at all, and NaN/inf coordinates follow Python's max/min, so both use the plain loop
+        return fill_spans_in_blocks_bruteforce(blocks, spans, radio)
+
+    grid = SpanGrid(span_bboxes)
+    assigned = np.zeros(len(spans), dtype=bool)
+    block_with_spans = []
+    for block, block_bbox in zip(blocks, block_bboxes):
+        candidates = grid.query(block_bbox)
+        candidates = candidates[~assigned[candidates]]
+        ratios = overlap_area_in_bbox1_area_ratios(grid.bboxes[candidates], block_bbox)
+        matched = candidates[ratios > radio]
+        assigned[matched] = True
+        block_with_spans.append({
+            'type': block["category_type"],
+            'bbox': block_bbox,
+            'saved_info': block,
+            'spans': [spans[k] for k in matched],
+        })
+
+    spans[:] = [span for span, used in zip(spans, assigned) if not used]
+    return block_with_spans, spans
+
+def fill_spans_in_blocks_bruteforce(blocks, spans, radio):
+    '''
+    将allspans中的span按位置关系，放入blocks中 (reference implementation, every span against every block)
     '''
     block_with_spans = []
     for block in blocks:
@@ -0,0 +1,114 @@
+import time
+import threading
+from importlib import metadata
+
+from pdf_extract_kit.utils.result_cache import model_file_id
+
+
+class ModelPool:
+    def __init__(self):
+        """
+        Process-wide cache of loaded models, keyed by the arguments they were built with.
+
+        Each key is loaded at most once per process; later requests for the same key return
+        the same instance. Hit/miss counters and per-key load times are kept so callers can
+        check that no model was loaded twice.
+        """
+        self._models = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load_times = {}
+
+    def get(self, key, factory):
+        """
+        Return the model stored under `key`, building it with `factory()` on first use.
+
+        Args:
+            key (hashable): Identity of the model (e.g. language and model directories).
+            factory (callable): Zero-argument callable that loads the model.
+
+        Returns:
+            The pooled model instance.
+        """
+        with self._lock:
+            if key in self._models:
+                self.hits += 1
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given key; others wait and then count as hits
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self.hits += 1
+                    return self._models[key]
+            start = time.time()
+            model = factory()
+            elapsed = time.time() - start
+            with self._lock:
+                self._models[key] = model
+                self.misses += 1
+                self.load_times[key] = elapsed
+        return model
+
+    def stats(self):
+        """Return hit/miss counters and load times for every pooled model."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'loaded': len(self._models),
+                'load_time': round(sum(self.load_times.values()), 3),
+                'models': {repr(key): round(t, 3) for key, t in self.load_times.items()},
+            }
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._load_locks.clear()
+            self.load_times.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Global pool shared by every caller in this process
+MODEL_POOL = ModelPool()
+
+
+def get_paddle_ocr(lang="en", det_model_dir=None, rec_model_dir=None, use_angle_cls=True, **kwargs):
+    """
+    Return a pooled PaddleOCR instance for (lang, det/rec model dirs, angle_cls, extra kwargs).
+
+    The det, cls and rec models are read from disk the first time a combination is requested
+    in this process and reused for every later page and document.
+    """
+    key = ('paddleocr', lang, det_model_dir, rec_model_dir, use_angle_cls, tuple(sorted(kwargs.items())))
+
+    def load():
+        from paddleocr import PaddleOCR
+        params = dict(kwargs, lang=lang, use_angle_cls=use_angle_cls)
+        if det_model_dir is not None:
+            params['det_model_dir'] = det_model_dir
+        if rec_model_dir is not None:
+            params['rec_model_dir'] = rec_model_dir
+        return PaddleOCR(**params)
+
+    return MODEL_POOL.get(key, load)
+
+
+def paddle_ocr_id(ocr):
+    """
+    Identity of a PaddleOCR instance for result cache keys: its det, rec and cls model files,
+    the model generation (ocr_version) and the installed paddleocr version, so swapped or
+    upgraded OCR models miss the cache.
+    """
+    args = getattr(ocr, 'args', None)
+    model_id = {f"{name}_model": model_file_id(getattr(args, f"{name}_model_dir", None)) for name in ('det', 'rec', 'cls')}
+    model_id['ocr_version'] = getattr(args, 'ocr_version', None)
+    try:
+        model_id['paddleocr'] = metadata.version('paddleocr')
+    except metadata.PackageNotFoundError:
+        model_id['paddleocr'] = None
+    return model_id
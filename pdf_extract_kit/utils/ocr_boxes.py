@@ -0,0 +1,339 @@
+import numpy as np
+
+
+def _is_overlaps_y_exceeds_threshold(bbox1, bbox2, overlap_ratio_threshold=0.8):
+    """Check if two bounding boxes overlap on the y-axis, and if the height of the overlapping region exceeds 80% of the height of the shorter bounding box."""
+    _, y0_1, _, y1_1 = bbox1
+    _, y0_2, _, y1_2 = bbox2
+
+    overlap = max(0, min(y1_1, y1_2) - max(y0_1, y0_2))
+    height1, height2 = y1_1 - y0_1, y1_2 - y0_2
+    max_height = max(height1, height2)
+    min_height = min(height1, height2)
+
+    return (overlap / min_height) > overlap_ratio_threshold
+
+
+def bbox_to_points(bbox):
+    """ change bbox(shape: N * 4) to polygon(shape: N * 8) """
+    x0, y0, x1, y1 = bbox
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]]).astype('float32')
+
+
+def points_to_bbox(points):
+    """ change polygon(shape: N * 8) to bbox(shape: N * 4) """
+    x0, y0 = points[0]
+    x1, _ = points[1]
+    _, y1 = points[2]
+    return [x0, y0, x1, y1]
+
+
+def merge_intervals(intervals):
+    # Sort the intervals based on the start value
+    intervals.sort(key=lambda x: x[0])
+
+    merged = []
+    for interval in intervals:
+        # If the list of merged intervals is empty or if the current
+        # interval does not overlap with the previous, simply append it.
+        if not merged or merged[-1][1] < interval[0]:
+            merged.append(interval)
+        else:
+            # Otherwise, there is overlap, so we merge the current and previous intervals.
+            merged[-1][1] = max(merged[-1][1], interval[1])
+
+    return merged
+
+
+def remove_intervals(original, masks):
+    # Merge all mask intervals
+    merged_masks = merge_intervals(masks)
+
+    result = []
+    original_start, original_end = original
+
+    for mask in merged_masks:
+        mask_start, mask_end = mask
+
+        # If the mask starts after the original range, ignore it
+        if mask_start > original_end:
+            continue
+
+        # If the mask ends before the original range starts, ignore it
+        if mask_end < original_start:
+            continue
+
+        # Remove the masked part from the original range
+        if original_start < mask_start:
+            result.append([original_start, mask_start - 1])
+
+        original_start = max(mask_end + 1, original_start)
+
+    # Add the remaining part of the original range, if any
+    if original_start <= original_end:
+        result.append([original_start, original_end])
+
+    return result
+
+
+def update_det_boxes_loop(dt_boxes, mfd_res):
+    """Reference implementation of update_det_boxes, one Python comparison per text/formula pair."""
+    new_dt_boxes = []
+    for text_box in dt_boxes:
+        text_bbox = points_to_bbox(text_box)
+        masks_list = []
+        for mf_box in mfd_res:
+            mf_bbox = mf_box['bbox']
+            if _is_overlaps_y_exceeds_threshold(text_bbox, mf_bbox):
+                masks_list.append([mf_bbox[0], mf_bbox[2]])
+        text_x_range = [text_bbox[0], text_bbox[2]]
+        text_remove_mask_range = remove_intervals(text_x_range, masks_list)
+        temp_dt_box = []
+        for text_remove_mask in text_remove_mask_range:
+            temp_dt_box.append(bbox_to_points([text_remove_mask[0], text_bbox[1], text_remove_mask[1], text_bbox[3]]))
+        if len(temp_dt_box) > 0:
+            new_dt_boxes.extend(temp_dt_box)
+    return new_dt_boxes
+
+
+def merge_spans_to_line(spans):
+    """
+    Merge given spans into lines. Spans are considered based on their position in the document.
+    If spans overlap sufficiently on the Y-axis, they are merged into the same line; otherwise, a new line is started.
+
+    Parameters:
+    spans (list): A list of spans, where each span is a dictionary containing at least the key 'bbox',
+                  which itself is a list of four integers representing the bounding box:
+                  [x0, y0, x1, y1], where (x0, y0) is the top-left corner and (x1, y1) is the bottom-right corner.
+
+    Returns:
+    list: A list of lines, where each line is a list of spans.
+    """
+    # Return an empty list if the spans list is empty
+    if len(spans) == 0:
+        return []
+    else:
+        # Sort spans by the Y0 coordinate
+        spans.sort(key=lambda span: span['bbox'][1])
+
+        lines = []
+        current_line = [spans[0]]
+        for span in spans[1:]:
+            # If the current span overlaps with the last span in the current line on the Y-axis, add it to the current line
+            if _is_overlaps_y_exceeds_threshold(span['bbox'], current_line[-1]['bbox']):
+                current_line.append(span)
+            else:
+                # Otherwise, start a new line
+                lines.append(current_line)
+                current_line = [span]
+
+        # Add the last line if it exists
+        if current_line:
+            lines.append(current_line)
+
+        return lines
+
+
+def merge_overlapping_spans(spans):
+    """
+    Merges overlapping spans on the same line.
+
+    :param spans: A list of span coordinates [(x1, y1, x2, y2), ...]
+    :return: A list of merged spans
+    """
+    # Return an empty list if the input spans list is empty
+    if not spans:
+        return []
+
+    # Sort spans by their starting x-coordinate
+    spans.sort(key=lambda x: x[0])
+
+    # Initialize the list of merged spans
+    merged = []
+    for span in spans:
+        # Unpack span coordinates
+        x1, y1, x2, y2 = span
+        # If the merged list is empty or there's no horizontal overlap, add the span directly
+        if not merged or merged[-1][2] < x1:
+            merged.append(span)
+        else:
+            # If there is horizontal overlap, merge the current span with the previous one
+            last_span = merged.pop()
+            # Update the merged span's top-left corner to the smaller (x1, y1) and bottom-right to the larger (x2, y2)
+            x1 = min(last_span[0], x1)
+            y1 = min(last_span[1], y1)
+            x2 = max(last_span[2], x2)
+            y2 = max(last_span[3], y2)
+            # Add the merged span back to the list
+            merged.append((x1, y1, x2, y2))
+
+    # Return the list of merged spans
+    return merged
+
+
+def merge_det_boxes_loop(dt_boxes):
+    """
+    Merge detection boxes (reference implementation, see merge_det_boxes).
+
+    This function takes a list of detected bounding boxes, each represented by four corner points.
+    The goal is to merge these bounding boxes into larger text regions.
+
+    Parameters:
+    dt_boxes (list): A list containing multiple text detection boxes, where each box is defined by four corner points.
+
+    Returns:
+    list: A list containing the merged text regions, where each region is represented by four corner points.
+    """
+    # Convert the detection boxes into a dictionary format with bounding boxes and type
+    dt_boxes_dict_list = []
+    for text_box in dt_boxes:
+        text_bbox = points_to_bbox(text_box)
+        text_box_dict = {
+            'bbox': text_bbox,
+        }
+        dt_boxes_dict_list.append(text_box_dict)
+
+    # Merge adjacent text regions into lines
+    lines = merge_spans_to_line(dt_boxes_dict_list)
+
+    # Initialize a new list for storing the merged text regions
+    new_dt_boxes = []
+    for line in lines:
+        line_bbox_list = []
+        for span in line:
+            line_bbox_list.append(span['bbox'])
+
+        # Merge overlapping text regions within the same line
+        merged_spans = merge_overlapping_spans(line_bbox_list)
+
+        # Convert the merged text regions back to point format and add them to the new detection box list
+        for span in merged_spans:
+            new_dt_boxes.append(bbox_to_points(span))
+
+    return new_dt_boxes
+
+
+
+def _as_box_array(dt_boxes):
+    """(N, 4, 2) float32 view of the boxes, or None if they are not float32 quads."""
+    boxes = np.asarray(dt_boxes)
+    if boxes.dtype != np.float32 or boxes.ndim != 3 or boxes.shape[1:] != (4, 2):
+        return None
+    return boxes
+
+
+def _bboxes_to_points(x0, y0, x1, y1):
+    """bbox_to_points for arrays of bbox coordinates; returns a list of (4, 2) float32 arrays."""
+    points = np.empty((len(x0), 4, 2), dtype=np.float32)
+    points[:, 0, 0], points[:, 0, 1] = x0, y0
+    points[:, 1, 0], points[:, 1, 1] = x1, y0
+    points[:, 2, 0], points[:, 2, 1] = x1, y1
+    points[:, 3, 0], points[:, 3, 1] = x0, y1
+    return list(points)
+
+
+def _same_line_ratio_exceeds(overlap, min_height, threshold=0.8):
+    """`overlap / min_height > threshold` of _is_overlaps_y_exceeds_threshold, for arrays, in float64."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (overlap > 0) & (overlap.astype(np.float64) / min_height > threshold)
+
+
+def merge_det_boxes(dt_boxes):
+    """
+    Merge detection boxes into line regions, as merge_det_boxes_loop does.
+
+    The boxes are handled as one (N, 4, 2) array instead of per-box dicts: a stable sort by y0,
+    then line breaks where a box does not overlap the previous one vertically by more than 80%
+    (merge_spans_to_line only ever compares neighbours in that order), then a stable sort by x0
+    within each line, and a new region wherever the running right edge of the line falls short
+    of the next box (merge_overlapping_spans).
+
+    Overlap ratios are compared with 0.8 in float64. The loop compares float32 scalars, so the
+    two only disagree on a ratio within float32 rounding of 0.8, in practice an overlap of
+    exactly 80% (e.g. 16 of 20 px): it does not exceed the threshold here, nor in the loop
+    under numpy>=2, while under numpy<2 the loop rounds it to float32(0.8) > 0.8 and merges.
+
+    Parameters:
+    dt_boxes (list): text detection boxes, each defined by four corner points.
+
+    Returns:
+    list: the merged text regions, each as four corner points (float32).
+    """
+    if len(dt_boxes) == 0:
+        return []
+    boxes = _as_box_array(dt_boxes)
+    if boxes is None:
+        return merge_det_boxes_loop(dt_boxes)
+
+    order = np.argsort(boxes[:, 0, 1], kind='stable')
+    x0, y0 = boxes[order, 0, 0], boxes[order, 0, 1]
+    x1, y1 = boxes[order, 1, 0], boxes[order, 2, 1]
+
+    # Line breaks: _is_overlaps_y_exceeds_threshold(box, previous box)
+    overlap = np.minimum(y1[1:], y1[:-1]) - np.maximum(y0[1:], y0[:-1])
+    min_height = np.minimum(y1[1:] - y0[1:], y1[:-1] - y0[:-1])
+    same_line = _same_line_ratio_exceeds(overlap, min_height)
+    new_line = np.ones(len(order), dtype=bool)
+    new_line[1:] = ~same_line
+    line_ids = np.cumsum(new_line) - 1
+
+    # Within a line by x0 (lexsort is stable), then split where nothing so far reaches the next box
+    in_line = np.lexsort((x0, line_ids))
+    x0, y0, x1, y1 = x0[in_line], y0[in_line], x1[in_line], y1[in_line]
+    line_starts = np.flatnonzero(new_line)
+    new_region = np.zeros(len(order), dtype=bool)
+    for start, end in zip(line_starts, np.append(line_starts[1:], len(order))):
+        reach = np.maximum.accumulate(x1[start:end])
+        new_region[start] = True
+        new_region[start + 1:end] = reach[:-1] < x0[start + 1:end]
+    starts = np.flatnonzero(new_region)
+    return _bboxes_to_points(
+        np.minimum.reduceat(x0, starts),
+        np.minimum.reduceat(y0, starts),
+        np.maximum.reduceat(x1, starts),
+        np.maximum.reduceat(y1, starts),
+    )
+
+
+def update_det_boxes(dt_boxes, mfd_res):
+    """
+    Cut the x-ranges of formulas out of the text boxes they share a line with, as
+    update_det_boxes_loop does.
+
+    Which formulas overlap which text boxes by more than 80% in height is decided for all pairs
+    at once, in float64; as in merge_det_boxes, only an overlap of exactly 80% can be decided
+    differently from the loop. Only the few boxes that touch a formula go through
+    remove_intervals; every other box is kept whole.
+    """
+    if len(dt_boxes) == 0:
+        return []
+    boxes = _as_box_array(dt_boxes)
+    if boxes is None:
+        return update_det_boxes_loop(dt_boxes, mfd_res)
+    mf_bboxes = [mf_box['bbox'] for mf_box in mfd_res]
+
+    x0, y0 = boxes[:, 0, 0], boxes[:, 0, 1]
+    x1, y1 = boxes[:, 1, 0], boxes[:, 2, 1]
+    keep = x0 <= x1
+    if not mf_bboxes:
+        return _bboxes_to_points(x0[keep], y0[keep], x1[keep], y1[keep])
+
+    mf = np.asarray(mf_bboxes, dtype=np.float64)
+    ty0, ty1 = y0.astype(np.float64)[:, None], y1.astype(np.float64)[:, None]
+    my0, my1 = mf[None, :, 1], mf[None, :, 3]
+    overlap = np.minimum(ty1, my1) - np.maximum(ty0, my0)
+    exceeds = _same_line_ratio_exceeds(overlap, np.minimum(ty1 - ty0, my1 - my0))
+
+    has_mask = exceeds.any(axis=1)
+    whole = _bboxes_to_points(x0, y0, x1, y1)
+    new_dt_boxes = []
+    for i in range(len(boxes)):
+        if not has_mask[i]:
+            if keep[i]:
+                new_dt_boxes.append(whole[i])
+            continue
+        text_bbox = points_to_bbox(boxes[i])
+        masks_list = [[mf_bboxes[k][0], mf_bboxes[k][2]] for k in np.flatnonzero(exceeds[i])]
+        for start, end in remove_intervals([text_bbox[0], text_bbox[2]], masks_list):
+            new_dt_boxes.append(bbox_to_points([start, text_bbox[1], end, text_bbox[3]]))
+    return new_dt_boxes
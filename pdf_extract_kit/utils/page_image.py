@@ -0,0 +1,100 @@
+import warnings
+
+import numpy as np
+from PIL import Image
+
+
+class PageImage:
+    def __init__(self, pixels, page_no=None):
+        """
+        A rendered page backed by a single RGB pixel buffer.
+
+        All numpy views (RGB, BGR, crops) share that buffer and are read-only. PIL and
+        contiguous-BGR conversions are made at most once and cached, for consumers that
+        cannot work on a view.
+
+        Args:
+            pixels (np.ndarray): HxWx3 uint8 RGB array; it is wrapped, not copied.
+            page_no (int, optional): Zero-based page index within its document.
+        """
+        if pixels.ndim != 3 or pixels.shape[2] != 3 or pixels.dtype != np.uint8:
+            raise ValueError("PageImage expects an HxWx3 uint8 RGB array, got {} {}".format(pixels.shape, pixels.dtype))
+        self._rgb = pixels.view()
+        self._rgb.flags.writeable = False
+        self.page_no = page_no
+        self._pixmap = None
+        self._pil = None
+        self._bgr = None
+
+    @classmethod
+    def from_pixmap(cls, pix, page_no=None):
+        """Wrap a PyMuPDF RGB pixmap without copying its samples."""
+        if pix.n != 3:
+            raise ValueError("Render the pixmap with alpha=False in RGB, got {} channels".format(pix.n))
+        # samples_mv is a view on the pixmap memory; older PyMuPDF only has the bytes copy
+        buffer = pix.samples_mv if hasattr(pix, 'samples_mv') else pix.samples
+        pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+        page = cls(pixels, page_no)
+        page._pixmap = pix  # keep the buffer owner alive as long as the views
+        return page
+
+    @classmethod
+    def from_pil(cls, image, page_no=None):
+        page = cls(np.asarray(image.convert('RGB')), page_no)
+        page._pil = image
+        return page
+
+    @property
+    def width(self):
+        return self._rgb.shape[1]
+
+    @property
+    def height(self):
+        return self._rgb.shape[0]
+
+    @property
+    def size(self):
+        """(width, height), like PIL.Image.Image.size."""
+        return self.width, self.height
+
+    @property
+    def rgb(self):
+        """Read-only HxWx3 RGB view of the page buffer."""
+        return self._rgb
+
+    @property
+    def bgr(self):
+        """Read-only HxWx3 BGR view of the page buffer (negative channel stride, no copy)."""
+        return self._rgb[..., ::-1]
+
+    def __array__(self, dtype=None, copy=None):
+        return self._rgb if dtype is None else self._rgb.astype(dtype)
+
+    def to_bgr(self):
+        """Contiguous BGR array for OpenCV/PaddleOCR/ultralytics, converted once and cached."""
+        if self._bgr is None:
+            bgr = np.ascontiguousarray(self.bgr)
+            bgr.flags.writeable = False
+            self._bgr = bgr
+        return self._bgr
+
+    def to_pil(self):
+        """PIL view of the page, converted once and cached (PIL keeps RGB in its own padded layout)."""
+        if self._pil is None:
+            self._pil = Image.fromarray(self._rgb)
+        return self._pil
+
+    def to_tensor(self):
+        """uint8 CHW torch tensor sharing the page buffer; treat it as read-only."""
+        import torch
+        with warnings.catch_warnings():
+            # torch warns on non-writable arrays; the tensor is only ever read
+            warnings.simplefilter("ignore", UserWarning)
+            return torch.from_numpy(self._rgb).permute(2, 0, 1)
+
+    def crop(self, box):
+        """Return the (x1, y1, x2, y2) region as a PageImage view on the same buffer."""
+        x1, y1, x2, y2 = [int(v) for v in box]
+        page = PageImage(self._rgb[max(0, y1):y2, max(0, x1):x2], self.page_no)
+        page._pixmap = self._pixmap
+        return page
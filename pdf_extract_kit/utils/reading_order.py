@@ -0,0 +1,77 @@
+import numpy as np
+
+# Boxes whose top edges are closer than this (in pixels) are treated as one line
+SAME_LINE_TOLERANCE = 10
+
+
+def _insertion_pass(order, xs, ys, tolerance):
+    """The original fix-up: move each box left past same-line boxes that start further right."""
+    for i in range(len(order) - 1):
+        for j in range(i, -1, -1):
+            if abs(ys[order[j + 1]] - ys[order[j]]) < tolerance and xs[order[j + 1]] < xs[order[j]]:
+                order[j], order[j + 1] = order[j + 1], order[j]
+            else:
+                break
+    return order
+
+
+def reading_order(xs, ys, tolerance=SAME_LINE_TOLERANCE):
+    """
+    Indices that put boxes with top-left corners (xs, ys) in reading order: top to bottom, and
+    left to right within a line.
+
+    The order is exactly that of the classic PaddleOCR fix-up (sort by (y, x), then an
+    insertion pass swapping neighbours less than `tolerance` apart in y), without its quadratic
+    worst case. After the sort, a box can only ever swap with neighbours less than `tolerance`
+    below or above it, so the sorted boxes split into independent chains wherever the gap to
+    the next box is at least `tolerance`. In a chain whose whole y-range is below the tolerance
+    every pair counts as one line and the pass is just a stable sort by x, done for all such
+    chains in one lexsort; only chains spanning more than that (tightly packed lines) get the
+    insertion pass, limited to the chain.
+
+    Args:
+        xs, ys: x and y of each box's first corner.
+        tolerance: y distance below which two boxes count as one line.
+
+    Returns:
+        np.ndarray: box indices in reading order.
+    """
+    xs, ys = np.asarray(xs), np.asarray(ys)
+    order = np.lexsort((xs, ys))
+    if len(order) < 2:
+        return order
+
+    ys_sorted, xs_sorted = ys[order], xs[order]
+    # Same dtype arithmetic as the scalar comparisons, so rounding matches
+    breaks = ~(np.abs(ys_sorted[1:] - ys_sorted[:-1]) < tolerance)
+    chain_starts = np.concatenate(([0], np.flatnonzero(breaks) + 1))
+    chain_ends = np.append(chain_starts[1:], len(order))
+    chain_ids = np.repeat(np.arange(len(chain_starts)), chain_ends - chain_starts)
+
+    spread = ys_sorted[chain_ends - 1] - ys_sorted[chain_starts]
+    wide = np.flatnonzero((chain_ends - chain_starts > 1) & ~(spread < tolerance))
+
+    keys = xs_sorted.astype(np.float64)
+    for chain in wide:
+        # Keep these chains as they are for the lexsort; they are fixed up below
+        keys[chain_starts[chain]:chain_ends[chain]] = np.arange(chain_starts[chain], chain_ends[chain])
+    order = order[np.lexsort((keys, chain_ids))]
+
+    for chain in wide:
+        start, end = chain_starts[chain], chain_ends[chain]
+        order[start:end] = _insertion_pass(list(order[start:end]), xs, ys, tolerance)
+    return order
+
+
+def sorted_boxes(dt_boxes):
+    """
+    Sort text boxes in order from top to bottom, left to right
+    args:
+        dt_boxes(array):detected text boxes with shape [N, 4, 2]
+    return:
+        list of the boxes (shape [4, 2]) in reading order
+    """
+    if len(dt_boxes) == 0:
+        return []
+    boxes = np.asarray(dt_boxes)
+    return [dt_boxes[i] for i in reading_order(boxes[:, 0, 0], boxes[:, 0, 1])]
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from pdf_extract_kit.utils.page_image import PageImage
+
+
+def hash_image(image):
+    """
+    Content hash of a page image, independent of how it was loaded.
+
+    Args:
+        image: PageImage, numpy array, PIL.Image.Image, encoded image bytes or an image path.
+
+    Returns:
+        str: Hex sha256 digest, or None if the input type cannot be hashed.
+    """
+    sha = hashlib.sha256()
+    if isinstance(image, PageImage):
+        image = image.rgb
+    if isinstance(image, np.ndarray):
+        sha.update(repr((image.shape, image.dtype.str)).encode())
+        sha.update(np.ascontiguousarray(image).data)
+    elif isinstance(image, Image.Image):
+        sha.update(repr((image.size, image.mode)).encode())
+        sha.update(image.tobytes())
+    elif isinstance(image, bytes):
+        sha.update(image)
+    elif isinstance(image, str):
+        with open(image, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+    else:
+        return None
+    return sha.hexdigest()
+
+
+def hash_file(path):
+    return hash_image(str(path))
+
+
+def make_cache_key(content_hash, model_id, model_config=None):
+    """Combine a content hash with the model identity and configuration into one cache key."""
+    payload = json.dumps([content_hash, model_id, model_config], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def model_file_id(path):
+    """
+    Identify model weights by path, size and modification time, so retrained weights miss the cache.
+
+    For a model directory (e.g. PaddleOCR's inference models) every file in it is identified.
+    """
+    if path and os.path.isdir(path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        return f"{path}:[{','.join(model_file_id(f)[len(path):] for f in files)}]"
+    try:
+        stat = os.stat(path)
+        return f"{path}:{stat.st_size}:{int(stat.st_mtime)}"
+    except (OSError, TypeError):
+        return str(path)
+
+
+class ResultCache:
+    def __init__(self, cache_dir, max_bytes=512 * 2**20, suffix=".pkl", rescan_seconds=5.0):
+        """
+        Persistent content-addressed cache with size-bounded LRU eviction.
+
+        Entries live in `cache_dir/<key[:2]>/<key><suffix>`; access time is tracked through
+        the file mtime so LRU order survives restarts.
+
+        The directory may be shared by several processes (job queue and batch workers, the
+        app): a key missing from this process's index is looked up on disk and adopted, and
+        before evicting, the index is rebuilt from the directory, so `max_bytes` bounds the
+        shared directory rather than what this process wrote.
+
+        Args:
+            cache_dir (str): Directory for the cache files.
+            max_bytes (int): Total size on disk above which least recently used entries are removed.
+            suffix (str): File extension of the entries.
+            rescan_seconds (float): Rebuild the index from the directory on a write at most this
+                often (and whenever this process alone sees it over `max_bytes`).
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.rescan_seconds = rescan_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._scanned = 0.0
+        self._load_index()
+
+    def _load_index(self):
+        """(Re)build the index from the entries on disk, least recently used first."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(self.suffix):
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        # Evicted by another process meanwhile
+                        continue
+                    found.append((stat.st_mtime, name[:-len(self.suffix)], stat.st_size))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        self._total_bytes = sum(self._entries.values())
+        self._scanned = time.monotonic()
+
+    def _adopt(self, key):
+        """Add an entry another process wrote to the index; False if it is not on disk either."""
+        try:
+            size = os.stat(self._path(key)).st_size
+        except OSError:
+            return False
+        self._entries[key] = size
+        self._total_bytes += size
+        return True
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+    def get_bytes(self, key):
+        """Return the raw bytes stored under key, or None on a miss."""
+        with self._lock:
+            if key not in self._entries and not self._adopt(key):
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)
+            except OSError:
+                # Removed behind our back, treat as a miss
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put_bytes(self, key, data):
+        """Store raw bytes under key, then evict least recently used entries above max_bytes."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict(newest=key)
+
+    def get(self, key, default=None):
+        data = self.get_bytes(key)
+        return default if data is None else pickle.loads(data)
+
+    def put(self, key, value):
+        self.put_bytes(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or self._adopt(key)
+
+    def path(self, key):
+        """Path of a stored entry, or None if the key is not cached."""
+        with self._lock:
+            return self._path(key) if key in self._entries or self._adopt(key) else None
+
+    def _evict(self, newest=None):
+        if self._total_bytes > self.max_bytes or time.monotonic() - self._scanned >= self.rescan_seconds:
+            # Other processes add to (and evict from) the same directory
+            self._load_index()
+            if newest in self._entries:
+                # Don't let an mtime tie make the entry just written look least recently used
+                self._entries.move_to_end(newest)
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hit_rate, 4),
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,188 @@
+import time
+import queue
+import threading
+
+from pdf_extract_kit.utils.tracing import TRACER
+
+
+class Stage:
+    def __init__(self, name, fn, workers=1):
+        """
+        One step of a StagePipeline.
+
+        Args:
+            name (str): Stage name used in the metrics.
+            fn (callable): Called with the item from the previous stage, returns the item for the next one.
+            workers (int): Threads running this stage. With more than one, items may finish out
+                of order inside the pipeline; StagePipeline.run still yields them in input order.
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.items = 0
+        self.busy = 0.0
+        self.depth_sum = 0
+        self.depth_max = 0
+
+    def record(self, busy, depth):
+        with self._lock:
+            self.items += 1
+            self.busy += busy
+            self.depth_sum += depth
+            self.depth_max = max(self.depth_max, depth)
+
+
+class StagePipeline:
+    def __init__(self, stages, maxsize=2, source_name="source", tracer=None):
+        """
+        Run a chain of stages on separate threads connected by bounded queues.
+
+        While stage k works on item n, stage k-1 can already work on item n+1, so for pages
+        going through rasterize -> layout -> OCR the stages overlap in time instead of idling
+        while the others run. Each queue holds at most `maxsize` items, which bounds how many
+        pages are alive at once.
+
+        Args:
+            stages (list): Stage objects, in order.
+            maxsize (int): Capacity of each queue between two stages.
+            source_name (str): Metrics name for pulling items from the input iterable.
+            tracer (Tracer, optional): Every item a stage handles is traced as span `stage.<name>`
+                on that stage's thread; defaults to the process-wide TRACER.
+        """
+        self.stages = stages
+        self.maxsize = max(1, maxsize)
+        self.source = Stage(source_name, None)
+        self.wall_time = 0.0
+        self.tracer = tracer or TRACER
+
+    def run(self, items):
+        """
+        Feed `items` through all stages.
+
+        Yields:
+            The output of the last stage for each input item, in input order.
+        """
+        for stage in [self.source] + self.stages:
+            stage.reset()
+        queues = [queue.Queue(maxsize=self.maxsize) for _ in range(len(self.stages) + 1)]
+        stop = threading.Event()
+        done = object()
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        def put(q, item):
+            # Give up once the pipeline is stopping, so no thread blocks on a full queue
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def feed():
+            try:
+                iterator = iter(items)
+                seq = 0
+                while not stop.is_set():
+                    start = time.time()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        break
+                    elapsed = time.time() - start
+                    self.source.record(elapsed, 0)
+                    self.tracer.record(f"stage.{self.source.name}", elapsed, seq=seq)
+                    put(queues[0], (seq, item))
+                    seq += 1
+            except Exception as e:
+                put(queues[-1], e)
+            finally:
+                for _ in range(self.stages[0].workers if self.stages else 1):
+                    put(queues[0], done)
+
+        def work(k, stage):
+            inbox, outbox = queues[k], queues[k + 1]
+            try:
+                while not stop.is_set():
+                    depth = inbox.qsize()
+                    try:
+                        entry = inbox.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if entry is done:
+                        break
+                    seq, item = entry
+                    start = time.time()
+                    with self.tracer.span(f"stage.{stage.name}", seq=seq, queue=depth):
+                        result = stage.fn(item)
+                    stage.record(time.time() - start, depth)
+                    put(outbox, (seq, result))
+            except Exception as e:
+                put(queues[-1], e)
+            finally:
+                # The last worker of a stage to finish passes end-of-stream on to every worker of the next
+                with remaining_lock:
+                    remaining[k] -= 1
+                    last = remaining[k] == 0
+                if last:
+                    following = self.stages[k + 1].workers if k + 1 < len(self.stages) else 1
+                    for _ in range(following):
+                        put(outbox, done)
+
+        threads = [threading.Thread(target=feed, name=f"stage-{self.source.name}", daemon=True)]
+        for k, stage in enumerate(self.stages):
+            for i in range(stage.workers):
+                threads.append(threading.Thread(target=work, args=(k, stage), name=f"stage-{stage.name}-{i}", daemon=True))
+
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        try:
+            pending = {}
+            next_seq = 0
+            while True:
+                entry = queues[-1].get()
+                if entry is done:
+                    break
+                if isinstance(entry, Exception):
+                    raise entry
+                seq, result = entry
+                pending[seq] = result
+                while next_seq in pending:
+                    yield pending.pop(next_seq)
+                    next_seq += 1
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.wall_time = time.time() - start
+
+    def metrics(self):
+        """
+        Per-stage counters of the last run.
+
+        Returns:
+            dict: name -> items, busy seconds, utilization (busy time over wall time per
+                worker) and the average/maximum depth of the stage's input queue.
+        """
+        metrics = {}
+        for stage in [self.source] + self.stages:
+            metrics[stage.name] = {
+                'items': stage.items,
+                'busy': round(stage.busy, 3),
+                'utilization': round(stage.busy / (self.wall_time * stage.workers), 3) if self.wall_time else 0.0,
+                'queue_avg': round(stage.depth_sum / stage.items, 2) if stage.items else 0.0,
+                'queue_max': stage.depth_max,
+            }
+        return metrics
+
+    def format_metrics(self):
+        lines = [f"pipeline wall time: {self.wall_time:.2f}s"]
+        for name, m in self.metrics().items():
+            lines.append(f"  {name:<12} {m['items']:>4} item(s)  busy {m['busy']:>7.2f}s  util {m['utilization']:>6.1%}  "
+                         f"queue avg {m['queue_avg']:.2f} max {m['queue_max']}")
+        return "\n".join(lines)
@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'parent')
+
+    def __init__(self, name, attrs, parent=None):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+
+    def set(self, **attrs):
+        """Add attributes (e.g. an item count known only at the end) to the running span."""
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    def __init__(self, max_events=100000, enabled=True):
+        """
+        Collects timing spans for the Chrome trace viewer and Prometheus-style metrics.
+
+        Spans nest per thread (document -> page -> stage -> model call); every finished span
+        is kept as a trace event and added to the per-name totals: count, seconds, max seconds
+        and `items` (the size of what the span worked on, e.g. pages in a batch). Gauges hold
+        point-in-time values such as stage utilization or cache hit rates.
+
+        Args:
+            max_events (int): Trace events kept for export; the oldest are dropped first.
+                The per-name totals are kept for every span regardless.
+            enabled (bool): With False, spans cost one attribute check and record nothing.
+        """
+        self.enabled = enabled
+        self._events = deque(maxlen=max_events)
+        self._stats = {}
+        self._gauges = {}
+        self._thread_names = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Time the enclosed block as span `name`.
+
+        Usage:
+            with TRACER.span("layout.batch", items=len(batch)) as span:
+                ...
+                span.set(boxes=n)
+        """
+        if not self.enabled:
+            yield Span(name, attrs)
+            return
+        stack = self._stack()
+        span = Span(name, attrs, stack[-1].name if stack else None)
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.attrs['error'] = True
+            raise
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            self._finish(span, start, end - start)
+
+    def record(self, name, seconds, **attrs):
+        """Add a span timed elsewhere (e.g. PaddleOCR's time_dict) that ended just now."""
+        if not self.enabled:
+            return
+        stack = self._stack()
+        span = Span(name, attrs, stack[-1].name if stack else None)
+        self._finish(span, time.perf_counter() - seconds, seconds)
+
+    def _finish(self, span, start, seconds):
+        thread = threading.current_thread()
+        event = {
+            'name': span.name,
+            'cat': span.name.split('.')[0],
+            'ph': 'X',
+            'ts': round((start - self._origin) * 1e6, 1),
+            'dur': round(seconds * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': dict(span.attrs, parent=span.parent) if span.parent else dict(span.attrs),
+        }
+        items = span.attrs.get('items', 0)
+        with self._lock:
+            self._events.append(event)
+            self._thread_names.setdefault(thread.ident, thread.name)
+            stats = self._stats.get(span.name)
+            if stats is None:
+                stats = self._stats[span.name] = {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'items': 0, 'errors': 0}
+            stats['count'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['items'] += items if isinstance(items, (int, float)) else 0
+            stats['errors'] += 1 if span.attrs.get('error') else 0
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def record_stage_metrics(self, metrics, pipeline):
+        """Publish StagePipeline.metrics() as gauges labelled with the pipeline and stage names."""
+        for stage, values in metrics.items():
+            for key in ('utilization', 'busy', 'queue_avg', 'queue_max'):
+                self.set_gauge(f"stage_{key}", values[key], pipeline=pipeline, stage=stage)
+
+    def stats(self):
+        """Per span name: count, seconds, max_seconds, items and errors."""
+        with self._lock:
+            return {name: dict(values) for name, values in self._stats.items()}
+
+    def gauges(self):
+        with self._lock:
+            return {(name, labels): value for (name, labels), value in self._gauges.items()}
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+            self._stats.clear()
+            self._gauges.clear()
+
+    def chrome_trace(self):
+        """Trace events in the Chrome trace format (chrome://tracing, Perfetto)."""
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        pid = os.getpid()
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in thread_names.items()]
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+    def prometheus_text(self, prefix="readease"):
+        """Span totals and gauges in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        for metric, key, kind, help_text in (
+            ('span_seconds_total', 'seconds', 'counter', 'Time spent in spans, by span name.'),
+            ('span_count_total', 'count', 'counter', 'Finished spans, by span name.'),
+            ('span_items_total', 'items', 'counter', 'Items (pages, boxes, crops) processed in spans, by span name.'),
+            ('span_errors_total', 'errors', 'counter', 'Spans left through an exception, by span name.'),
+            ('span_seconds_max', 'max_seconds', 'gauge', 'Longest single span, by span name.'),
+        ):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for name in sorted(stats):
+                lines.append(f"{prefix}_{metric}{{span=\"{_escape_label(name)}\"}} {_format_value(stats[name][key])}")
+
+        gauges = self.gauges()
+        previous = None
+        for (name, labels), value in sorted(gauges.items(), key=lambda kv: (kv[0][0], str(kv[0][1]))):
+            if name != previous:
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                previous = name
+            label_text = ",".join(f"{key}=\"{_escape_label(label)}\"" for key, label in labels)
+            label_text = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{prefix}_{name}{label_text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Human-readable per-span totals, slowest first."""
+        stats = self.stats()
+        if not stats:
+            return "no spans recorded"
+        lines = [f"{'span':<20} {'count':>6} {'total s':>9} {'avg ms':>9} {'max ms':>9} {'items':>7}"]
+        for name, s in sorted(stats.items(), key=lambda kv: -kv[1]['seconds']):
+            avg = s['seconds'] / s['count'] * 1000 if s['count'] else 0.0
+            lines.append(f"{name:<20} {s['count']:>6} {s['seconds']:>9.2f} {avg:>9.1f} {s['max_seconds'] * 1000:>9.1f} {s['items']:>7g}")
+        return "\n".join(lines)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+# Process-wide tracer used by the models, tasks and pipelines
+TRACER = Tracer()
+
+
+def span(name, **attrs):
+    """Shortcut for TRACER.span."""
+    return TRACER.span(name, **attrs)
+
+
+def serve_metrics(port=9464, host="127.0.0.1", tracer=None):
+    """
+    Serve the tracer over HTTP from a daemon thread: /metrics in the Prometheus text format,
+    /trace as Chrome trace JSON.
+
+    Returns:
+        ThreadingHTTPServer: call shutdown() on it to stop serving.
+    """
+    tracer = tracer or TRACER
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path == '/metrics':
+                body, content_type = tracer.prometheus_text().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+            elif path == '/trace':
+                body, content_type = json.dumps(tracer.chrome_trace()).encode('utf-8'), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -1,6 +1,7 @@
 import numpy as np
 import cv2
 from PIL import Image
+from pdf_extract_kit.utils.page_image import PageImage
 
 def colormap(N=256, normalized=False):
     """
@@ -47,7 +48,7 @@ def visualize_bbox(image_path, bboxes, classes, scores, id_to_names, alpha=0.3):
     Visualize layout detection results on an image.
 
     Args:
-        image_path (str): Path to the input image.
+        image_path (str): Path to the input image, a PIL.Image.Image, a PageImage or a BGR numpy array.
         bboxes (list): List of bounding boxes, each represented as [x_min, y_min, x_max, y_max].
         classes (list): List of class IDs corresponding to the bounding boxes.
         id_to_names (dict): Dictionary mapping class IDs to class names.
@@ -60,6 +61,10 @@ def visualize_bbox(image_path, bboxes, classes, scores, id_to_names, alpha=0.3):
     if isinstance(image_path, Image.Image):
         image = np.array(image_path)
         image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)  # Convert RGB to BGR for OpenCV
+    elif isinstance(image_path, PageImage):
+        image = image_path.to_bgr().copy()
+    elif isinstance(image_path, np.ndarray):
+        image = image_path.copy()  # Already BGR, copy so drawing leaves the page untouched
     else:
         image = cv2.imread(image_path)
 
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+
+# tmpfs on Linux: page images and intermediate JSON never touch the disk
+SHARED_MEMORY_DIR = "/dev/shm"
+
+
+def default_workspace_root():
+    """tmpfs if available and writable, otherwise the system temp directory."""
+    if os.path.isdir(SHARED_MEMORY_DIR) and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        return SHARED_MEMORY_DIR
+    return tempfile.gettempdir()
+
+
+class Workspace:
+    def __init__(self, root=None, prefix="readease-", keep=False):
+        """
+        Private working directory for one run or job.
+
+        Every run renders its pages and writes its intermediate files here instead of in the
+        shared sample_dataset/ folders, so parallel runs cannot see or overwrite each other's
+        pages and each run only processes its own. Use it as a context manager, or call
+        cleanup() explicitly when done.
+
+        Args:
+            root (str, optional): Parent directory; defaults to tmpfs (/dev/shm) when available.
+            prefix (str): Prefix of the workspace directory name.
+            keep (bool): Leave the files behind on cleanup, for debugging.
+
+        Layout:
+            <path>/pdfs      input documents
+            <path>/pages     rendered page images
+            <path>/outputs   per-page layout/text JSON and final outputs
+        """
+        root = root or default_workspace_root()
+        os.makedirs(root, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=root)
+        self.keep = keep
+        self.pdfs = self.subdir("pdfs")
+        self.pages = self.subdir("pages")
+        self.outputs = self.subdir("outputs")
+
+    @property
+    def id(self):
+        return os.path.basename(self.path)
+
+    def subdir(self, name):
+        path = os.path.join(self.path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def file(self, *parts):
+        """Path of a file inside the workspace; parent directories are created."""
+        path = os.path.join(self.path, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def add_pdf(self, data, name):
+        """Store a PDF (bytes or a path to copy) under pdfs/ and return its path."""
+        pdf_path = os.path.join(self.pdfs, os.path.basename(name))
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            with open(pdf_path, "wb") as f:
+                f.write(data)
+        else:
+            shutil.copyfile(data, pdf_path)
+        return pdf_path
+
+    def size(self):
+        """Bytes currently held by the workspace."""
+        total = 0
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                total += os.path.getsize(os.path.join(root, name))
+        return total
+
+    def cleanup(self):
+        if not self.keep:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import fitz
+
+from pdf_extract_kit.utils.config_loader import load_config, initialize_tasks_and_models
+from pdf_extract_kit.utils.data_preprocess import iter_pdf, load_pdf_text_spans
+from pdf_extract_kit.utils.jsonl import JsonlWriter
+from pdf_extract_kit.utils.model_pool import get_paddle_ocr, paddle_ocr_id
+from pdf_extract_kit.utils.result_cache import ResultCache, hash_file, hash_image, make_cache_key, model_file_id
+from pdf_extract_kit.utils.tracing import TRACER, serve_metrics
+import pdf_extract_kit.tasks
+from scripts.extract_text import fill_text_in_boxes, fill_text_batched, fill_text_from_layer
+from convert_to_structure import StructureBuilder
+
+DEFAULT_CONFIG = "configs/layout_detection_yolo.yaml"
+
+
+class ReadingPipeline:
+    def __init__(self, config_path=DEFAULT_CONFIG, dpi=200, lang="en", ocr_batch_size=16, cache_dir=None, cache_max_mb=1024, use_text_layer=True):
+        """
+        Load the layout and OCR models once and keep them warm for every PDF.
+
+        Args:
+            config_path (str): Layout detection config, same file scripts/layout_detection.py uses.
+            dpi (int): Rasterization resolution, matches the 200 DPI mutool step in app_simple.py.
+            lang (str): PaddleOCR language.
+            ocr_batch_size (int): Line crops per recognizer batch; 0 runs one det+rec OCR call per layout box.
+            cache_dir (str, optional): Directory for persistent result caches. Unchanged documents are then
+                served whole, and unchanged pages skip layout detection and OCR.
+            cache_max_mb (int): Size bound of each cache in MB, least recently used entries are evicted.
+            use_text_layer (bool): Take text from the PDF's embedded text layer where it covers a layout
+                box, and OCR only the boxes it does not cover.
+        """
+        start = time.time()
+        config = load_config(config_path)
+        layout_config = config['tasks']['layout_detection']['model_config']
+        if cache_dir:
+            layout_config.setdefault('cache_dir', os.path.join(cache_dir, 'layout'))
+            layout_config.setdefault('cache_max_mb', cache_max_mb)
+        task_instances = initialize_tasks_and_models(config)
+        self.layout_model = task_instances['layout_detection'].model
+        self.result_path = config.get('outputs', 'outputs/layout_detection')
+        if ocr_batch_size > 0:
+            self.ocr = get_paddle_ocr(lang=lang, use_angle_cls=True, rec_batch_num=ocr_batch_size, cls_batch_num=ocr_batch_size)
+        else:
+            self.ocr = get_paddle_ocr(lang=lang, use_angle_cls=True)
+        self.ocr_batch_size = ocr_batch_size
+        self.dpi = dpi
+        self.use_text_layer = use_text_layer
+
+        self.page_cache = self.document_cache = None
+        if cache_dir:
+            max_bytes = cache_max_mb * 2**20
+            self.page_cache = ResultCache(os.path.join(cache_dir, 'ocr'), max_bytes=max_bytes)
+            self.document_cache = ResultCache(os.path.join(cache_dir, 'documents'), max_bytes=max_bytes)
+            layout_settings = {k: v for k, v in layout_config.items() if k not in ('cache_dir', 'cache_max_mb', 'visualize', 'device', 'batch_size')}
+            self.cache_id = {'layout': model_file_id(layout_config.get('model_path')), 'layout_config': layout_settings,
+                             'ocr': paddle_ocr_id(self.ocr), 'lang': lang, 'ocr_batch_size': ocr_batch_size, 'dpi': dpi,
+                             'use_text_layer': use_text_layer}
+        self.load_time = time.time() - start
+
+    def rasterize(self, pdf_path):
+        """
+        Lazily render the pages of a PDF, prefetching the next page in the background.
+
+        Pages are PageImage objects wrapping the PyMuPDF pixmap buffer; the one contiguous BGR
+        conversion is cached on the page and shared by YOLO and PaddleOCR, with no PNG
+        encode/decode in between.
+        """
+        return iter_pdf(pdf_path, dpi=self.dpi, image_type="page")
+
+    def iter_page_groups(self, pdf_path):
+        """Yield lists of (page index, image), sized to one layout detection batch."""
+        batch_size = max(1, getattr(self.layout_model, 'batch_size', 1))
+        group = []
+        for idx, image in enumerate(self.rasterize(pdf_path)):
+            group.append((idx, image))
+            if len(group) == batch_size:
+                yield group
+                group = []
+        if group:
+            yield group
+
+    def detect_layout(self, images, image_ids=None):
+        """Return one list of layout boxes (name, class, confidence, box) per page."""
+        results = self.layout_model.predict(images, self.result_path, image_ids)
+        return [json.loads(result.tojson(normalize=False)) for result in results]
+
+    def text_spans(self, doc, page):
+        """Text-layer lines of a rendered page, scaled to its pixels; empty if the text layer is disabled."""
+        if doc is None:
+            return []
+        pdf_page = doc[page.page_no]
+        return load_pdf_text_spans(pdf_page, page.width / pdf_page.rect.width)
+
+    def extract_text(self, page, items, spans=None):
+        """
+        Fill `text` on every layout box of one page in place.
+
+        Boxes covered by the PDF text layer (`spans`, see load_pdf_text_spans) are read from it;
+        only the remaining boxes are OCR'd.
+
+        Returns:
+            int: Number of boxes that went through OCR.
+        """
+        if spans:
+            with TRACER.span("text_layer", items=len(items)):
+                fill_text_from_layer(items, spans)
+        pending = [item for item in items if item.get('text') is None]
+        if pending:
+            self.ocr_boxes(page, pending)
+        return len(pending)
+
+    def ocr_boxes(self, page, items):
+        """OCR the given layout boxes of one page, through the page-level cache if enabled."""
+        if self.page_cache is None:
+            return self.run_ocr(page, items)
+
+        # The layout boxes are part of the key: the same page with other boxes reads differently
+        boxes = [[item['box'][k] for k in ('x1', 'y1', 'x2', 'y2')] for item in items]
+        key = make_cache_key(hash_image(page), self.cache_id, boxes)
+        texts = self.page_cache.get(key)
+        TRACER.set_gauge("cache_hit_rate", self.page_cache.hit_rate, cache="ocr_page")
+        if texts is None:
+            self.run_ocr(page, items)
+            self.page_cache.put(key, [item.get('text', '') for item in items])
+        else:
+            for item, text in zip(items, texts):
+                item['text'] = text
+        return items
+
+    def run_ocr(self, page, items):
+        with TRACER.span("ocr.page", items=len(items)):
+            img = page.to_bgr()
+            if self.ocr_batch_size > 0:
+                fill_text_batched(self.ocr, [(img, items)], batch_size=self.ocr_batch_size)
+                return items
+            return fill_text_in_boxes(self.ocr, img, items)
+
+    def process_pdf(self, pdf_path, output_dir=None, progress=None, save_pages_dir=None, jsonl_dir=None):
+        """
+        Run rasterize -> layout -> OCR -> structure for one PDF in this process.
+
+        Args:
+            pdf_path (str): Path to the PDF file.
+            output_dir (str, optional): If set, also write `<pdf>_page-N.json` files like scripts/extract_text.py.
+            progress (callable, optional): Called with a short status message after each step.
+            save_pages_dir (str, optional): If set, also write each rendered page as `<pdf>_page-N.png`.
+            jsonl_dir (str, optional): If set, also write `<pdf>.jsonl` with one {"page", "blocks"} record per page.
+
+        Returns:
+            dict: Structured output ({"document_title", "headings"}), or None if no text was found.
+        """
+        with TRACER.span("document", file=os.path.basename(pdf_path)) as span:
+            return self._process_pdf(pdf_path, span, output_dir, progress, save_pages_dir, jsonl_dir)
+
+    def _process_pdf(self, pdf_path, span, output_dir, progress, save_pages_dir, jsonl_dir):
+        pdf_name = Path(pdf_path).stem
+        notify = progress or (lambda message: None)
+
+        # Saving page images needs the rendered pages, so only plain runs are served whole
+        document_key = None
+        if self.document_cache is not None and not save_pages_dir:
+            document_key = make_cache_key(hash_file(pdf_path), self.cache_id)
+            cached = self.document_cache.get(document_key)
+            TRACER.set_gauge("cache_hit_rate", self.document_cache.hit_rate, cache="documents")
+            span.set(cached=cached is not None)
+            if cached is not None:
+                notify(f"Served {pdf_name} from cache")
+                if output_dir:
+                    for page_name, items in cached['pages']:
+                        self.write_page_json(output_dir, page_name, items)
+                if jsonl_dir:
+                    self.write_pages_jsonl(jsonl_dir, pdf_name, cached['pages'])
+                return cached['structured']
+
+        pages = []
+        # Pages are added to the structure as they finish and only their text is kept
+        builder = StructureBuilder()
+        writer = JsonlWriter(os.path.join(jsonl_dir, f"{pdf_name}.jsonl")) if jsonl_dir else None
+        # The text layer is read from a separate handle; the rasterizer thread has its own
+        doc = fitz.open(pdf_path) if self.use_text_layer else None
+        try:
+            for group in self.iter_page_groups(pdf_path):
+                span.set(pages=group[-1][0] + 1)
+                layouts = self.detect_layout([image for _, image in group], [f"{pdf_name}_page-{idx + 1}" for idx, _ in group])
+                notify(f"Detected layout on page(s) {group[0][0] + 1}-{group[-1][0] + 1}")
+
+                for (idx, image), items in zip(group, layouts):
+                    page_name = f"{pdf_name}_page-{idx + 1}"
+                    if save_pages_dir:
+                        os.makedirs(save_pages_dir, exist_ok=True)
+                        cv2.imwrite(os.path.join(save_pages_dir, f"{page_name}.png"), image.to_bgr())
+                    with TRACER.span("page", page=idx + 1, items=len(items)) as page_span:
+                        ocr_count = self.extract_text(image, items, self.text_spans(doc, image))
+                        page_span.set(ocr=ocr_count)
+                    notify(f"Extracted text from {page_name} ({len(items) - ocr_count} box(es) from the text layer, {ocr_count} by OCR)")
+
+                    if output_dir:
+                        self.write_page_json(output_dir, page_name, items)
+                    if writer is not None:
+                        writer.write({"page": page_name, "blocks": items})
+                    if document_key:
+                        pages.append((page_name, [dict(item) for item in items]))
+                    with TRACER.span("structure", items=len(items)):
+                        builder.add(items)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        finally:
+            if doc is not None:
+                doc.close()
+        if writer is not None:
+            writer.close()
+
+        structured = builder.result() if builder.num_blocks else None
+        if document_key:
+            self.document_cache.put(document_key, {'pages': pages, 'structured': structured})
+        return structured
+
+    @staticmethod
+    def write_page_json(output_dir, page_name, items):
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, f"{page_name}.json"), 'w', encoding='utf-8') as f:
+            json.dump(items, f, indent=2, ensure_ascii=False)
+
+    @staticmethod
+    def write_pages_jsonl(jsonl_dir, pdf_name, pages):
+        with JsonlWriter(os.path.join(jsonl_dir, f"{pdf_name}.jsonl")) as writer:
+            for page_name, items in pages:
+                writer.write({"page": page_name, "blocks": items})
+
+    def cache_stats(self):
+        """Hit/miss counters of the document, OCR and layout caches, if caching is enabled."""
+        if self.document_cache is None:
+            return {}
+        stats = {'documents': self.document_cache.stats(), 'ocr': self.page_cache.stats()}
+        if getattr(self.layout_model, 'cache', None) is not None:
+            stats['layout'] = self.layout_model.cache.stats()
+        return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ReadEase pipeline in a single process.")
+    parser.add_argument('--pdf', required=True, nargs='+', help="Path(s) to input PDF(s); models are loaded once for all of them")
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help="Path to layout detection config YAML")
+    parser.add_argument('--output', default="schema", help="Directory for the structured JSON")
+    parser.add_argument('--page_json_dir', help="Also write per-page layout+text JSON files here")
+    parser.add_argument('--save_pages_dir', help="Also write rendered page PNGs here")
+    parser.add_argument('--jsonl_dir', help="Also write each PDF's per-page results as <pdf>.jsonl here")
+    parser.add_argument('--no_text_layer', action='store_true', help="OCR every box even if the PDF has a text layer")
+    parser.add_argument('--cache_dir', help="Reuse layout/OCR results of previously seen pages and documents from here")
+    parser.add_argument('--trace', help="Save a Chrome trace (chrome://tracing, ui.perfetto.dev) of all spans to this file")
+    parser.add_argument('--metrics_port', type=int, help="Serve Prometheus metrics at http://127.0.0.1:<port>/metrics while running")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        serve_metrics(port=args.metrics_port)
+    pipeline = ReadingPipeline(args.config, cache_dir=args.cache_dir, use_text_layer=not args.no_text_layer)
+    for pdf_path in args.pdf:
+        structured = pipeline.process_pdf(pdf_path, output_dir=args.page_json_dir, progress=print, save_pages_dir=args.save_pages_dir,
+                                          jsonl_dir=args.jsonl_dir)
+        if structured:
+            os.makedirs(args.output, exist_ok=True)
+            output_path = os.path.join(args.output, f"structured_output_{Path(pdf_path).stem}.json")
+            with open(output_path, "w") as f:
+                json.dump(structured, f, indent=2)
+            print(f"✅ Saved structured output at: {output_path}")
+    if args.cache_dir:
+        print(f"Cache stats: {pipeline.cache_stats()}")
+    print(TRACER.summary())
+    if args.trace:
+        print(f"Trace saved at: {TRACER.save_chrome_trace(args.trace)}")
@@ -2,14 +2,16 @@ import os
 import re
 import gc
 import sys
-import time
 import torch
 from PIL import Image, ImageDraw
 from torchvision import transforms
 from torch.utils.data import DataLoader
 
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
-from pdf_extract_kit.utils.data_preprocess import load_pdf
+from pdf_extract_kit.utils.data_preprocess import iter_pdf
+from pdf_extract_kit.utils.jsonl import JsonlWriter
+from pdf_extract_kit.utils.stage_pipeline import Stage, StagePipeline
+from pdf_extract_kit.utils.tracing import TRACER
 from pdf_extract_kit.tasks.ocr.task import OCRTask
 from pdf_extract_kit.dataset.dataset import MathDataset
 from pdf_extract_kit.registry.registry import TASK_REGISTRY
@@ -60,6 +62,8 @@ class PDF2MARKDOWN(OCRTask):
         self.mfd_model = mfd_model
         self.mfr_model = mfr_model
         self.ocr_model = ocr_model
+        # Per-stage utilization and queue depth of the last process_single_pdf call
+        self.stage_metrics = {}
         if self.mfr_model is not None:
             assert self.mfd_model is not None, "formula recognition based on formula detection, mfd_model can not be None."
             self.mfr_transform = transforms.Compose([self.mfr_model.vis_processor, ])
@@ -100,10 +104,11 @@ class PDF2MARKDOWN(OCRTask):
         """predict on one image, reture text detection and recognition results.
         
         Args:
-            image_list: List[PIL.Image.Image]
+            image_list: Iterable[PIL.Image.Image], pages are consumed one at a time, so a lazy page
+                iterator (see iter_pdf) keeps only the current page in memory.
             
         Returns:
-            List[dict]: list of PDF extract results
+            List[dict]: list of PDF extract results, one per page (see iter_single_pdf)
             
         Return example:
             [
@@ -135,129 +140,168 @@ class PDF2MARKDOWN(OCRTask):
                 ...
             ]
         """
-        pdf_extract_res = []
+        return list(self.iter_single_pdf(image_list))
+
+    def iter_single_pdf(self, image_list):
+        """Yield the extract result of each page in page order, in the format of process_single_pdf.
+
+        Without a formula recognition model every page is yielded as soon as its OCR is done, so
+        a caller writing pages out (see stream_to_jsonl) holds one page result at a time. With
+        one, the LaTeX of all formulas comes from a single batched MFR pass after the last page,
+        so the page results are yielded once that pass has filled them in.
+        """
         mf_image_list = []
         latex_filling_list = []
-        for idx, image in enumerate(image_list):
-            img_W, img_H = image.size
-            if self.layout_model is not None:
-                ori_layout_res = self.layout_model.predict([image], "")[0]
-                layout_res = self.convert_format(ori_layout_res, self.layout_model.id_to_names)
-            else:
-                layout_res = []
-            single_page_res = {'layout_dets': layout_res}
-            single_page_res['page_info'] = dict(
-                page_no = idx,
-                height = img_H,
-                width = img_W
-            )
-            if self.mfd_model is not None:
-                mfd_res = self.mfd_model.predict([image], "")[0]
-                for xyxy, conf, cla in zip(mfd_res.boxes.xyxy.cpu(), mfd_res.boxes.conf.cpu(), mfd_res.boxes.cls.cpu()):
-                    xmin, ymin, xmax, ymax = [int(p.item()) for p in xyxy]
-                    new_item = {
-                        'category_type': self.mfd_model.id_to_names[int(cla.item())],
-                        'poly': [xmin, ymin, xmax, ymin, xmax, ymax, xmin, ymax],
-                        'score': round(float(conf.item()), 2),
-                        'latex': '',
-                    }
-                    single_page_res['layout_dets'].append(new_item)
-                    if self.mfr_model is not None:
-                        latex_filling_list.append(new_item)
-                        bbox_img = image.crop((xmin, ymin, xmax, ymax))
-                        mf_image_list.append(bbox_img)
-                    
-                pdf_extract_res.append(single_page_res)
-                
-                del mfd_res
-                torch.cuda.empty_cache()
-                gc.collect()
-            
+
+        def layout_stage(page):
+            idx, image = page
+            return image, self.detect_layout(idx, image)
+
+        def mfd_stage(page):
+            # Single worker, so formula crops are queued in page order for the MFR pass below
+            image, single_page_res = page
+            self.detect_formulas(image, single_page_res, mf_image_list, latex_filling_list)
+            return page
+
+        def ocr_stage(page):
+            image, single_page_res = page
+            self.ocr_page(image, single_page_res['layout_dets'])
+            return single_page_res
+
+        # Rasterize, layout, formula detection and OCR run on their own threads, so while one page
+        # is in OCR the next pages are already in layout/MFD; formula crops are kept for one batched MFR pass
+        stages = StagePipeline([
+            Stage("layout", layout_stage),
+            Stage("mfd", mfd_stage),
+            Stage("ocr", ocr_stage),
+        ], source_name="rasterize")
+        if self.mfr_model is None:
+            # Nothing is filled in afterwards, so every page is handed on as soon as OCR is done
+            yield from stages.run(enumerate(image_list))
+            self.stage_metrics = stages.metrics()
+            TRACER.record_stage_metrics(self.stage_metrics, "pdf2markdown")
+            return
+
+        pdf_extract_res = list(stages.run(enumerate(image_list)))
+        self.stage_metrics = stages.metrics()
+        TRACER.record_stage_metrics(self.stage_metrics, "pdf2markdown")
+
         # Formula recognition, collect all formula images in whole pdf file, then batch infer them.
-        if self.mfr_model is not None:
-            a = time.time()
+        with TRACER.span("mfr", items=len(mf_image_list)):
             dataset = MathDataset(mf_image_list, transform=self.mfr_transform)
             dataloader = DataLoader(dataset, batch_size=self.mfr_model.batch_size, num_workers=0)
 
             mfr_res = []
             for imgs in dataloader:
-                imgs = imgs.to(self.mfr_model.device)
-                output = self.mfr_model.model.generate({'image': imgs})
+                with TRACER.span("mfr.batch", items=len(imgs)):
+                    imgs = imgs.to(self.mfr_model.device)
+                    output = self.mfr_model.model.generate({'image': imgs})
                 mfr_res.extend(output['pred_str'])
             for res, latex in zip(latex_filling_list, mfr_res):
                 res['latex'] = latex_rm_whitespace(latex)
-            b = time.time()
-            print("formula nums:", len(mf_image_list), "mfr time:", round(b-a, 2))
+        yield from pdf_extract_res
+    
+    def detect_layout(self, idx, image):
+        """Run layout detection on one page and start its result dict."""
+        img_W, img_H = image.size
+        if self.layout_model is not None:
+            ori_layout_res = self.layout_model.predict([image], "")[0]
+            layout_res = self.convert_format(ori_layout_res, self.layout_model.id_to_names)
+        else:
+            layout_res = []
+        single_page_res = {'layout_dets': layout_res}
+        single_page_res['page_info'] = dict(
+            page_no = idx,
+            height = img_H,
+            width = img_W
+        )
+        return single_page_res
+    
+    def detect_formulas(self, image, single_page_res, mf_image_list, latex_filling_list):
+        """Add formula detections to a page result and queue their crops for formula recognition."""
+        if self.mfd_model is None:
+            return
+        mfd_res = self.mfd_model.predict([image], "")[0]
+        for xyxy, conf, cla in zip(mfd_res.boxes.xyxy.cpu(), mfd_res.boxes.conf.cpu(), mfd_res.boxes.cls.cpu()):
+            xmin, ymin, xmax, ymax = [int(p.item()) for p in xyxy]
+            new_item = {
+                'category_type': self.mfd_model.id_to_names[int(cla.item())],
+                'poly': [xmin, ymin, xmax, ymin, xmax, ymax, xmin, ymax],
+                'score': round(float(conf.item()), 2),
+                'latex': '',
+            }
+            single_page_res['layout_dets'].append(new_item)
+            if self.mfr_model is not None:
+                latex_filling_list.append(new_item)
+                bbox_img = image.crop((xmin, ymin, xmax, ymax))
+                mf_image_list.append(bbox_img)
         
-        # ocr_res = self.ocr_model.predict(image)
-            
-        # ocr and table recognition
-        for idx, image in enumerate(image_list):
-            layout_res = pdf_extract_res[idx]['layout_dets']
-            pil_img = image.copy()
-
-            ocr_res_list = []
-            table_res_list = []
-            single_page_mfdetrec_res = []
-
-            for res in layout_res:
-                if res['category_type'] in self.mfd_model.id_to_names.values():
-                    single_page_mfdetrec_res.append({
-                        "bbox": [int(res['poly'][0]), int(res['poly'][1]),
-                                 int(res['poly'][4]), int(res['poly'][5])],
+        del mfd_res
+        torch.cuda.empty_cache()
+        gc.collect()
+    
+    def ocr_page(self, image, layout_res):
+        """OCR the text regions of one page and append the recognized spans to layout_res."""
+        pil_img = image.copy()
+
+        ocr_res_list = []
+        table_res_list = []
+        single_page_mfdetrec_res = []
+        formula_names = self.mfd_model.id_to_names.values() if self.mfd_model is not None else []
+
+        for res in layout_res:
+            if res['category_type'] in formula_names:
+                single_page_mfdetrec_res.append({
+                    "bbox": [int(res['poly'][0]), int(res['poly'][1]),
+                             int(res['poly'][4]), int(res['poly'][5])],
+                })
+            elif res['category_type'] in [self.layout_model.id_to_names[cid] for cid in [0, 1, 2, 4, 6, 7]]:
+                ocr_res_list.append(res)
+            elif res['category_type'] in [self.layout_model.id_to_names[5]]:
+                table_res_list.append(res)
+
+        # Process each area that requires OCR processing
+        for res in ocr_res_list:
+            new_image, useful_list = crop_img(res, pil_img, padding_x=25, padding_y=25)
+            paste_x, paste_y, xmin, ymin, xmax, ymax, new_width, new_height = useful_list
+            # Adjust the coordinates of the formula area
+            adjusted_mfdetrec_res = []
+            for mf_res in single_page_mfdetrec_res:
+                mf_xmin, mf_ymin, mf_xmax, mf_ymax = mf_res["bbox"]
+                # Adjust the coordinates of the formula area to the coordinates relative to the cropping area
+                x0 = mf_xmin - xmin + paste_x
+                y0 = mf_ymin - ymin + paste_y
+                x1 = mf_xmax - xmin + paste_x
+                y1 = mf_ymax - ymin + paste_y
+                # Filter formula blocks outside the graph
+                if any([x1 < 0, y1 < 0]) or any([x0 > new_width, y0 > new_height]):
+                    continue
+                else:
+                    adjusted_mfdetrec_res.append({
+                        "bbox": [x0, y0, x1, y1],
+                    })
+
+            # OCR recognition
+            ocr_res = self.ocr_model.ocr(new_image, mfd_res=adjusted_mfdetrec_res)[0]
+
+            # Integration results
+            if ocr_res:
+                for box_ocr_res in ocr_res:
+                    p1, p2, p3, p4 = box_ocr_res[0]
+                    text, score = box_ocr_res[1]
+
+                    # Convert the coordinates back to the original coordinate system
+                    p1 = [p1[0] - paste_x + xmin, p1[1] - paste_y + ymin]
+                    p2 = [p2[0] - paste_x + xmin, p2[1] - paste_y + ymin]
+                    p3 = [p3[0] - paste_x + xmin, p3[1] - paste_y + ymin]
+                    p4 = [p4[0] - paste_x + xmin, p4[1] - paste_y + ymin]
+
+                    layout_res.append({
+                        'category_type': 'text',
+                        'poly': p1 + p2 + p3 + p4,
+                        'score': round(score, 2),
+                        'text': text,
                     })
-                elif res['category_type'] in [self.layout_model.id_to_names[cid] for cid in [0, 1, 2, 4, 6, 7]]:
-                    ocr_res_list.append(res)
-                elif res['category_type'] in [self.layout_model.id_to_names[5]]:
-                    table_res_list.append(res)
-
-            ocr_start = time.time()
-            # Process each area that requires OCR processing
-            for res in ocr_res_list:
-                new_image, useful_list = crop_img(res, pil_img, padding_x=25, padding_y=25)
-                paste_x, paste_y, xmin, ymin, xmax, ymax, new_width, new_height = useful_list
-                # Adjust the coordinates of the formula area
-                adjusted_mfdetrec_res = []
-                for mf_res in single_page_mfdetrec_res:
-                    mf_xmin, mf_ymin, mf_xmax, mf_ymax = mf_res["bbox"]
-                    # Adjust the coordinates of the formula area to the coordinates relative to the cropping area
-                    x0 = mf_xmin - xmin + paste_x
-                    y0 = mf_ymin - ymin + paste_y
-                    x1 = mf_xmax - xmin + paste_x
-                    y1 = mf_ymax - ymin + paste_y
-                    # Filter formula blocks outside the graph
-                    if any([x1 < 0, y1 < 0]) or any([x0 > new_width, y0 > new_height]):
-                        continue
-                    else:
-                        adjusted_mfdetrec_res.append({
-                            "bbox": [x0, y0, x1, y1],
-                        })
-
-                # OCR recognition
-                ocr_res = self.ocr_model.ocr(new_image, mfd_res=adjusted_mfdetrec_res)[0]
-
-                # Integration results
-                if ocr_res:
-                    for box_ocr_res in ocr_res:
-                        p1, p2, p3, p4 = box_ocr_res[0]
-                        text, score = box_ocr_res[1]
-
-                        # Convert the coordinates back to the original coordinate system
-                        p1 = [p1[0] - paste_x + xmin, p1[1] - paste_y + ymin]
-                        p2 = [p2[0] - paste_x + xmin, p2[1] - paste_y + ymin]
-                        p3 = [p3[0] - paste_x + xmin, p3[1] - paste_y + ymin]
-                        p4 = [p4[0] - paste_x + xmin, p4[1] - paste_y + ymin]
-
-                        layout_res.append({
-                            'category_type': 'text',
-                            'poly': p1 + p2 + p3 + p4,
-                            'score': round(score, 2),
-                            'text': text,
-                        })
-
-            ocr_cost = round(time.time() - ocr_start, 2)
-            print(f"ocr cost: {ocr_cost}")
-        return pdf_extract_res
     
     def order_blocks(self, blocks):
         def calculate_oder(poly):
@@ -323,39 +367,90 @@ class PDF2MARKDOWN(OCRTask):
                 continue
         return md_text
         
-    def process(self, input_path, save_dir=None, visualize=False, merge2markdown=False):
+    def process(self, input_path, save_dir=None, visualize=False, merge2markdown=False, save_format="json", keep_results=True):
+        """Extract every PDF or image under input_path.
+
+        Args:
+            save_format: "json" writes <basename>.json with the whole document once it is done;
+                "jsonl" writes <basename>.jsonl with one page result per line as pages finish
+                (see iter_single_pdf), and the markdown page by page, so a long document never
+                has to be held in memory to be saved.
+            keep_results: return the page results of every document; with False (and save_dir)
+                the saved result paths are returned instead and pages are released once written.
+        """
         file_list = self.prepare_input_files(input_path)
         res_list = []
         for fpath in file_list:
             basename = os.path.basename(fpath)[:-4]
             if fpath.endswith(".pdf") or fpath.endswith(".PDF"):
-                images = load_pdf(fpath)
+                images = iter_pdf(fpath)
             else:
                 images = [Image.open(fpath)]
-            pdf_extract_res = self.process_single_pdf(images)
-            res_list.append(pdf_extract_res)
-            if save_dir:
-                os.makedirs(save_dir, exist_ok=True)
-                self.save_json_result(pdf_extract_res, os.path.join(save_dir, f"{basename}.json"))
-                
-                if merge2markdown:
-                    md_content = []
-                    for extract_res in pdf_extract_res:
-                        md_text = self.convert2md(extract_res)
-                        md_content.append(md_text)
-                    with open(os.path.join(save_dir, f"{basename}.md"), "w") as f:
-                        f.write("\n\n".join(md_content))
-                        
+            with TRACER.span("document", file=basename):
                 if visualize:
-                    for image, page_res in zip(images, pdf_extract_res):
-                        self.visualize_image(image, page_res['layout_dets'], cate2color=self.color_palette)
-                    if fpath.endswith(".pdf") or fpath.endswith(".PDF"):
-                        first_page = images.pop(0)
-                        first_page.save(os.path.join(save_dir, f'{basename}.pdf'), 'PDF', resolution=100, save_all=True, append_images=images)
-                    else:
-                        images[0].save(os.path.join(save_dir, f"{basename}.png"))
+                    # Visualization draws on every page after extraction, so keep them around
+                    images = list(images)
+                if save_dir:
+                    os.makedirs(save_dir, exist_ok=True)
+                if save_dir and save_format == "jsonl":
+                    save_path = os.path.join(save_dir, f"{basename}.jsonl")
+                    md_path = os.path.join(save_dir, f"{basename}.md") if merge2markdown else None
+                    pdf_extract_res = self.stream_to_jsonl(self.iter_single_pdf(images), save_path, md_path,
+                                                             keep_results=keep_results or visualize)
+                else:
+                    save_path = os.path.join(save_dir, f"{basename}.json") if save_dir else None
+                    pdf_extract_res = self.process_single_pdf(images)
+                    if save_dir:
+                        self.save_json_result(pdf_extract_res, save_path)
+
+                        if merge2markdown:
+                            md_content = []
+                            for extract_res in pdf_extract_res:
+                                md_text = self.convert2md(extract_res)
+                                md_content.append(md_text)
+                            with open(os.path.join(save_dir, f"{basename}.md"), "w") as f:
+                                f.write("\n\n".join(md_content))
+                res_list.append(pdf_extract_res if keep_results or not save_dir else save_path)
+
+            if save_dir and visualize:
+                for image, page_res in zip(images, pdf_extract_res):
+                    self.visualize_image(image, page_res['layout_dets'], cate2color=self.color_palette)
+                if fpath.endswith(".pdf") or fpath.endswith(".PDF"):
+                    first_page = images.pop(0)
+                    first_page.save(os.path.join(save_dir, f'{basename}.pdf'), 'PDF', resolution=100, save_all=True, append_images=images)
+                else:
+                    images[0].save(os.path.join(save_dir, f"{basename}.png"))
 
         return res_list
+
+    def stream_to_jsonl(self, page_results, save_path, md_path=None, keep_results=False):
+        """Write page results to a JSON Lines file (and markdown) as they are produced.
+
+        Args:
+            page_results: Iterable[dict] of page extract results, e.g. iter_single_pdf(...)
+            save_path: path of the .jsonl file, one page result per line
+            md_path: optional path of the markdown file, written page by page
+            keep_results: also collect and return the page results
+
+        Returns:
+            List[dict] of the page results if keep_results, else None
+        """
+        kept = [] if keep_results else None
+        md_file = open(md_path, "w") if md_path else None
+        try:
+            with JsonlWriter(save_path) as writer:
+                for single_page_res in page_results:
+                    writer.write(single_page_res)
+                    if md_file is not None:
+                        if writer.count > 1:
+                            md_file.write("\n\n")
+                        md_file.write(self.convert2md(single_page_res))
+                    if kept is not None:
+                        kept.append(single_page_res)
+        finally:
+            if md_file is not None:
+                md_file.close()
+        return kept
         
         
         
@@ -7,6 +7,7 @@ from pdf2markdown import PDF2MARKDOWN
 sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
 from pdf_extract_kit.utils.config_loader import load_config, initialize_tasks_and_models
 from pdf_extract_kit.registry.registry import TASK_REGISTRY
+from pdf_extract_kit.utils.tracing import TRACER, serve_metrics
 
 
 TASK_NAME = 'pdf2markdown'
@@ -25,6 +26,12 @@ def main(config_path):
     result_path = config.get('outputs', 'outputs/pdf_extract')
     visualize = config.get('visualize', False)
     merge2markdown = config.get('merge2markdown', False)
+    save_format = config.get('save_format', 'json')
+    trace_path = config.get('trace_path', None)
+    metrics_port = config.get('metrics_port', None)
+    if metrics_port:
+        serve_metrics(port=metrics_port)
+        print(f'Serving metrics at http://127.0.0.1:{metrics_port}/metrics')
 
     layout_model = task_instances['layout_detection'].model if 'layout_detection' in task_instances else None
     mfd_model = task_instances['formula_detection'].model if 'formula_detection' in task_instances else None
@@ -32,8 +39,13 @@ def main(config_path):
     ocr_model = task_instances['ocr'].model if 'ocr' in task_instances else None
     
     pdf_extract_task = TASK_REGISTRY.get(TASK_NAME)(layout_model, mfd_model, mfr_model, ocr_model)
-    extract_results = pdf_extract_task.process(input_data, save_dir=result_path, visualize=visualize, merge2markdown=merge2markdown)
+    extract_results = pdf_extract_task.process(input_data, save_dir=result_path, visualize=visualize, merge2markdown=merge2markdown,
+                                               save_format=save_format, keep_results=False)
 
+    print(TRACER.summary())
+    if trace_path:
+        TRACER.save_chrome_trace(trace_path)
+        print(f'Trace saved to {trace_path}, open it in chrome://tracing or ui.perfetto.dev')
     print(f'Task done, results can be found at {result_path}')
 
 if __name__ == "__main__":
@@ -0,0 +1,254 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import traceback
+import os.path as osp
+import multiprocessing
+from pathlib import Path
+from multiprocessing.connection import wait
+
+import fitz
+
+sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pipeline import ReadingPipeline, DEFAULT_CONFIG
+
+# Warm pipeline of this worker process, built once by init_worker
+_pipeline = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest a directory of PDFs with a pool of worker processes.")
+    parser.add_argument('--pdf_dir', default="sample_dataset/pdfs", help='Directory with the PDFs to ingest')
+    parser.add_argument('--output', default="sample_dataset/schema", help='Directory for the structured JSON')
+    parser.add_argument('--page_json_dir', help='Also write per-page layout+text JSON files here')
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help='Path to layout detection config YAML')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 4), help='Number of worker processes')
+    parser.add_argument('--threads_per_worker', type=int, default=0, help='Torch/OpenMP threads per worker; 0 splits the CPUs evenly')
+    parser.add_argument('--timeout', type=int, default=600, help='Seconds before a document is abandoned; 0 disables the limit')
+    parser.add_argument('--cache_dir', help='Reuse results of previously seen pages and documents from here')
+    parser.add_argument('--skip_existing', action='store_true', help='Skip PDFs whose structured output already exists')
+    parser.add_argument('--summary_json', help='Also write the run summary and per-document results here')
+    return parser.parse_args()
+
+
+def output_path_for(output_dir, pdf_path):
+    return osp.join(output_dir, f"structured_output_{Path(pdf_path).stem}.json")
+
+
+def init_worker(config_path, cache_dir, threads):
+    """Load the models once per worker process; every document it gets reuses them."""
+    global _pipeline
+    # Workers share the CPU, so each one gets its slice of threads instead of all cores
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    _pipeline = ReadingPipeline(config_path, cache_dir=cache_dir)
+    print(f"[worker {os.getpid()}] models loaded in {_pipeline.load_time:.1f}s", flush=True)
+
+
+def ingest_document(pdf_path, output_dir, page_json_dir=None):
+    """
+    Run the pipeline on one PDF inside a worker and write its structured output.
+
+    Returns:
+        dict: pdf, status ("ok", "empty", "timeout" or "error"), pages, seconds and error.
+    """
+    start = time.time()
+    record = {'pdf': pdf_path, 'status': 'ok', 'pages': 0, 'seconds': 0.0, 'error': None}
+    try:
+        with fitz.open(pdf_path) as doc:
+            record['pages'] = len(doc)
+        structured = _pipeline.process_pdf(pdf_path, output_dir=page_json_dir)
+        if structured:
+            with open(output_path_for(output_dir, pdf_path), "w") as f:
+                json.dump(structured, f, indent=2)
+        else:
+            record['status'] = 'empty'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    record['seconds'] = time.time() - start
+    return record
+
+
+def worker_loop(conn, config_path, cache_dir, threads):
+    """Worker process: load the models, then ingest the documents sent over `conn` until it receives None."""
+    try:
+        init_worker(config_path, cache_dir, threads)
+    except Exception as e:
+        conn.send(('failed', f"{type(e).__name__}: {e}"))
+        return
+    conn.send(('ready', None))
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        conn.send(('done', ingest_document(*task)))
+
+
+class Worker:
+    def __init__(self, context, config_path, cache_dir, threads):
+        """
+        One worker process with its own pipe, so a stuck or crashed worker can be killed and
+        replaced without disturbing the others (a shared queue could be left locked by it).
+        """
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_loop, args=(child_conn, config_path, cache_dir, threads), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.pdf = None
+        self.started = None
+
+    def assign(self, task):
+        self.pdf, self.started = task[0], time.time()
+        self.conn.send(task)
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join()
+        self.conn.close()
+
+
+def failed_record(pdf_path, status, error, seconds=0.0):
+    return {'pdf': pdf_path, 'status': status, 'pages': 0, 'seconds': seconds, 'error': error}
+
+
+def run_workers(pdf_paths, args, workers, threads, on_record):
+    """
+    Ingest pdf_paths with `workers` processes, calling on_record(record) as each document finishes.
+
+    The timeout is enforced here, in the parent: a document running longer than --timeout gets
+    its worker killed, model calls and StagePipeline threads included, and a fresh worker
+    (which loads the models again) takes its place. A worker that dies (e.g. out of memory)
+    fails only its own document and is replaced the same way. Workers that fail to load the
+    models are not replaced; once none is left, the remaining documents fail with that error.
+    """
+    # spawn: forking a parent that already touched torch/paddle thread pools can deadlock
+    context = multiprocessing.get_context("spawn")
+
+    def start_worker():
+        return Worker(context, args.config, args.cache_dir, threads)
+
+    pending = list(pdf_paths)
+    pool = [start_worker() for _ in range(workers)]
+    remaining = len(pdf_paths)
+    load_error = None
+
+    def finish(record):
+        nonlocal remaining
+        remaining -= 1
+        on_record(record)
+
+    while remaining:
+        for worker in pool:
+            if worker.ready and worker.pdf is None and pending:
+                worker.assign((pending.pop(0), args.output, args.page_json_dir))
+
+        for conn in wait([worker.conn for worker in pool], timeout=1.0):
+            worker = next(worker for worker in pool if worker.conn is conn)
+            try:
+                kind, payload = conn.recv()
+            except EOFError:
+                # Died; reaped below
+                worker.process.join(timeout=5)
+                continue
+            if kind == 'ready':
+                worker.ready = True
+            elif kind == 'done':
+                worker.pdf = None
+                finish(payload)
+            elif kind == 'failed':
+                load_error = payload
+                print(f"[worker {worker.process.pid}] failed to load the models: {payload}", flush=True)
+
+        now = time.time()
+        for i, worker in enumerate(pool):
+            if worker.pdf is not None and args.timeout > 0 and now - worker.started > args.timeout:
+                worker.kill()
+                finish(failed_record(worker.pdf, 'timeout', f"exceeded {args.timeout}s", now - worker.started))
+                pool[i] = start_worker() if pending else None
+            elif not worker.process.is_alive():
+                worker.process.join()
+                if worker.pdf is not None:
+                    finish(failed_record(worker.pdf, 'error', f"worker exited with code {worker.process.exitcode}",
+                                         now - worker.started))
+                worker.conn.close()
+                pool[i] = start_worker() if worker.ready and pending else None
+        pool = [worker for worker in pool if worker is not None]
+
+        if not pool and pending:
+            for pdf_path in pending:
+                finish(failed_record(pdf_path, 'error', f"no worker could load the models: {load_error or 'workers exited while loading'}"))
+            pending = []
+
+    for worker in pool:
+        worker.stop()
+
+
+def summarize(records, wall_time):
+    done = [r for r in records if r['status'] in ('ok', 'empty')]
+    pages = sum(r['pages'] for r in done)
+    return {
+        'documents': len(records),
+        'succeeded': len(done),
+        'failed': len(records) - len(done),
+        'pages': pages,
+        'wall_seconds': round(wall_time, 2),
+        'docs_per_sec': round(len(done) / wall_time, 3) if wall_time else 0.0,
+        'pages_per_sec': round(pages / wall_time, 3) if wall_time else 0.0,
+    }
+
+
+def main(args):
+    pdf_paths = sorted(glob.glob(osp.join(args.pdf_dir, "*.pdf")))
+    if args.skip_existing:
+        pdf_paths = [p for p in pdf_paths if not osp.exists(output_path_for(args.output, p))]
+    if not pdf_paths:
+        print(f"No PDFs to ingest in {args.pdf_dir}")
+        return
+
+    os.makedirs(args.output, exist_ok=True)
+    workers = max(1, min(args.workers, len(pdf_paths)))
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    print(f"Ingesting {len(pdf_paths)} PDF(s) with {workers} worker(s) x {threads} thread(s)")
+
+    records = []
+    start = time.time()
+
+    def on_record(record):
+        records.append(record)
+        mark = "✅" if record['status'] in ('ok', 'empty') else "❌"
+        print(f"{mark} [{len(records)}/{len(pdf_paths)}] {Path(record['pdf']).name}: {record['status']}, "
+              f"{record['pages']} page(s) in {record['seconds']:.1f}s", flush=True)
+
+    run_workers(pdf_paths, args, workers, threads, on_record)
+
+    summary = summarize(records, time.time() - start)
+    print(f"\nDocuments: {summary['succeeded']}/{summary['documents']} succeeded, {summary['pages']} page(s) "
+          f"in {summary['wall_seconds']:.1f}s ({summary['docs_per_sec']:.2f} docs/s, {summary['pages_per_sec']:.2f} pages/s)")
+    failures = [r for r in records if r['status'] not in ('ok', 'empty')]
+    for record in failures:
+        print(f"  ❌ {record['pdf']}: {record['status']} ({record['error']})")
+
+    if args.summary_json:
+        with open(args.summary_json, "w") as f:
+            json.dump({'summary': summary, 'documents': sorted(records, key=lambda r: r['pdf'])}, f, indent=2)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import random
+import argparse
+import os.path as osp
+
+sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pdf_extract_kit.utils.merge_blocks_and_spans import fill_spans_in_blocks, fill_spans_in_blocks_bruteforce
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Span-to-block assignment: grid index vs. every span against every block.")
+    parser.add_argument('--spans', type=int, nargs='+', default=[500, 2000, 5000], help='Spans per synthetic page')
+    parser.add_argument('--blocks', type=int, default=80, help='Blocks per synthetic page')
+    parser.add_argument('--ratio', type=float, default=0.6, help='Overlap ratio threshold')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per size')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def synthetic_page(num_blocks, num_spans, width=1654, height=2339, seed=0):
+    """Blocks tiled over a page in two columns, spans as short word/line boxes in and around them."""
+    rng = random.Random(seed)
+    blocks = []
+    rows = max(1, num_blocks // 2)
+    row_h = height / rows
+    for i in range(num_blocks):
+        col, row = i % 2, i // 2
+        x0 = 60 + col * (width / 2)
+        y0 = row * row_h + 4
+        x1, y1 = x0 + width / 2 - 120, y0 + row_h - 8
+        blocks.append({'category_type': rng.choice(['text', 'title', 'isolate_formula']),
+                       'poly': [x0, y0, x1, y0, x1, y1, x0, y1]})
+    spans = []
+    for _ in range(num_spans):
+        x0, y0 = rng.uniform(0, width - 40), rng.uniform(0, height - 20)
+        spans.append({'bbox': [x0, y0, x0 + rng.uniform(8, 300), y0 + rng.uniform(10, 24)],
+                      'type': 'text', 'content': 'w'})
+    return blocks, spans
+
+
+def timed(fn, blocks, spans, ratio, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        page_spans = list(spans)
+        start = time.perf_counter()
+        result = fn(blocks, page_spans, ratio)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(args):
+    print(f"{args.blocks} blocks/page, ratio > {args.ratio}, best of {args.repeat}")
+    print(f"{'spans':>8} {'bruteforce ms':>14} {'indexed ms':>11} {'speedup':>8} {'same':>5}")
+    for num_spans in args.spans:
+        blocks, spans = synthetic_page(args.blocks, num_spans, seed=args.seed)
+        brute_time, brute = timed(fill_spans_in_blocks_bruteforce, blocks, spans, args.ratio, args.repeat)
+        index_time, indexed = timed(fill_spans_in_blocks, blocks, spans, args.ratio, args.repeat)
+        same = brute == indexed
+        print(f"{num_spans:>8} {brute_time * 1000:>14.1f} {index_time * 1000:>11.1f} "
+              f"{brute_time / index_time:>7.1f}x {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,100 @@
+import os
+import sys
+import glob
+import time
+import random
+import argparse
+import os.path as osp
+
+import fitz
+import numpy as np
+
+sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pdf_extract_kit.utils.ocr_boxes import (
+    merge_det_boxes,
+    merge_det_boxes_loop,
+    update_det_boxes,
+    update_det_boxes_loop,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="merge_det_boxes/update_det_boxes: array implementation vs. per-box dict loops.")
+    parser.add_argument('--pdf_dir', default="sample_dataset/pdfs", help='Directory with PDFs whose pages provide the detections')
+    parser.add_argument('--dpi', type=int, default=200, help='Resolution the detections are scaled to')
+    parser.add_argument('--formula_every', type=int, default=25, help='Treat every Nth word as a detected formula')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per page')
+    return parser.parse_args()
+
+
+def page_detections(page, dpi, formula_every, seed=0):
+    """
+    Text detection boxes and formula boxes of one page, in the form ModifiedPaddleOCR sees them.
+
+    Word boxes of the PDF text layer stand in for DB detections: scaled to pixels, rounded to
+    integers, grown by a third of their height like DB's unclip (so neighbouring words overlap)
+    and given as float32 quads in top-to-bottom, left-to-right order. Every Nth word becomes a
+    formula box with integer coordinates, as pdf2markdown passes them.
+    """
+    rng = random.Random(seed)
+    scale = dpi / 72
+    boxes, formulas = [], []
+    for index, word in enumerate(page.get_text("words")):
+        x0, y0, x1, y1 = (round(v * scale) for v in word[:4])
+        pad = (y1 - y0) // 3 + rng.randint(0, 2)
+        x0, y0, x1, y1 = x0 - pad, y0 - pad // 2, x1 + pad, y1 + pad // 2
+        boxes.append(np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32))
+        if formula_every and index % formula_every == 0:
+            formulas.append({'bbox': [x0 + pad, y0, x1 - pad, y1]})
+    boxes.sort(key=lambda box: (box[0][1], box[0][0]))
+    return boxes, formulas
+
+
+def timed(fn, repeat, *args):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def same_boxes(a, b):
+    return len(a) == len(b) and all(x.dtype == y.dtype and np.array_equal(x, y) for x, y in zip(a, b))
+
+
+def main(args):
+    pdf_paths = sorted(glob.glob(osp.join(args.pdf_dir, "*.pdf")))
+    if not pdf_paths:
+        print(f"No PDFs found in {args.pdf_dir}")
+        return
+
+    totals = {'merge_loop': 0.0, 'merge': 0.0, 'update_loop': 0.0, 'update': 0.0}
+    pages, mismatches = 0, 0
+    print(f"{'page':<34} {'boxes':>6} {'merge ms loop/array':>20} {'update ms loop/array':>21}")
+    for pdf_path in pdf_paths:
+        with fitz.open(pdf_path) as doc:
+            for page in doc:
+                boxes, formulas = page_detections(page, args.dpi, args.formula_every)
+                if not boxes:
+                    continue
+                merge_loop_time, merged_loop = timed(merge_det_boxes_loop, args.repeat, [box.copy() for box in boxes])
+                merge_time, merged = timed(merge_det_boxes, args.repeat, boxes)
+                update_loop_time, updated_loop = timed(update_det_boxes_loop, args.repeat, merged_loop, formulas)
+                update_time, updated = timed(update_det_boxes, args.repeat, merged, formulas)
+                mismatches += not (same_boxes(merged_loop, merged) and same_boxes(updated_loop, updated))
+
+                name = f"{osp.basename(pdf_path)[:26]} p{page.number + 1}"
+                print(f"{name:<34} {len(boxes):>6} {merge_loop_time * 1000:>9.2f} / {merge_time * 1000:>8.2f} "
+                      f"{update_loop_time * 1000:>10.2f} / {update_time * 1000:>8.2f}")
+                for key, value in zip(totals, (merge_loop_time, merge_time, update_loop_time, update_time)):
+                    totals[key] += value
+                pages += 1
+
+    print(f"\n{pages} page(s), {mismatches} with different output")
+    print(f"merge_det_boxes:  {totals['merge_loop'] / totals['merge']:.1f}x faster")
+    print(f"update_det_boxes: {totals['update_loop'] / totals['update']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main(parse_args())
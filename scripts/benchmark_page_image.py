@@ -0,0 +1,80 @@
+import os
+import sys
+import glob
+import time
+import argparse
+import tracemalloc
+import os.path as osp
+
+import cv2
+import fitz
+import numpy as np
+from PIL import Image
+
+sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pdf_extract_kit.utils.page_image import PageImage
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Per-page memory/latency of PIL page conversion vs. PageImage views.")
+    parser.add_argument('--pdf_dir', default="sample_dataset/pdfs", help='Directory with PDFs to render')
+    parser.add_argument('--dpi', type=int, default=200, help='Rendering resolution')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per page')
+    return parser.parse_args()
+
+
+def legacy_path(pix):
+    """What load_pdf_page + check_img/np.array/ImageDataset did per page."""
+    image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    rgb = np.array(image)                          # callers' np.array(im)
+    bgr = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)  # check_img
+    pil = image.convert('RGB')                     # ImageDataset
+    return rgb, bgr, pil
+
+
+def page_image_path(pix):
+    page = PageImage.from_pixmap(pix)
+    rgb = page.rgb
+    bgr = page.bgr
+    tensor = page.to_tensor()
+    ocr_input = page.to_bgr()  # the one copy, for consumers that need contiguous BGR
+    return rgb, bgr, tensor, ocr_input
+
+
+def measure(fn, pix, repeat):
+    # Peak memory from one traced call, latency from untraced repetitions
+    tracemalloc.start()
+    result = fn(pix)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(pix)
+    return peak, (time.perf_counter() - start) / repeat
+
+
+def main(args):
+    pdf_paths = sorted(glob.glob(osp.join(args.pdf_dir, "*.pdf")))
+    if not pdf_paths:
+        print(f"No PDFs found in {args.pdf_dir}")
+        return
+
+    rows = []
+    for pdf_path in pdf_paths:
+        with fitz.open(pdf_path) as doc:
+            for page in doc:
+                pix = page.get_pixmap(matrix=fitz.Matrix(args.dpi / 72, args.dpi / 72), alpha=False)
+                rows.append((measure(legacy_path, pix, args.repeat), measure(page_image_path, pix, args.repeat)))
+
+    print(f"{len(rows)} page(s) at {args.dpi} DPI (numpy/Python allocations traced; PIL's own buffers are not)")
+    print(f"{'path':<12} {'peak MB/page':>14} {'ms/page':>10}")
+    for label, idx in (("PIL+copies", 0), ("PageImage", 1)):
+        peak = sum(row[idx][0] for row in rows) / len(rows) / 2**20
+        latency = sum(row[idx][1] for row in rows) / len(rows) * 1000
+        print(f"{label:<12} {peak:>14.2f} {latency:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
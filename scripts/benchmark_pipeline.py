@@ -0,0 +1,79 @@
+import os
+import sys
+import glob
+import time
+import argparse
+import subprocess
+import os.path as osp
+from pathlib import Path
+
+import fitz
+
+sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pipeline import ReadingPipeline, DEFAULT_CONFIG
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare pages/second of the subprocess pipeline and the in-process pipeline.")
+    parser.add_argument('--pdf_dir', default="sample_dataset/pdfs", help='Directory with PDFs to benchmark')
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help='Path to layout detection config YAML')
+    parser.add_argument('--skip_subprocess', action='store_true', help='Only time the in-process pipeline')
+    return parser.parse_args()
+
+
+def count_pages(pdf_path):
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+
+def run_subprocess_path(pdf_path, config_path):
+    """Replay the commands app_simple.process_pdf_files used to run for one PDF."""
+    pdf_name = Path(pdf_path).stem
+    commands = [
+        f'mutool convert -o "sample_dataset/pdfs/input_pages/{pdf_name}_page-%d.png" -F png -O resolution=200 "{pdf_path}"',
+        f'python scripts/layout_detection.py --config {config_path} --pdf "{pdf_path}" --output_dir sample_dataset/outputs',
+    ]
+    for command in commands:
+        subprocess.run(command, shell=True, capture_output=True, text=True, check=True)
+
+    for image_path in sorted(glob.glob(f"sample_dataset/pdfs/input_pages/{pdf_name}_page-*.png")):
+        base_name = Path(image_path).stem
+        command = f'python scripts/extract_text.py --image "{image_path}" --json "sample_dataset/outputs/{base_name}.json"'
+        subprocess.run(command, shell=True, capture_output=True, text=True)
+
+
+def report(label, pages, seconds):
+    rate = pages / seconds if seconds > 0 else float('inf')
+    print(f"{label:<12} pages: {pages:>4}  time: {seconds:>8.2f}s  pages/s: {rate:>6.2f}")
+    return rate
+
+
+def main(args):
+    pdf_paths = sorted(glob.glob(osp.join(args.pdf_dir, "*.pdf")))
+    if not pdf_paths:
+        print(f"No PDFs found in {args.pdf_dir}")
+        return
+    total_pages = sum(count_pages(pdf_path) for pdf_path in pdf_paths)
+
+    subprocess_rate = None
+    if not args.skip_subprocess:
+        os.makedirs("sample_dataset/pdfs/input_pages", exist_ok=True)
+        os.makedirs("sample_dataset/outputs", exist_ok=True)
+        start = time.time()
+        for pdf_path in pdf_paths:
+            run_subprocess_path(pdf_path, args.config)
+        subprocess_rate = report("subprocess", total_pages, time.time() - start)
+
+    start = time.time()
+    pipeline = ReadingPipeline(args.config)
+    for pdf_path in pdf_paths:
+        pipeline.process_pdf(pdf_path)
+    inprocess_rate = report("in-process", total_pages, time.time() - start)
+    print(f"{'':<12} (model load: {pipeline.load_time:.2f}s, included above)")
+
+    if subprocess_rate:
+        print(f"speedup: {inprocess_rate / subprocess_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import os.path as osp
+
+sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from text_to_speech import TextToSpeech
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="TTS throughput: time to first audio and total synthesis time, cold and cached.")
+    parser.add_argument('--json', help='Structured output to read; a synthetic document is used if omitted')
+    parser.add_argument('--engine', default="stub", help='TTS engine (gtts, google_translate, espeak, stub)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4], help='Thread pool sizes to compare')
+    parser.add_argument('--sections', type=int, default=20, help='Sections of the synthetic document')
+    return parser.parse_args()
+
+
+def synthetic_document(num_sections):
+    sentence = "Students read this sentence aloud to check the pacing of the voice."
+    return {
+        'document_title': "Benchmark Document",
+        'headings': [{'heading': f"Section {i + 1}", 'points': [f"{sentence} Point {j + 1} of section {i + 1}." for j in range(4)]}
+                     for i in range(num_sections)],
+    }
+
+
+def timed_run(tts, chunks):
+    start = time.perf_counter()
+    first, size = None, 0
+    for audio in tts.iter_speech(chunks):
+        first = first if first is not None else time.perf_counter() - start
+        size += len(audio)
+    return first or 0.0, time.perf_counter() - start, size
+
+
+def main(args):
+    if args.json:
+        with open(args.json) as f:
+            data = json.load(f)
+    else:
+        data = synthetic_document(args.sections)
+
+    print(f"engine {args.engine}")
+    print(f"{'workers':>8} {'chunks':>7} {'first ms':>9} {'cold s':>8} {'cached s':>9} {'chunks/s':>9} {'MB':>7}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            tts = TextToSpeech.from_config(engine=args.engine, workers=workers, cache_dir=cache_dir)
+            chunks = tts.document_chunks(data)
+            first, cold, size = timed_run(tts, chunks)
+            _, cached, _ = timed_run(tts, chunks)
+        print(f"{workers:>8} {len(chunks):>7} {first * 1000:>9.1f} {cold:>8.2f} {cached:>9.3f} "
+              f"{len(chunks) / cold:>9.1f} {size / 2**20:>7.1f}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
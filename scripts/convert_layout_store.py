@@ -0,0 +1,32 @@
+import os
+import sys
+import glob
+import argparse
+import os.path as osp
+
+sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pdf_extract_kit.utils.layout_store import json_to_store, store_to_json
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert per-page layout JSON files to a columnar layout store and back.")
+    parser.add_argument('--to_store', metavar='JSON_DIR', help='Directory of <pdf>_page-N.json files to convert')
+    parser.add_argument('--to_json', metavar='STORE_DIR', help='Layout store to write back as JSON files')
+    parser.add_argument('--output', required=True, help='Store directory (--to_store) or JSON directory (--to_json)')
+    return parser.parse_args()
+
+
+def main(args):
+    if args.to_store:
+        json_paths = sorted(glob.glob(osp.join(args.to_store, "*.json")))
+        store = json_to_store(json_paths, args.output)
+        print(f"Saved {store.num_pages} page(s), {len(store)} block(s) to {args.output}")
+    elif args.to_json:
+        paths = store_to_json(args.to_json, args.output)
+        print(f"Wrote {len(paths)} JSON file(s) to {args.output}")
+    else:
+        print("Pass --to_store or --to_json")
+
+
+if __name__ == "__main__":
+    main(parse_args())
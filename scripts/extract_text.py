@@ -1,27 +1,39 @@
 import os
+import sys
 import cv2
+import glob
 import json
 import argparse
-from paddleocr import PaddleOCR
+import os.path as osp
 
-def extract_text_from_coordinates(image_path, json_path):
-    # Initialize PaddleOCR with English
-    ocr = PaddleOCR(use_angle_cls=True, lang="en")
+from collections import defaultdict
 
-    # Load image
-    img = cv2.imread(image_path)
-    if img is None:
-        print(f"Error: Could not load image at {image_path}")
-        return
+import paddleocr  # puts PaddleOCR's bundled `tools` package on sys.path
+from tools.infer.utility import get_rotate_crop_image
 
-    h, w = img.shape[:2]
+sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pdf_extract_kit.utils.model_pool import MODEL_POOL, get_paddle_ocr
+from pdf_extract_kit.utils.merge_blocks_and_spans import fill_spans_in_blocks, fix_block_spans
+from pdf_extract_kit.utils.reading_order import sorted_boxes
+from pdf_extract_kit.utils.tracing import TRACER
 
-    # Load and parse JSON data
+# Layout boxes no taller than this (in pixels at 200 DPI) are treated as a single text line
+SINGLE_LINE_HEIGHT = 48
+# Share of a text-layer line's area that must fall inside a layout box to belong to it
+SPAN_OVERLAP_RATIO = 0.6
+
+def load_layout_json(json_path):
+    """Load layout boxes written by layout_detection.py (a list holding one JSON-encoded string)"""
     with open(json_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
     if isinstance(data, list) and len(data) == 1 and isinstance(data[0], str):
         data = json.loads(data[0])
+    return data
+
+def fill_text_in_boxes(ocr, img, data):
+    """Run OCR on every layout box of a BGR page image and store the text on the box in place"""
+    h, w = img.shape[:2]
 
     for i, item in enumerate(data):
         if isinstance(item, dict) and 'box' in item and item.get('text') is None:
@@ -55,6 +67,140 @@ def extract_text_from_coordinates(image_path, json_path):
             else:
                 print(f"Warning: No OCR result for box {i}")
                 item['text'] = ""
+    return data
+
+def clamp_box(item, w, h):
+    """Return the integer crop window of a layout box, or None if it is empty after clamping"""
+    box = item['box']
+    x1, y1 = max(0, int(box['x1'])), max(0, int(box['y1']))
+    x2, y2 = min(w, int(box['x2'])), min(h, int(box['y2']))
+    if x1 >= x2 or y1 >= y2:
+        return None
+    return x1, y1, x2, y2
+
+def is_single_line(crop, single_line_height=SINGLE_LINE_HEIGHT):
+    h, w = crop.shape[:2]
+    return h <= single_line_height and w >= h
+
+def recognize_batched(ocr, crops, batch_size=16, cls=True):
+    """
+    Run angle classification and recognition on text-line crops in fixed-size batches.
+
+    Crops are ordered by aspect ratio first so each batch pads to a similar width.
+
+    Returns:
+        list: (text, score) per crop, in the input order.
+    """
+    order = sorted(range(len(crops)), key=lambda k: crops[k].shape[1] / float(crops[k].shape[0]))
+    results = [None] * len(crops)
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        batch = [crops[k] for k in indices]
+        if cls and ocr.use_angle_cls:
+            with TRACER.span("ocr.cls", items=len(batch)):
+                batch, _, _ = ocr.text_classifier(batch)
+        with TRACER.span("ocr.rec", items=len(batch)):
+            rec_res, _ = ocr.text_recognizer(batch)
+        for k, res in zip(indices, rec_res):
+            results[k] = res
+    return results
+
+def fill_text_batched(ocr, pages, batch_size=16, single_line_height=SINGLE_LINE_HEIGHT):
+    """
+    Batched alternative to fill_text_in_boxes for one or more pages.
+
+    Single-line layout boxes go straight to recognition; other boxes only run text detection
+    to split them into lines. All line crops from `pages` are then recognized together.
+
+    Args:
+        ocr: PaddleOCR instance, ideally built with rec_batch_num >= batch_size.
+        pages (list): (BGR image, layout boxes) pairs; pass one page or a whole document.
+        batch_size (int): Number of line crops per recognizer forward pass.
+        single_line_height (int): Maximum box height treated as one text line.
+    """
+    crops = []
+    owners = []
+    for page_idx, (img, data) in enumerate(pages):
+        h, w = img.shape[:2]
+        for i, item in enumerate(data):
+            if not (isinstance(item, dict) and 'box' in item and item.get('text') is None):
+                continue
+            window = clamp_box(item, w, h)
+            if window is None:
+                print(f"Skipping invalid box {i}: {item['box']}")
+                continue
+            x1, y1, x2, y2 = window
+            cropped = img[y1:y2, x1:x2]
+
+            if is_single_line(cropped, single_line_height):
+                line_crops = [cropped]
+            else:
+                with TRACER.span("ocr.det") as span:
+                    dt_boxes, _ = ocr.text_detector(cropped)
+                    span.set(items=0 if dt_boxes is None else len(dt_boxes))
+                if dt_boxes is None or len(dt_boxes) == 0:
+                    line_crops = []
+                else:
+                    line_crops = [get_rotate_crop_image(cropped, box.copy()) for box in sorted_boxes(dt_boxes)]
+
+            item['text'] = ""
+            for line_crop in line_crops:
+                crops.append(line_crop)
+                owners.append(item)
+
+    rec_res = recognize_batched(ocr, crops, batch_size=batch_size) if crops else []
+
+    lines = defaultdict(list)
+    for item, (text, score) in zip(owners, rec_res):
+        text = text.strip()
+        if score >= ocr.drop_score and text:
+            lines[id(item)].append(text)
+    for item in owners:
+        item['text'] = " ".join(lines[id(item)])
+    return pages
+
+def fill_text_from_layer(data, spans, overlap_ratio=SPAN_OVERLAP_RATIO):
+    """
+    Fill layout boxes from a PDF's embedded text layer instead of OCR.
+
+    Spans (see load_pdf_text_spans) are assigned to boxes with fill_spans_in_blocks and put in
+    reading order with fix_block_spans. Boxes no span falls into keep `text` unset, so that
+    fill_text_in_boxes / fill_text_batched OCR exactly those afterwards.
+
+    Returns:
+        int: Number of boxes filled from the text layer.
+    """
+    items = [item for item in data if isinstance(item, dict) and 'box' in item and item.get('text') is None]
+    if not items or not spans:
+        return 0
+    blocks = []
+    for item in items:
+        box = item['box']
+        x1, y1, x2, y2 = box['x1'], box['y1'], box['x2'], box['y2']
+        blocks.append({'category_type': item.get('name', 'plain text'), 'poly': [x1, y1, x2, y1, x2, y2, x1, y2], 'item': item})
+
+    block_with_spans, _ = fill_spans_in_blocks(blocks, list(spans), overlap_ratio)
+    filled = 0
+    for block in fix_block_spans([block for block in block_with_spans if block['spans']]):
+        text = " ".join(span['content'] for line in block['lines'] for span in line['spans'])
+        block['saved_info']['item']['text'] = text
+        filled += 1
+    return filled
+
+def extract_text_from_coordinates(image_path, json_path, ocr=None):
+    # Reuse the process-wide PaddleOCR (English) instead of reloading det/cls/rec per page
+    if ocr is None:
+        ocr = get_paddle_ocr(lang="en", use_angle_cls=True)
+
+    # Load image
+    img = cv2.imread(image_path)
+    if img is None:
+        print(f"Error: Could not load image at {image_path}")
+        return
+
+    # Load and parse JSON data
+    data = load_layout_json(json_path)
+    fill_text_in_boxes(ocr, img, data)
 
     # Save the updated JSON
     with open(json_path, 'w', encoding='utf-8') as f:
@@ -62,10 +208,68 @@ def extract_text_from_coordinates(image_path, json_path):
 
     print(f"OCR completed and saved to {json_path}")
 
+def extract_text_batched(page_paths, batch_size=16, single_line_height=SINGLE_LINE_HEIGHT):
+    """Batched OCR over several (image_path, json_path) pairs, recognizing all their lines together"""
+    ocr = get_paddle_ocr(lang="en", use_angle_cls=True, rec_batch_num=batch_size, cls_batch_num=batch_size)
+    pages = []
+    for image_path, json_path in page_paths:
+        img = cv2.imread(image_path)
+        if img is None:
+            print(f"Error: Could not load image at {image_path}")
+            continue
+        pages.append((img, load_layout_json(json_path), json_path))
+
+    fill_text_batched(ocr, [(img, data) for img, data, _ in pages], batch_size, single_line_height)
+
+    for _, data, json_path in pages:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        print(f"OCR completed and saved to {json_path}")
+
+def extract_text_from_directory(image_dir, json_dir, batch_size=0, scope="page"):
+    """
+    Fill text for every page image in image_dir whose layout JSON exists in json_dir.
+
+    With batch_size > 0 the batched recognizer is used, one batch group per page or per
+    document (pages sharing the `<pdf>_page-` prefix) depending on scope.
+    """
+    documents = defaultdict(list)
+    for image_path in sorted(glob.glob(osp.join(image_dir, "*.png"))):
+        base_name = osp.splitext(osp.basename(image_path))[0]
+        json_path = osp.join(json_dir, f"{base_name}.json")
+        if not osp.exists(json_path):
+            print(f"Skipping {image_path}: no layout JSON at {json_path}")
+            continue
+        if batch_size <= 0:
+            print(f"Processing {base_name}...")
+            extract_text_from_coordinates(image_path, json_path)
+        elif scope == "document":
+            documents[base_name.split('_page-')[0]].append((image_path, json_path))
+        else:
+            documents[base_name].append((image_path, json_path))
+
+    for name, page_paths in documents.items():
+        print(f"Processing {name} ({len(page_paths)} page(s), batched)...")
+        extract_text_batched(page_paths, batch_size)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument('--image', required=True, help="Path to input image")
-    parser.add_argument('--json', required=True, help="Path to JSON with coordinates")
+    parser.add_argument('--image', help="Path to input image")
+    parser.add_argument('--json', help="Path to JSON with coordinates")
+    parser.add_argument('--image_dir', help="Directory of page images, processed in one process")
+    parser.add_argument('--json_dir', help="Directory of layout JSONs matching --image_dir")
+    parser.add_argument('--batch_size', type=int, default=0, help="Recognize line crops in batches of this size (0 = one OCR call per box)")
+    parser.add_argument('--batch_scope', choices=["page", "document"], default="page", help="Batch lines per page or across all pages of a PDF")
     args = parser.parse_args()
 
-    extract_text_from_coordinates(args.image, args.json)
+    if args.image_dir and args.json_dir:
+        extract_text_from_directory(args.image_dir, args.json_dir, args.batch_size, args.batch_scope)
+    elif args.image and args.json and args.batch_size > 0:
+        extract_text_batched([(args.image, args.json)], args.batch_size)
+    elif args.image and args.json:
+        extract_text_from_coordinates(args.image, args.json)
+    else:
+        parser.error("either --image and --json, or --image_dir and --json_dir are required")
+
+    stats = MODEL_POOL.stats()
+    print(f"OCR model pool: {stats['misses']} load(s) in {stats['load_time']}s, {stats['hits']} reuse(s)")
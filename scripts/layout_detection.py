@@ -7,13 +7,23 @@ from typing import List, Dict
 
 sys.path.append(osp.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 from pdf_extract_kit.utils.config_loader import load_config, initialize_tasks_and_models
+from pdf_extract_kit.utils.data_preprocess import save_pdf_pages
+from pdf_extract_kit.utils.workspace import Workspace
+from pdf_extract_kit.utils.manifest import Manifest, config_hash
+from pdf_extract_kit.utils.result_cache import hash_file, model_file_id
 import pdf_extract_kit.tasks
 
 TASK_NAME = 'layout_detection'
+# Written next to the JSON outputs by --incremental
+MANIFEST_NAME = ".layout_manifest.json"
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Run layout detection with config.")
     parser.add_argument('--config', required=True, help='Path to config YAML')
+    parser.add_argument('--pdf', help='PDF file, or directory of PDFs, to render and process (default: the first PDF in sample_dataset/pdfs)')
+    parser.add_argument('--input_dir', help='Process the page images in this directory instead of rendering a PDF')
+    parser.add_argument('--output_dir', help='Where to write the layout JSON (default: outputs from the config)')
+    parser.add_argument('--incremental', action='store_true', help='Skip PDFs/pages whose input, model and config are unchanged since the last run')
     return parser.parse_args()
 
 def results_to_dict(results) -> List[Dict]:
@@ -34,6 +44,7 @@ def save_as_json(data: List[Dict], output_dir: str, base_name: str = "layout"):
     with open(output_path, 'w') as f:
         json.dump(data, f, indent=2)
     print(f"Saved JSON: {output_path}")
+    return output_path
 
 def find_single_pdf(pdf_dir):
     for file in os.listdir(pdf_dir):
@@ -42,35 +53,81 @@ def find_single_pdf(pdf_dir):
     raise FileNotFoundError("No PDF found in the specified folder.")
 
 def convert_pdf_to_images(pdf_path, output_image_dir):
-    os.makedirs(output_image_dir, exist_ok=True)
-    command = f"mutool convert -o {output_image_dir}/page-%d.png -F png -O resolution=300 {pdf_path}"
-    print(f"Running: {command}")
-    os.system(command)
+    # Render with PyMuPDF in-process instead of shelling out to mutool
+    print(f"Rendering {pdf_path} to {output_image_dir}")
+    name = osp.splitext(osp.basename(pdf_path))[0]
+    return save_pdf_pages(pdf_path, output_image_dir, dpi=300, name_format=name + "_page-{}.png")
 
-def main(config_path):
-    config = load_config(config_path)
-    task_instances = initialize_tasks_and_models(config)
-    model = task_instances[TASK_NAME]
+def process_image_dir(model, image_folder, output_dir, manifest=None, versions=None):
+    """
+    Run layout detection on every page image in a directory.
 
-    # === CHANGE: Locate PDF and convert to PNG ===
-    pdf_folder = "sample_dataset/pdfs"
-    image_folder = "sample_dataset/pdfs/input_pages"
-    pdf_path = find_single_pdf(pdf_folder)
-    
-    convert_pdf_to_images(pdf_path, image_folder)
+    With a manifest, pages whose image, model version and config match a previous run are
+    skipped, and every finished page is recorded right away so a crashed run resumes there.
 
-    output_dir = config.get('outputs', 'outputs/layout_detection')
-
-    for file_name in os.listdir(image_folder):
+    Returns:
+        list: Paths of the JSON outputs of all pages, including skipped ones.
+    """
+    outputs = []
+    for file_name in sorted(os.listdir(image_folder)):
         file_path = osp.join(image_folder, file_name)
         if file_path.lower().endswith(('.png', '.jpg', '.jpeg')):
+            base_name = osp.splitext(file_name)[0]
+            key = f"page:{base_name}"
+            if manifest is not None:
+                fingerprint = Manifest.fingerprint(hash_file(file_path), *versions)
+                if manifest.is_current(key, fingerprint):
+                    print(f"Up to date, skipping: {file_path}")
+                    outputs.append(osp.join(output_dir, f"{base_name}.json"))
+                    continue
             print(f"Processing file: {file_path}")
             results = process_image_input(model, file_path, output_dir)
             if results:
-                save_as_json(results, output_dir, base_name=osp.splitext(file_name)[0])
+                output_path = save_as_json(results, output_dir, base_name=base_name)
+                outputs.append(output_path)
+                if manifest is not None:
+                    manifest.record(key, fingerprint, [output_path])
             else:
                 print(f"No detection results obtained for {file_name}.")
+    return outputs
+
+def main(config_path, pdf=None, input_dir=None, output_dir=None, incremental=False):
+    config = load_config(config_path)
+    task_instances = initialize_tasks_and_models(config)
+    model = task_instances[TASK_NAME]
+    output_dir = output_dir or config.get('outputs', 'outputs/layout_detection')
+
+    manifest = versions = None
+    if incremental:
+        model_config = config['tasks'][TASK_NAME].get('model_config', {})
+        manifest = Manifest(osp.join(output_dir, MANIFEST_NAME))
+        versions = (model_file_id(model_config.get('model_path')), config_hash(model_config))
+
+    if input_dir:
+        process_image_dir(model, input_dir, output_dir, manifest, versions)
+        return
+
+    if pdf and osp.isdir(pdf):
+        pdf_paths = sorted(osp.join(pdf, f) for f in os.listdir(pdf) if f.lower().endswith('.pdf'))
+    else:
+        pdf_paths = [pdf or find_single_pdf("sample_dataset/pdfs")]
+
+    # Each PDF is rendered into its own throwaway workspace, so a run only processes its own
+    # pages and parallel runs never pick up each other's images
+    for pdf_path in pdf_paths:
+        key = f"pdf:{osp.basename(pdf_path)}"
+        if manifest is not None:
+            # A finished, unchanged PDF is skipped before it is even rendered
+            fingerprint = Manifest.fingerprint(hash_file(pdf_path), *versions)
+            if manifest.is_current(key, fingerprint):
+                print(f"Up to date, skipping: {pdf_path}")
+                continue
+        with Workspace(prefix="layout-") as workspace:
+            convert_pdf_to_images(pdf_path, workspace.pages)
+            outputs = process_image_dir(model, workspace.pages, output_dir, manifest, versions)
+        if manifest is not None:
+            manifest.record(key, fingerprint, outputs)
 
 if __name__ == "__main__":
     args = parse_args()
-    main(args.config)
+    main(args.config, pdf=args.pdf, input_dir=args.input_dir, output_dir=args.output_dir, incremental=args.incremental)
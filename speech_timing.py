@@ -0,0 +1,132 @@
+import re
+import io
+import wave
+
+# kbps by MPEG version (1, or 2/2.5) and layer (1-3), indexed by the header's bitrate bits
+_MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# Hz by the header's version bits (0: MPEG 2.5, 2: MPEG 2, 3: MPEG 1)
+_MP3_SAMPLE_RATES = {0: [11025, 12000, 8000], 2: [22050, 24000, 16000], 3: [44100, 48000, 32000]}
+
+# Extra weight (in characters) for the pause a speaker makes after punctuation
+SENTENCE_PAUSE = 4
+CLAUSE_PAUSE = 2
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*$')
+
+
+def _id3v2_size(data, pos):
+    """Total size of an ID3v2 tag starting at pos (header, syncsafe size, optional footer)."""
+    size = (data[pos + 6] << 21) | (data[pos + 7] << 14) | (data[pos + 8] << 7) | data[pos + 9]
+    return 10 + size + (10 if data[pos + 5] & 0x10 else 0)
+
+
+def mp3_duration(data):
+    """
+    Duration in seconds of MP3 bytes, from their frame headers (no decoding).
+
+    ID3v2 tags are skipped wherever they appear (concatenated files carry one per part) and
+    anything that is not a valid frame header is stepped over, so joined chunks are measured
+    correctly.
+    """
+    pos, seconds, end = 0, 0.0, len(data)
+    while pos + 4 <= end:
+        if data[pos:pos + 3] == b"ID3" and pos + 10 <= end:
+            pos += _id3v2_size(data, pos)
+            continue
+        if data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+            pos += 1
+            continue
+        header = int.from_bytes(data[pos:pos + 4], 'big')
+        version_bits = (header >> 19) & 3
+        layer = 4 - ((header >> 17) & 3)
+        bitrate_index = (header >> 12) & 15
+        rate_index = (header >> 10) & 3
+        padding = (header >> 9) & 1
+        if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1
+            continue
+        version = 1 if version_bits == 3 else 2
+        bitrate = _MP3_BITRATES[(version, layer)][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+        if layer == 1:
+            samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+        elif layer == 3 and version == 2:
+            samples, length = 576, 72 * bitrate // sample_rate + padding
+        else:
+            samples, length = 1152, 144 * bitrate // sample_rate + padding
+        seconds += samples / sample_rate
+        pos += length
+    return seconds
+
+
+def wav_duration(data):
+    with wave.open(io.BytesIO(data), 'rb') as w:
+        return len(w.readframes(w.getnframes())) / (w.getframerate() * w.getsampwidth() * w.getnchannels())
+
+
+def audio_duration(data, audio_format):
+    """Duration in seconds of MP3 or WAV bytes."""
+    if not data:
+        return 0.0
+    if audio_format == "mp3":
+        return mp3_duration(data)
+    if audio_format == "wav":
+        return wav_duration(data)
+    raise ValueError(f"Unknown audio format {audio_format}")
+
+
+def _word_weight(word):
+    weight = len(word) + 1
+    if SENTENCE_END.search(word):
+        weight += SENTENCE_PAUSE
+    elif word[-1] in ",;:":
+        weight += CLAUSE_PAUSE
+    return weight
+
+
+def estimate_word_timings(text, duration):
+    """
+    Word timings spread over `duration` seconds in proportion to word length, with extra room
+    after punctuation where speakers pause. Used for engines that report no timings.
+
+    Returns:
+        list: [word, start, end] per word, in seconds from the start of the audio.
+    """
+    words = text.split()
+    if not words:
+        return []
+    weights = [_word_weight(word) for word in words]
+    scale = duration / sum(weights)
+    timings, start = [], 0.0
+    for word, weight in zip(words, weights):
+        # The pause after a word belongs to the gap, not to the word
+        spoken = (len(word) + 1) * scale
+        timings.append([word, round(start, 3), round(start + spoken, 3)])
+        start += weight * scale
+    return timings
+
+
+def shift_timings(timings, offset):
+    """Timings moved `offset` seconds later."""
+    return [[word, round(start + offset, 3), round(end + offset, 3)] for word, start, end in timings]
+
+
+def sentence_timings(word_timings):
+    """Group word timings into sentences: [sentence, start, end]."""
+    sentences, words, start = [], [], None
+    for word, word_start, word_end in word_timings:
+        if start is None:
+            start = word_start
+        words.append(word)
+        if SENTENCE_END.search(word):
+            sentences.append([" ".join(words), start, word_end])
+            words, start = [], None
+    if words:
+        sentences.append([" ".join(words), start, word_timings[-1][2]])
+    return sentences
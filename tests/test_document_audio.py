@@ -0,0 +1,89 @@
+import pytest
+
+from document_audio import DocumentAudio, document_segments
+from text_to_speech import TextToSpeech, document_text, section_text
+from tts_backends import StubBackend, read_wav, wav_bytes
+
+DOCUMENT = {
+    'document_title': "Photosynthesis",
+    'headings': [
+        {'heading': "Light reactions", 'points': ["Chlorophyll absorbs light.", "Water is split and oxygen is released"]},
+        {'heading': "Calvin cycle", 'points': []},
+        {'heading': "Summary", 'points': ["Plants turn light into sugar"]},
+    ],
+}
+
+
+@pytest.fixture
+def tts():
+    return TextToSpeech("stub", workers=2, cache_dir=None)
+
+
+def frames(audio):
+    return read_wav(audio)[1]
+
+
+def test_segments_join_to_document_text():
+    segments = document_segments(DOCUMENT)
+    assert "".join(segment['text'] for segment in segments) == document_text(DOCUMENT)
+    assert [segment['kind'] for segment in segments] == ['title', 'heading', 'point', 'point', 'heading', 'heading', 'point']
+
+
+def test_byte_offsets_cover_the_audio(tts):
+    document = tts.render_document(DOCUMENT)
+    audio = document.audio
+    # Back to back after the WAV header, up to the end of the file
+    assert document.segments[0]['offset'] == 44
+    for segment, following in zip(document.segments, document.segments[1:]):
+        assert segment['offset'] + segment['length'] == following['offset']
+    assert document.segments[-1]['offset'] + document.segments[-1]['length'] == len(audio)
+    for index, segment in enumerate(document.segments):
+        assert frames(document.segment_audio(index)) == audio[segment['offset']:segment['offset'] + segment['length']]
+    assert frames(audio) == b"".join(frames(document.segment_audio(k)) for k in range(len(document.segments)))
+
+
+def test_section_audio_equals_direct_synthesis(tts):
+    document = tts.render_document(DOCUMENT)
+    backend = StubBackend()
+    assert document.num_sections == 3
+    for index, section in enumerate(DOCUMENT['headings']):
+        assert frames(document.section_audio(index)) == frames(backend.synthesize(section_text(section)))
+    with pytest.raises(IndexError):
+        document.section_audio(3)
+
+
+def test_save_and_load_round_trip(tts, tmp_path):
+    document = tts.render_document(DOCUMENT)
+    path = document.save(str(tmp_path / "audio" / "full_document.wav"))
+    assert (tmp_path / "audio" / "full_document.index.json").exists()
+    for in_memory in (False, True):
+        loaded = DocumentAudio.load(path, in_memory=in_memory)
+        assert loaded.format == "wav" and loaded.wav_params == document.wav_params
+        assert loaded.segments == document.segments
+        assert loaded.timing_track(0) == document.timing_track(0)
+        for index in range(document.num_sections):
+            assert loaded.section_audio(index) == document.section_audio(index)
+        assert loaded.audio == document.audio
+
+
+def test_on_segment_sees_every_segment_in_order(tts):
+    seen = []
+    document = tts.render_document(DOCUMENT, on_segment=lambda index, audio: seen.append((index, frames(audio))))
+    assert [index for index, _ in seen] == list(range(len(document.segments)))
+    assert [audio for _, audio in seen] == [frames(document.segment_audio(k)) for k in range(len(seen))]
+
+
+def test_build_rejects_mixed_wav_formats():
+    segments = document_segments({'document_title': "T", 'headings': [{'heading': "H", 'points': []}]})
+    audio = [wav_bytes(b"\x00\x00" * 100, 16000), wav_bytes(b"\x00\x00" * 100, 22050)]
+    with pytest.raises(ValueError):
+        DocumentAudio.build(segments, audio, "wav")
+
+
+def test_build_mp3_keeps_bytes_as_they_are():
+    segments = document_segments({'document_title': "T", 'headings': [{'heading': "H", 'points': ["p"]}]})
+    parts = [b"a" * 10, b"b" * 20, b"c" * 5]
+    document = DocumentAudio.build(segments, parts, "mp3")
+    assert document.audio == b"".join(parts)
+    assert [document.segment_audio(k) for k in range(3)] == parts
+    assert document.section_audio(0) == parts[1] + parts[2]
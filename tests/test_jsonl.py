@@ -0,0 +1,44 @@
+import pytest
+
+from pdf_extract_kit.utils.jsonl import JsonlWriter, iter_jsonl, iter_jsonl_blocks, write_jsonl
+
+
+def pages(count):
+    for page in range(count):
+        yield {'page': page, 'blocks': [{'text': f"Zeile {page}.{i} — ü"} for i in range(page)]}
+
+
+def test_records_round_trip(tmp_path):
+    path = tmp_path / "out" / "doc.jsonl"
+    assert write_jsonl(str(path), pages(4)) == 4
+    assert list(iter_jsonl(str(path))) == list(pages(4))
+    assert [(record['page'], block['text']) for record, block in iter_jsonl_blocks(str(path))] == [
+        (page, f"Zeile {page}.{i} — ü") for page in range(4) for i in range(page)]
+
+
+def test_file_appears_only_on_close(tmp_path):
+    path = tmp_path / "doc.jsonl"
+    writer = JsonlWriter(str(path))
+    writer.write({'page': 0})
+    assert not path.exists()
+    writer.close()
+    assert list(iter_jsonl(str(path))) == [{'page': 0}]
+    assert not (tmp_path / "doc.jsonl.tmp").exists()
+
+
+def test_abort_removes_partial_file_and_keeps_previous_result(tmp_path):
+    path = tmp_path / "doc.jsonl"
+    write_jsonl(str(path), [{'page': 'old'}])
+    with pytest.raises(RuntimeError):
+        with JsonlWriter(str(path)) as writer:
+            writer.write({'page': 'new'})
+            raise RuntimeError("page failed")
+    assert list(iter_jsonl(str(path))) == [{'page': 'old'}]
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_invalid_line_reports_its_position(tmp_path):
+    path = tmp_path / "doc.jsonl"
+    path.write_text('{"page": 0}\n\n{"page": \n', encoding='utf-8')
+    with pytest.raises(ValueError, match=r"doc\.jsonl:3"):
+        list(iter_jsonl(str(path)))
@@ -0,0 +1,80 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from pdf_extract_kit.utils.layout_store import LayoutStore, json_to_store, read_layout_json, store_to_json
+
+
+def block(name, class_id, box, confidence=0.9, **extra):
+    item = {'name': name, 'class': class_id, 'confidence': confidence,
+            'box': dict(zip(('x1', 'y1', 'x2', 'y2'), box))}
+    item.update(extra)
+    return item
+
+
+PAGES = [
+    ('doc_page-1', [
+        block('title', 0, (10.0, 20.0, 300.0, 60.0), text="Introduction"),
+        block('plain text', 1, (10.0, 80.0, 300.0, 400.0), text="Ünïcode — text\nwith lines"),
+        block('figure', 3, (10.0, 420.0, 200.0, 600.0)),
+    ]),
+    ('doc_page-2', []),
+    ('doc_page-3', [
+        block('plain text', 1, (5.5, 6.5, 7.5, 8.5), text=None, source_file="doc_page-3.json"),
+        block('text', 1, (1.0, 2.0, 3.0, 4.0), text=""),
+    ]),
+]
+
+
+def test_items_round_trip_through_save_and_load(tmp_path):
+    store = LayoutStore.from_pages(PAGES)
+    store.save(tmp_path / "store")
+    for mmap in (True, False):
+        loaded = LayoutStore.load(tmp_path / "store", mmap=mmap)
+        assert loaded.page_names == [name for name, _ in PAGES]
+        assert len(loaded) == 5
+        assert [items for _, items in loaded.iter_pages()] == [items for _, items in PAGES]
+    assert isinstance(LayoutStore.load(tmp_path / "store").boxes, np.memmap)
+
+
+def test_json_files_round_trip(tmp_path):
+    source = tmp_path / "json"
+    source.mkdir()
+    paths = []
+    for index, (name, items) in enumerate(PAGES):
+        path = source / f"{name}.json"
+        # The first page in the double-encoded form older extract_text.py runs wrote
+        data = [json.dumps(items, indent=2)] if index == 0 else items
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+        paths.append(str(path))
+
+    json_to_store(paths, tmp_path / "store")
+    written = store_to_json(tmp_path / "store", tmp_path / "out")
+    assert [os.path.basename(p) for p in written] == [os.path.basename(p) for p in paths]
+    for original, path in zip(paths, written):
+        assert read_layout_json(path) == read_layout_json(original)
+
+
+def test_load_rejects_other_versions(tmp_path):
+    LayoutStore.from_pages(PAGES).save(tmp_path / "store")
+    meta_path = tmp_path / "store" / "meta.json"
+    meta = json.loads(meta_path.read_text())
+    meta['version'] = 99
+    meta_path.write_text(json.dumps(meta))
+    with pytest.raises(ValueError):
+        LayoutStore.load(tmp_path / "store")
+
+
+def test_integer_boxes_round_trip_as_integers(tmp_path):
+    pages = [('doc_page-1', [
+        block('title', 0, (10, 20, 300, 60), text="Integers"),
+        block('plain text', 1, (10, 80.5, 300, 400.0), text="Mixed"),
+        block('figure', 3, (0, 0, 2**60 + 1, 5)),
+    ])]
+    LayoutStore.from_pages(pages).save(tmp_path / "store")
+    items = LayoutStore.load(tmp_path / "store").page_items(0)
+    # == alone would accept 10.0 for 10
+    assert json.dumps(items) == json.dumps(pages[0][1])
+    assert [type(v) for v in items[1]['box'].values()] == [int, float, int, float]
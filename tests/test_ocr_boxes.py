@@ -0,0 +1,59 @@
+import numpy as np
+
+from pdf_extract_kit.utils.ocr_boxes import (
+    merge_det_boxes,
+    merge_det_boxes_loop,
+    update_det_boxes,
+    update_det_boxes_loop,
+)
+
+
+def quad(x0, y0, x1, y1):
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+
+
+def random_boxes(rng, n):
+    x0 = rng.uniform(0, 900, n)
+    y0 = rng.integers(0, 20, n) * 25 + rng.uniform(0, 6, n)
+    return [quad(x, y, x + w, y + h) for x, y, w, h in zip(x0, y0, rng.uniform(5, 200, n), rng.uniform(15, 25, n))]
+
+
+def assert_same_boxes(expected, actual):
+    assert len(expected) == len(actual)
+    for a, b in zip(expected, actual):
+        assert a.dtype == b.dtype == np.float32
+        np.testing.assert_array_equal(a, b)
+
+
+def test_merge_det_boxes_matches_loop():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        boxes = random_boxes(rng, rng.integers(1, 60))
+        assert_same_boxes(merge_det_boxes_loop([box.copy() for box in boxes]), merge_det_boxes(boxes))
+
+
+def test_update_det_boxes_matches_loop():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        boxes = random_boxes(rng, rng.integers(1, 60))
+        formulas = [{'bbox': [float(box[0, 0]) + 3, float(box[0, 1]) + rng.uniform(-3, 3), float(box[1, 0]) - 3, float(box[2, 1])]}
+                    for box in boxes[:5]]
+        assert_same_boxes(update_det_boxes_loop(boxes, formulas), update_det_boxes(boxes, formulas))
+
+
+def test_merge_det_boxes_joins_overlapping_boxes_of_a_line():
+    boxes = [quad(0, 0, 50, 20), quad(40, 1, 90, 21), quad(200, 0, 250, 20), quad(0, 100, 50, 120)]
+    merged = merge_det_boxes(boxes)
+    assert [b[[0, 2]].ravel().tolist() for b in merged] == [
+        [0, 0, 90, 21], [200, 0, 250, 20], [0, 100, 50, 120]]
+
+
+def test_exactly_80_percent_overlap_is_not_a_line():
+    # 16 of 20 px overlap: the ratio does not exceed the threshold
+    merged = merge_det_boxes([quad(0, 0, 50, 20), quad(40, 4, 90, 24)])
+    assert len(merged) == 2
+
+
+def test_update_det_boxes_cuts_formula_out_of_text_box():
+    updated = update_det_boxes([quad(0, 0, 100, 20)], [{'bbox': [40, 0, 60, 20]}])
+    assert [b[[0, 2]].ravel().tolist() for b in updated] == [[0, 0, 39, 20], [61, 0, 100, 20]]
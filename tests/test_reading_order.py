@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from pdf_extract_kit.utils.reading_order import sorted_boxes
+
+
+def sorted_boxes_legacy(dt_boxes):
+    """The PaddleOCR sort this module replaces: sort by (y, x), then the insertion pass."""
+    num_boxes = dt_boxes.shape[0]
+    _boxes = list(sorted(dt_boxes, key=lambda x: (x[0][1], x[0][0])))
+    for i in range(num_boxes - 1):
+        for j in range(i, -1, -1):
+            if abs(_boxes[j + 1][0][1] - _boxes[j][0][1]) < 10 and (_boxes[j + 1][0][0] < _boxes[j][0][0]):
+                _boxes[j], _boxes[j + 1] = _boxes[j + 1], _boxes[j]
+            else:
+                break
+    return _boxes
+
+
+def random_page(rng, min_spacing, max_spacing, dtype, jitter=4):
+    """Text lines at random spacing, several boxes per line with jittered tops, shuffled."""
+    corners = []
+    y = 0.0
+    for _ in range(rng.integers(5, 40)):
+        y += rng.uniform(min_spacing, max_spacing)
+        for x in rng.uniform(0, 1000, rng.integers(1, 6)):
+            top = y + rng.uniform(-jitter, jitter)
+            corners.append([[x, top], [x + 50, top], [x + 50, top + 12], [x, top + 12]])
+    boxes = np.asarray(corners).astype(dtype)
+    return boxes[rng.permutation(len(boxes))]
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64, np.int32])
+@pytest.mark.parametrize('min_spacing, max_spacing', [(5, 40), (10, 40), (15, 40), (0, 8)])
+def test_sorted_boxes_matches_legacy(min_spacing, max_spacing, dtype):
+    rng = np.random.default_rng(min_spacing * 100 + max_spacing)
+    for _ in range(200):
+        boxes = random_page(rng, min_spacing, max_spacing, dtype)
+        expected = sorted_boxes_legacy(boxes)
+        result = sorted_boxes(boxes)
+        assert len(result) == len(expected)
+        for got, want in zip(result, expected):
+            np.testing.assert_array_equal(got, want)
+
+
+def test_sorted_boxes_ties_and_edge_cases():
+    assert sorted_boxes(np.zeros((0, 4, 2))) == []
+    # Identical tops and boxes exactly `tolerance` apart
+    boxes = np.array([[[x, y]] * 4 for x, y in [(5, 10), (3, 10), (5, 10), (1, 20), (0, 30), (2, 29)]], dtype=np.float64)
+    for got, want in zip(sorted_boxes(boxes), sorted_boxes_legacy(boxes)):
+        np.testing.assert_array_equal(got, want)
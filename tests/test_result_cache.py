@@ -0,0 +1,47 @@
+import os
+
+from pdf_extract_kit.utils.result_cache import ResultCache
+
+
+def cache_files(cache_dir, suffix='.pkl'):
+    return [os.path.join(root, name) for root, _, files in os.walk(cache_dir) for name in files if name.endswith(suffix)]
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert cache.get('ab12') is None
+    cache.put('ab12', {'boxes': [1, 2, 3]})
+    assert cache.get('ab12') == {'boxes': [1, 2, 3]}
+    assert 'ab12' in cache
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_entries_from_another_process_are_seen(tmp_path):
+    # Two instances on one directory stand in for two worker processes
+    a = ResultCache(str(tmp_path))
+    b = ResultCache(str(tmp_path))
+    a.put('ab12', 'page')
+    assert 'ab12' in b
+    assert b.path('ab12') == a.path('ab12')
+    assert b.get('ab12') == 'page'
+    assert b.stats()['entries'] == 1 and b.stats()['hits'] == 1
+
+
+def test_eviction_bounds_the_shared_directory(tmp_path):
+    blob = b'x' * 1000
+    writers = [ResultCache(str(tmp_path), max_bytes=5000, rescan_seconds=0) for _ in range(3)]
+    for k in range(30):
+        writers[k % 3].put_bytes(f'{k:04x}', blob)
+        assert sum(os.path.getsize(path) for path in cache_files(tmp_path)) <= 5000
+    # The most recent entries survive, whichever instance wrote them
+    assert writers[0].get_bytes(f'{29:04x}') == blob
+
+
+def test_suffixes_sharing_a_directory_are_separate(tmp_path):
+    audio = ResultCache(str(tmp_path), suffix='.mp3', max_bytes=1500, rescan_seconds=0)
+    timings = ResultCache(str(tmp_path), suffix='.timing', max_bytes=1500, rescan_seconds=0)
+    timings.put_bytes('ab12', b't' * 1000)
+    audio.put_bytes('ab12', b'a' * 1000)
+    audio.put_bytes('cd34', b'a' * 1000)
+    assert timings.get_bytes('ab12') == b't' * 1000
+    assert len(cache_files(tmp_path, '.mp3')) == 1
@@ -0,0 +1,71 @@
+import copy
+
+import numpy as np
+import pytest
+
+from pdf_extract_kit.utils.merge_blocks_and_spans import (
+    SpanGrid,
+    calculate_overlap_area_in_bbox1_area_ratio,
+    fill_spans_in_blocks,
+    fill_spans_in_blocks_bruteforce,
+)
+
+
+def random_bboxes(rng, n, max_size=80):
+    x0, y0 = rng.uniform(0, 1000, n), rng.uniform(0, 1400, n)
+    w, h = rng.uniform(0, max_size, n), rng.uniform(0, max_size / 3, n)
+    return np.stack([x0, y0, x0 + w, y0 + h], axis=1).tolist()
+
+
+def random_page(rng, num_blocks, num_spans):
+    spans = [{'id': k, 'type': 'text', 'bbox': bbox} for k, bbox in enumerate(random_bboxes(rng, num_spans))]
+    # A few zero-area and page-wide spans, which the grid keeps out of its cells
+    spans += [{'id': num_spans, 'bbox': [10.0, 10.0, 10.0, 30.0]}, {'id': num_spans + 1, 'bbox': [0.0, 500.0, 1000.0, 520.0]}]
+    blocks = []
+    for k, (x0, y0, x1, y1) in enumerate(random_bboxes(rng, num_blocks, max_size=400)):
+        # Corners in either order, as the layout model's polys may be
+        poly = [x1, y0, x0, y0, x0, y1, x1, y1] if k % 3 == 0 else [x0, y0, x1, y0, x1, y1, x0, y1]
+        blocks.append({'category_type': 'text', 'poly': poly})
+    return blocks, spans
+
+
+def test_query_finds_every_overlapping_span():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        bboxes = random_bboxes(rng, 300) + [[0.0, 0.0, 1000.0, 1400.0]]
+        grid = SpanGrid(bboxes)
+        for block in random_bboxes(rng, 30, max_size=400):
+            found = set(grid.query(block).tolist())
+            overlapping = {k for k, bbox in enumerate(bboxes) if calculate_overlap_area_in_bbox1_area_ratio(bbox, block) > 0}
+            assert overlapping <= found
+
+
+def test_query_outside_and_inverted():
+    grid = SpanGrid([[0, 0, 10, 10], [20, 20, 30, 30]], cell_size=(10, 10))
+    assert grid.query([100, 100, 120, 120]).tolist() == []
+    assert grid.query([25, 25, 5, 5]).tolist() == []
+    assert grid.query([-50, -50, 500, 500]).tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("radio", [0.0, 0.5, 0.8])
+def test_fill_spans_in_blocks_matches_bruteforce(radio):
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        blocks, spans = random_page(rng, 25, 200)
+        expected_spans = copy.deepcopy(spans)
+        expected = fill_spans_in_blocks_bruteforce(copy.deepcopy(blocks), expected_spans, radio)
+        actual = fill_spans_in_blocks(copy.deepcopy(blocks), spans, radio)
+        assert [[s['id'] for s in b['spans']] for b in actual[0]] == [[s['id'] for s in b['spans']] for b in expected[0]]
+        assert [b['bbox'] for b in actual[0]] == [b['bbox'] for b in expected[0]]
+        assert [s['id'] for s in actual[1]] == [s['id'] for s in expected[1]]
+        # Like the loop, the input list is left holding the unassigned spans
+        assert [s['id'] for s in spans] == [s['id'] for s in expected_spans]
+
+
+def test_fill_spans_in_blocks_small_page_and_negative_ratio():
+    rng = np.random.default_rng(2)
+    for num_blocks, num_spans, radio in ((2, 10, 0.5), (25, 200, -1.0)):
+        blocks, spans = random_page(rng, num_blocks, num_spans)
+        expected = fill_spans_in_blocks_bruteforce(copy.deepcopy(blocks), copy.deepcopy(spans), radio)
+        actual = fill_spans_in_blocks(copy.deepcopy(blocks), spans, radio)
+        assert [[s['id'] for s in b['spans']] for b in actual[0]] == [[s['id'] for s in b['spans']] for b in expected[0]]
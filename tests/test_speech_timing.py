@@ -0,0 +1,96 @@
+import struct
+
+import pytest
+
+from speech_timing import audio_duration, estimate_word_timings, mp3_duration, sentence_timings, shift_timings
+from text_to_speech import TextToSpeech, word_timings
+from tts_backends import StubBackend, read_wav, wav_bytes
+
+# MPEG-1 layer III, 128 kbps, 44100 Hz: 417-byte frames of 1152 samples
+MPEG1_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+MPEG1_FRAME = MPEG1_HEADER + b"\x00" * (417 - 4)
+# MPEG-2 layer III, 32 kbps, 24000 Hz (what gTTS returns): 96-byte frames of 576 samples
+MPEG2_FRAME = bytes([0xFF, 0xF3, 0x44, 0x00]) + b"\x00" * (96 - 4)
+
+
+def id3_tag(size):
+    # Syncsafe size: 7 bits per byte
+    return b"ID3\x04\x00\x00" + bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F]) + b"\x00" * size
+
+
+def test_mp3_duration_counts_frames():
+    assert mp3_duration(MPEG1_FRAME * 100) == pytest.approx(100 * 1152 / 44100)
+    assert mp3_duration(MPEG2_FRAME * 250) == pytest.approx(250 * 576 / 24000)
+
+
+def test_mp3_duration_skips_tags_and_junk_of_joined_files():
+    # Two files joined as concat_audio does, each with its own ID3 tag, plus stray bytes
+    joined = id3_tag(300) + MPEG2_FRAME * 50 + b"\x00\x01junk" + id3_tag(20) + MPEG2_FRAME * 30
+    assert mp3_duration(joined) == pytest.approx(80 * 576 / 24000)
+    assert mp3_duration(b"") == 0.0
+
+
+def test_audio_duration_of_wav_and_unknown_format():
+    assert audio_duration(wav_bytes(b"\x00\x00" * 8000, 16000), "wav") == pytest.approx(0.5)
+    assert audio_duration(wav_bytes(b"\x00\x00" * 8000, 8000, channels=2), "wav") == pytest.approx(0.5)
+    assert audio_duration(b"", "mp3") == 0.0
+    with pytest.raises(ValueError):
+        audio_duration(b"data", "ogg")
+
+
+def test_estimated_timings_span_the_duration_with_pauses_after_punctuation():
+    timings = estimate_word_timings("One two, three. Four", 10.0)
+    assert [word for word, _, _ in timings] == ["One", "two,", "three.", "Four"]
+    starts = [start for _, start, _ in timings]
+    assert starts == sorted(starts) and starts[0] == 0.0
+    assert all(start < end for _, start, end in timings)
+    # Weights 4, 5 + 2, 7 + 4, 5: the last word ends with the audio
+    assert timings[-1][2] == pytest.approx(10.0, abs=1e-3)
+    gaps = [following[1] - current[2] for current, following in zip(timings, timings[1:])]
+    assert gaps[0] == pytest.approx(0.0, abs=1e-3)
+    assert gaps[2] > gaps[1] > gaps[0]
+    assert estimate_word_timings("   ", 3.0) == []
+
+
+def test_shift_and_sentence_timings():
+    words = [["Hello", 0.0, 0.4], ["world.", 0.5, 0.9], ["Next", 1.2, 1.5], ["one", 1.6, 1.8]]
+    assert shift_timings(words, 1.0)[0] == ["Hello", 1.0, 1.4]
+    assert sentence_timings(words) == [["Hello world.", 0.0, 0.9], ["Next one", 1.2, 1.8]]
+    assert sentence_timings([]) == []
+
+
+def test_stub_timings_match_the_audio():
+    backend = StubBackend()
+    text = "Read this sentence aloud, slowly. Then stop"
+    audio = backend.synthesize(text)
+    (_, _, rate), frames = read_wav(audio)
+    samples = struct.unpack(f"<{len(frames) // 2}h", frames)
+    timings = backend.word_timings(text)
+    assert [word for word, _, _ in timings] == text.split()
+    for _, start, end in timings:
+        # Each tone starts on its first sample and is followed by silence
+        assert samples[round(start * rate)] != 0
+        assert samples[round(end * rate) - 1] != 0
+        assert samples[round(end * rate)] == 0
+    assert word_timings(text, audio, engine="stub") == timings
+
+
+def test_rendered_document_timings(tmp_path):
+    tts = TextToSpeech("stub", workers=2, cache_dir=str(tmp_path / "cache"))
+    data = {'document_title': "Cells", 'headings': [{'heading': "Parts", 'points': ["A nucleus holds the DNA", "Membranes wrap it"]}]}
+    document = tts.render_document(data)
+    words = document.word_timings()
+    assert [word for word, _, _ in words] == "Document Title: Cells. Section: Parts. A nucleus holds the DNA. Membranes wrap it.".split()
+    assert all(a[2] <= b[1] for a, b in zip(words, words[1:]))
+
+    track = document.timing_track(0)
+    section = read_wav(document.section_audio(0))
+    assert track['words'][0][1] == 0.0
+    assert track['words'][-1][2] <= len(section[1]) / (2 * section[0][2])
+    assert [sentence for sentence, _, _ in track['sentences']] == ["Section: Parts.", "A nucleus holds the DNA.", "Membranes wrap it."]
+
+    # Rendered again from the cache, timings included
+    misses = tts.audio_cache.stats()['misses']
+    assert tts.render_document(data).segments == document.segments
+    assert tts.audio_cache.stats()['misses'] == misses
+    assert tts.audio_cache.timings.stats()['hits'] == len(document.segments)
@@ -0,0 +1,76 @@
+import time
+import random
+import threading
+
+import pytest
+
+from pdf_extract_kit.utils.stage_pipeline import Stage, StagePipeline
+from pdf_extract_kit.utils.tracing import Tracer
+
+
+def jittered(fn):
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    def run(item):
+        with lock:
+            delay = rng.uniform(0, 0.005)
+        time.sleep(delay)
+        return fn(item)
+    return run
+
+
+def make_pipeline(*stages, maxsize=2):
+    return StagePipeline(list(stages), maxsize=maxsize, tracer=Tracer())
+
+
+def test_outputs_come_in_input_order_with_parallel_workers():
+    pipeline = make_pipeline(Stage("double", jittered(lambda x: 2 * x), workers=4),
+                             Stage("label", jittered(lambda x: f"item {x}"), workers=3))
+    assert list(pipeline.run(range(50))) == [f"item {2 * i}" for i in range(50)]
+    metrics = pipeline.metrics()
+    assert metrics["source"]["items"] == metrics["double"]["items"] == metrics["label"]["items"] == 50
+    assert metrics["double"]["queue_max"] <= 2
+
+
+def test_empty_input_and_no_stages():
+    assert list(make_pipeline(Stage("noop", lambda x: x)).run([])) == []
+    assert list(make_pipeline().run([1, 2, 3])) == [1, 2, 3]
+
+
+def test_stages_overlap_in_time():
+    pipeline = make_pipeline(Stage("a", lambda x: time.sleep(0.02) or x), Stage("b", lambda x: time.sleep(0.02) or x))
+    start = time.time()
+    assert list(pipeline.run(range(10))) == list(range(10))
+    # Run one after the other, the stages would take 0.4 s
+    assert time.time() - start < 0.35
+
+
+def test_stage_error_is_raised_and_threads_stop():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("bad page 3")
+        return x
+
+    before = threading.active_count()
+    pipeline = make_pipeline(Stage("check", fail_on_three, workers=2), Stage("after", lambda x: x))
+    with pytest.raises(ValueError, match="bad page 3"):
+        list(pipeline.run(range(100)))
+    assert threading.active_count() == before
+
+
+def test_source_error_is_raised():
+    def pages():
+        yield 1
+        raise OSError("cannot render page 2")
+
+    with pytest.raises(OSError, match="page 2"):
+        list(make_pipeline(Stage("noop", lambda x: x)).run(pages()))
+
+
+def test_leaving_early_stops_the_threads():
+    before = threading.active_count()
+    results = make_pipeline(Stage("noop", lambda x: x, workers=2)).run(range(1000))
+    assert next(results) == 0
+    results.close()
+    assert threading.active_count() == before
@@ -1,8 +1,316 @@
+import re
 import json
-from gtts import gTTS
+import tempfile
+import subprocess
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import os
 
-def read_json_aloud(json_file_path):
+from pdf_extract_kit.utils.config_loader import load_config
+from pdf_extract_kit.utils.result_cache import ResultCache, make_cache_key
+from pdf_extract_kit.utils.tracing import TRACER
+from tts_backends import concat_audio, get_tts_backend
+from document_audio import DocumentAudio, document_segments
+from speech_timing import audio_duration, estimate_word_timings, shift_timings
+
+DEFAULT_TTS_CONFIG = os.path.join("configs", "tts.yaml")
+DEFAULT_AUDIO_CACHE_DIR = os.path.join(".cache", "audio")
+# The Google Translate endpoint rejects longer texts; short chunks also start playing sooner
+MAX_CHUNK_CHARS = 200
+TTS_WORKERS = 4
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def section_text(section):
+    """Text read aloud for one section ({"heading", "points"})"""
+    text = f"Section: {section['heading']}. "
+    for point in section["points"]:
+        text += f"{point}. "
+    return text
+
+def document_text(data):
+    """Flatten a structured output ({"document_title", "headings"}) into the text that is read aloud"""
+    full_text = f"Document Title: {data['document_title']}. "
+    for section in data["headings"]:
+        full_text += section_text(section)
+    return full_text
+
+def normalize_tts_text(text):
+    """Text as it is spoken: NFC-normalized with runs of whitespace collapsed, so layout differences hit the cache"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+class AudioCache:
+    def __init__(self, cache_dir=DEFAULT_AUDIO_CACHE_DIR, max_bytes=256 * 2**20, audio_format="mp3"):
+        """
+        Content-addressed cache of synthesized speech.
+
+        Audio is keyed by (normalized text, language, slow flag, engine and its options), so the
+        same text read twice, or a section shared by several documents, is synthesized once.
+        Entries are audio files in a ResultCache, evicted least recently used first once they
+        exceed `max_bytes`. The word timing track of each entry is kept in a second ResultCache
+        under the same key (`.timing` files), so timings never need another synthesis.
+
+        Args:
+            cache_dir (str): Directory for the audio files.
+            max_bytes (int): Total size on disk above which least recently used audio is removed.
+            audio_format (str): Extension of the stored files, the format of the engine used with this cache.
+        """
+        self.cache = ResultCache(cache_dir, max_bytes=max_bytes, suffix=f".{audio_format}")
+        self.timings = ResultCache(cache_dir, max_bytes=max(max_bytes // 16, 2**20), suffix=".timing")
+
+    @staticmethod
+    def key(text, language='en', slow=True, engine='gtts'):
+        backend = get_tts_backend(engine)
+        return make_cache_key(normalize_tts_text(text), backend.cache_id, {'language': backend.voice(language), 'slow': bool(slow)})
+
+    def get(self, text, language='en', slow=True, engine='gtts'):
+        """Cached audio bytes for text, or None on a miss."""
+        return self.cache.get_bytes(self.key(text, language, slow, engine))
+
+    def put(self, text, audio, language='en', slow=True, engine='gtts'):
+        self.cache.put_bytes(self.key(text, language, slow, engine), audio)
+
+    def path(self, text, language='en', slow=True, engine='gtts'):
+        """Path of the cached audio file for text, or None if it is not cached."""
+        return self.cache.path(self.key(text, language, slow, engine))
+
+    def synthesize(self, text, language='en', slow=True, engine='gtts', with_timings=False):
+        """
+        Audio for text, from the cache or synthesized with `engine` (a TTS_REGISTRY name or a
+        backend, see tts_backends.py) and stored.
+
+        With `with_timings`, returns (audio, word timings); timings missing from the cache are
+        computed from the audio at hand (see word_timings) and stored next to it.
+
+        Raises whatever the engine raises (HTTP or network errors); failures are not cached.
+        """
+        backend = get_tts_backend(engine)
+        key = self.key(text, language, slow, backend)
+        audio = self.cache.get_bytes(key)
+        if audio is None:
+            audio = backend.synthesize(normalize_tts_text(text), language, slow)
+            self.cache.put_bytes(key, audio)
+        if not with_timings:
+            return audio
+        timings = self.timings.get(key)
+        if timings is None:
+            timings = word_timings(text, audio, slow, backend)
+            self.timings.put(key, timings)
+        return audio, timings
+
+    def stats(self):
+        return self.cache.stats()
+
+def split_sentences(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Split text into chunks for synthesis: whole sentences, merged up to `max_chars`.
+
+    The first sentence is kept on its own so it comes back (and starts playing) quickly;
+    sentences longer than `max_chars` are cut at the last comma or space that fits.
+    """
+    chunks = []
+    for sentence in SENTENCE_END.split(normalize_tts_text(text)):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(', ', 0, max_chars) + 1 or sentence.rfind(' ', 0, max_chars + 1)
+            if cut <= 0:
+                cut = max_chars
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if not sentence:
+            continue
+        if len(chunks) > 1 and len(chunks[-1]) + 1 + len(sentence) <= max_chars:
+            chunks[-1] += " " + sentence
+        else:
+            chunks.append(sentence)
+    return chunks
+
+def document_chunks(data, max_chars=MAX_CHUNK_CHARS):
+    """
+    Chunks of document_text(data) in reading order. Chunks never span two sections, so a
+    section shared by several documents reuses its cached audio.
+    """
+    chunks = split_sentences(f"Document Title: {data['document_title']}. ", max_chars)
+    for section in data["headings"]:
+        chunks.extend(split_sentences(section_text(section), max_chars))
+    return chunks
+
+def word_timings(text, audio, slow=True, engine='gtts'):
+    """
+    [word, start, end] timings (seconds) of the words of text in its synthesized audio: exact
+    where the engine reports them (the stub engine), otherwise spread over the measured
+    duration of the audio (see speech_timing.estimate_word_timings). Nothing is synthesized.
+    """
+    backend = get_tts_backend(engine)
+    text = normalize_tts_text(text)
+    timings = backend.word_timings(text, slow)
+    if timings is None:
+        timings = estimate_word_timings(text, audio_duration(audio, backend.format))
+    return timings
+
+def synthesize_speech(text, language='en', slow=True, engine='gtts', audio_cache=None, with_timings=False):
+    """Audio bytes for one chunk of text, through `audio_cache` if given; with `with_timings`, (audio, word timings)"""
+    backend = get_tts_backend(engine)
+    with TRACER.span("tts.chunk", engine=backend.name, chars=len(text)):
+        if audio_cache is not None:
+            return audio_cache.synthesize(text, language, slow, backend, with_timings)
+        audio = backend.synthesize(normalize_tts_text(text), language, slow)
+        return (audio, word_timings(text, audio, slow, backend)) if with_timings else audio
+
+def iter_speech(chunks, language='en', slow=True, engine='gtts', audio_cache=None, workers=TTS_WORKERS, with_timings=False):
+    """
+    Yield the audio of each chunk in order, as soon as it is ready; with `with_timings`,
+    (audio, word timings relative to the chunk) pairs.
+
+    Up to `workers` chunks are synthesized concurrently and at most twice that many are
+    kept ahead of the consumer, so playback of the first chunk starts while the rest are
+    still being produced and memory stays bounded for long documents. Chunks can be played
+    one after another or joined with concat_audio.
+
+    Args:
+        chunks (Iterable[str]): Text chunks, e.g. from split_sentences or document_chunks.
+        engine (str or TTSBackend): Registry name of the engine, or a configured backend.
+        workers (int): Size of the synthesis thread pool.
+    """
+    chunks = iter(chunks)
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="tts")
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(pool.submit(synthesize_speech, chunk, language, slow, engine, audio_cache, with_timings))
+            if len(pending) >= 2 * max(1, workers):
+                break
+        while pending:
+            audio = pending.popleft().result()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(pool.submit(synthesize_speech, chunk, language, slow, engine, audio_cache, with_timings))
+            yield audio
+    finally:
+        # Left early (error or the consumer stopped): drop the chunks nobody will play
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def synthesize_chunked(chunks, language='en', slow=True, engine='gtts', audio_cache=None, workers=TTS_WORKERS):
+    """Audio of all chunks as one file, synthesized concurrently (see iter_speech)"""
+    audio_format = get_tts_backend(engine).format
+    return concat_audio(list(iter_speech(chunks, language, slow, engine, audio_cache, workers)), audio_format)
+
+def play_audio(audio, audio_format="mp3"):
+    """Play audio bytes and wait until they finish (macOS afplay)"""
+    with tempfile.NamedTemporaryFile(suffix=f".{audio_format}") as f:
+        f.write(audio)
+        f.flush()
+        subprocess.run(["afplay", f.name], check=False)
+
+def load_tts_config(config_path=DEFAULT_TTS_CONFIG):
+    """TTS settings from a YAML config (see configs/tts.yaml); missing keys take their defaults"""
+    config = {
+        'engine': 'gtts',
+        'language': 'en',
+        'slow': True,
+        'workers': TTS_WORKERS,
+        'max_chunk_chars': MAX_CHUNK_CHARS,
+        'cache_dir': DEFAULT_AUDIO_CACHE_DIR,
+        'cache_max_mb': 256,
+        'engines': {},
+    }
+    if config_path and os.path.exists(config_path):
+        config.update(load_config(config_path) or {})
+    # Lets a deployment switch engines (e.g. to espeak on an offline server) without editing the file
+    config['engine'] = os.environ.get("READEASE_TTS_ENGINE", config['engine'])
+    return config
+
+class TextToSpeech:
+    def __init__(self, engine='gtts', language='en', slow=True, workers=TTS_WORKERS, max_chunk_chars=MAX_CHUNK_CHARS,
+                 cache_dir=DEFAULT_AUDIO_CACHE_DIR, cache_max_mb=256, engine_config=None):
+        """
+        The reading voice of the app: one engine with its settings and audio cache.
+
+        Args:
+            engine (str): TTS_REGISTRY name: gtts, google_translate, espeak or stub.
+            language (str): Language code passed to the engine.
+            slow (bool): Slow, clear pronunciation.
+            workers (int): Chunks synthesized concurrently, see iter_speech.
+            max_chunk_chars (int): Longest chunk sent to the engine, see split_sentences.
+            cache_dir (str, optional): Audio cache directory; None disables caching.
+            cache_max_mb (int): Size bound of the audio cache in MB.
+            engine_config (dict, optional): Options of the engine (e.g. espeak voice and speed).
+        """
+        self.backend = get_tts_backend(engine, engine_config)
+        self.language = language
+        self.slow = slow
+        self.workers = workers
+        self.max_chunk_chars = max_chunk_chars
+        self.audio_cache = None
+        if cache_dir:
+            self.audio_cache = AudioCache(cache_dir, max_bytes=cache_max_mb * 2**20, audio_format=self.backend.format)
+
+    @classmethod
+    def from_config(cls, config_path=DEFAULT_TTS_CONFIG, **overrides):
+        """Build from configs/tts.yaml; keyword arguments override the file (e.g. cache_dir=None)."""
+        config = load_tts_config(config_path)
+        config.update(overrides)
+        engine_config = config['engines'].get(config['engine']) if config.get('engines') else None
+        return cls(config['engine'], config['language'], config['slow'], config['workers'], config['max_chunk_chars'],
+                   config['cache_dir'], config['cache_max_mb'], engine_config)
+
+    @property
+    def format(self):
+        return self.backend.format
+
+    @property
+    def mime_type(self):
+        return self.backend.mime_type
+
+    def chunks(self, text):
+        return split_sentences(text, self.max_chunk_chars)
+
+    def document_chunks(self, data):
+        return document_chunks(data, self.max_chunk_chars)
+
+    def iter_speech(self, chunks, with_timings=False):
+        """Audio of each chunk in order, as soon as it is ready (see iter_speech)."""
+        return iter_speech(chunks, self.language, self.slow, self.backend, self.audio_cache, self.workers, with_timings)
+
+    def synthesize(self, text):
+        """Audio for text (a string, or a list of chunks) as one file."""
+        chunks = self.chunks(text) if isinstance(text, str) else text
+        return self.join(list(self.iter_speech(chunks)))
+
+    def join(self, segments):
+        return concat_audio(segments, self.format)
+
+    def render_document(self, data, on_segment=None):
+        """
+        Synthesize a structured output once, segment by segment (title, each heading and point),
+        into a DocumentAudio: the full-document audio plus a byte-offset index for jumping to
+        any section, and a word timing track for highlighting the word being read. All chunks
+        of all segments share one thread pool and the audio cache; timings come from the same
+        pass (cached with each chunk's audio), never from a second synthesis.
+
+        Args:
+            data (dict): Structured output ({"document_title", "headings"}).
+            on_segment (callable, optional): Called with (segment index, audio) as each segment
+                is ready, in order; e.g. to start playing the title while the rest is synthesized.
+        """
+        segments = document_segments(data)
+        segment_chunks = [self.chunks(segment['text']) for segment in segments]
+        speech = self.iter_speech([chunk for chunks in segment_chunks for chunk in chunks], with_timings=True)
+        segment_audio, segment_timings = [], []
+        with TRACER.span("tts.document", items=len(segments)):
+            for index, chunks in enumerate(segment_chunks):
+                parts, timings, offset = [], [], 0.0
+                for _ in chunks:
+                    audio, chunk_timings = next(speech)
+                    parts.append(audio)
+                    timings.extend(shift_timings(chunk_timings, offset))
+                    offset += audio_duration(audio, self.format)
+                segment_audio.append(self.join(parts))
+                segment_timings.append(timings)
+                if on_segment is not None:
+                    on_segment(index, segment_audio[-1])
+        return DocumentAudio.build(segments, segment_audio, self.format, segment_timings)
+
+def read_json_aloud(json_file_path, tts=None):
     # Load your structured JSON
     with open(json_file_path, "r") as f:
         data = json.load(f)
@@ -10,23 +318,21 @@ def read_json_aloud(json_file_path):
     print("📖 Preparing to read:", data["document_title"])
     
     # Combine all content for reading
-    full_text = f"Document Title: {data['document_title']}. "
+    full_text = document_text(data)
     
-    for section in data["headings"]:
-        full_text += f"Section: {section['heading']}. "
-        for point in section["points"]:
-            full_text += f"{point}. "
-    
-    # Convert to speech with clear, slow pronunciation
-    tts = gTTS(text=full_text, lang='en', slow=True)
-    output_file = "reading_assistant_output.mp3"
-    tts.save(output_file)
+    # Convert to speech sentence by sentence, with the engine from configs/tts.yaml; each chunk
+    # is played (macOS) as soon as it is ready while the following ones are synthesized
+    tts = tts or TextToSpeech.from_config()
+    segments = []
+    for audio in tts.iter_speech(tts.document_chunks(data)):
+        segments.append(audio)
+        play_audio(audio, tts.format)
+    output_file = f"reading_assistant_output.{tts.format}"
+    with open(output_file, "wb") as f:
+        f.write(tts.join(segments))
     
     print(f"✅ Audio saved as {output_file}")
     
-    # Play the audio (macOS)
-    os.system(f"afplay {output_file}")
-    
     return full_text
 
 # Test with your JSON
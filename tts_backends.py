@@ -0,0 +1,226 @@
+import io
+import json
+import wave
+import shutil
+import struct
+import zlib
+import threading
+import subprocess
+
+from pdf_extract_kit.registry.registry import TTS_REGISTRY
+
+
+class TTSBackend:
+    # Registry name, and the container of the audio returned by synthesize()
+    name = None
+    format = "mp3"
+
+    def __init__(self, config=None):
+        """
+        A speech synthesizer selected by name from TTS_REGISTRY (see configs/tts.yaml).
+
+        Args:
+            config (dict, optional): Engine options from the `engines.<name>` section of the
+                TTS config. They are part of the cache key, so changing e.g. a voice misses the cache.
+        """
+        self.config = dict(config or {})
+
+    @property
+    def cache_id(self):
+        """Identity of the engine and its options, for audio cache keys."""
+        if not self.config:
+            return self.name
+        return f"{self.name}:{json.dumps(self.config, sort_keys=True, default=str)}"
+
+    @property
+    def mime_type(self):
+        return f"audio/{self.format}"
+
+    def voice(self, language='en'):
+        """The voice synthesize() speaks `language` with; audio is cached under it rather than the requested language."""
+        return language
+
+    def synthesize(self, text, language='en', slow=True):
+        """Return the audio for text as bytes in self.format; raise on failure."""
+        raise NotImplementedError
+
+    def word_timings(self, text, slow=True):
+        """
+        Exact [word, start, end] timings (seconds) of the audio synthesize() returns for text,
+        if the engine knows them; None means they are estimated from the audio (see speech_timing).
+        """
+        return None
+
+
+def fetch_google_tts(text, language='en', timeout=30):
+    """Fetch MP3 audio for text from the Google Translate TTS endpoint; raises on HTTP or network errors"""
+    import requests
+
+    url = f"http://translate.google.com/translate_tts?ie=UTF-8&tl={language}&q={requests.utils.quote(text)}&client=tw-ob"
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+    response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code != 200:
+        raise RuntimeError(f"Google TTS API error: {response.status_code}")
+    return response.content
+
+
+@TTS_REGISTRY.register("gtts")
+class GTTSBackend(TTSBackend):
+    name = "gtts"
+
+    def synthesize(self, text, language='en', slow=True):
+        # Imported here so offline installs can run without gTTS
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=language, slow=slow).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+@TTS_REGISTRY.register("google_translate")
+class GoogleTranslateBackend(TTSBackend):
+    name = "google_translate"
+
+    def synthesize(self, text, language='en', slow=True):
+        # The endpoint has no slow mode
+        return fetch_google_tts(text, language, timeout=self.config.get('timeout', 30))
+
+
+@TTS_REGISTRY.register("espeak")
+class EspeakBackend(TTSBackend):
+    name = "espeak"
+    format = "wav"
+
+    def voice(self, language='en'):
+        # A configured voice overrides the document language
+        return self.config.get('voice') or language
+
+    def synthesize(self, text, language='en', slow=True):
+        """Synthesize locally with espeak-ng (or espeak); no network needed."""
+        executable = self.config.get('executable') or shutil.which('espeak-ng') or shutil.which('espeak')
+        if not executable:
+            raise RuntimeError("espeak-ng/espeak not found; install it or choose another TTS engine")
+        speed = self.config.get('slow_speed', 130) if slow else self.config.get('speed', 175)
+        command = [executable, '-v', self.voice(language), '-s', str(speed), '--stdin', '--stdout']
+        result = subprocess.run(command, input=text.encode('utf-8'), capture_output=True, check=False)
+        if result.returncode != 0 or not result.stdout:
+            raise RuntimeError(f"espeak failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+        # Written to a pipe, the header carries no real sizes; rewrite it
+        return concat_audio([result.stdout], "wav")
+
+
+@TTS_REGISTRY.register("stub")
+class StubBackend(TTSBackend):
+    name = "stub"
+    format = "wav"
+
+    def __init__(self, config=None):
+        """
+        Deterministic offline stand-in: one square-wave tone per word, pitched by a hash of the
+        word, with silence between words. The same text always gives the same bytes and the
+        length follows the text, so tests and throughput benchmarks run without a speech engine.
+
+        Config:
+            sample_rate (int): Default 16000.
+            word_seconds (float): Base duration of a word, plus `char_seconds` per character.
+            char_seconds (float): Default 0.05.
+            gap_seconds (float): Silence after each word, default 0.08.
+            slow_factor (float): All durations are stretched by this when slow, default 1.5.
+        """
+        super().__init__(config)
+        self.sample_rate = self.config.get('sample_rate', 16000)
+
+    def word_durations(self, text, slow=True):
+        """(word, tone seconds, gap seconds) for every word of text, in order."""
+        scale = self.config.get('slow_factor', 1.5) if slow else 1.0
+        word_seconds = self.config.get('word_seconds', 0.1)
+        char_seconds = self.config.get('char_seconds', 0.05)
+        gap_seconds = self.config.get('gap_seconds', 0.08)
+        return [(word, (word_seconds + char_seconds * len(word)) * scale, gap_seconds * scale)
+                for word in text.split()]
+
+    def _word_samples(self, text, slow):
+        return [(word, int(round(seconds * self.sample_rate)), int(round(gap * self.sample_rate)))
+                for word, seconds, gap in self.word_durations(text, slow)]
+
+    def synthesize(self, text, language='en', slow=True):
+        frames = bytearray()
+        for word, samples, gap in self._word_samples(text, slow):
+            period = self.sample_rate // (200 + zlib.crc32(word.encode('utf-8')) % 400)
+            cycle = struct.pack('<h', 3000) * (period // 2) + struct.pack('<h', -3000) * (period - period // 2)
+            frames += (cycle * (samples // period + 1))[:samples * 2]
+            frames += b'\x00\x00' * gap
+        return wav_bytes(bytes(frames), self.sample_rate)
+
+    def word_timings(self, text, slow=True):
+        """Exact: each word's tone starts and ends on the sample synthesize() puts it."""
+        timings, position = [], 0
+        for word, samples, gap in self._word_samples(text, slow):
+            timings.append([word, round(position / self.sample_rate, 3), round((position + samples) / self.sample_rate, 3)])
+            position += samples + gap
+        return timings
+
+
+def wav_bytes(frames, sample_rate, channels=1, sample_width=2):
+    """Wrap raw PCM frames in a WAV header."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(sample_width)
+        w.setframerate(sample_rate)
+        w.writeframes(frames)
+    return buffer.getvalue()
+
+
+def read_wav(data):
+    """(params, frames) of WAV bytes, with params = (channels, sample width, sample rate)."""
+    with wave.open(io.BytesIO(data), 'rb') as w:
+        params = (w.getnchannels(), w.getsampwidth(), w.getframerate())
+        # Headers written to a pipe claim more frames than there are; readframes stops at the end
+        frames = w.readframes(w.getnframes())
+    return params, frames
+
+
+def concat_audio(segments, audio_format):
+    """
+    Join audio segments of one format into a single playable file, without re-encoding.
+
+    MP3 is a sequence of self-contained frames, so the bytes are concatenated. WAV segments
+    must share channels, sample width and rate; their PCM frames are joined under one new header.
+    """
+    if audio_format == "mp3":
+        return b"".join(segments)
+    if audio_format != "wav":
+        raise ValueError(f"Cannot concatenate {audio_format} audio")
+    params, frames = None, []
+    for segment in segments:
+        segment_params, segment_frames = read_wav(segment)
+        if params is not None and segment_params != params:
+            raise ValueError(f"WAV segments differ in format: {segment_params} vs {params}")
+        params = segment_params
+        frames.append(segment_frames)
+    if params is None:
+        return b""
+    channels, sample_width, sample_rate = params
+    return wav_bytes(b"".join(frames), sample_rate, channels, sample_width)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_tts_backend(engine, config=None):
+    """
+    The backend for `engine`, a registry name or a TTSBackend (returned as is).
+
+    Backends are built once per process for each (name, config) pair.
+    """
+    if isinstance(engine, TTSBackend):
+        return engine
+    key = (engine, json.dumps(config or {}, sort_keys=True, default=str))
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = TTS_REGISTRY.get(engine)(config)
+        return _backends[key]